@@ -16,7 +16,8 @@ import { toast } from 'sonner';
 import { Plus, Trash2 } from 'lucide-react';
 import type { CategoryField, CategoryFieldCreate, CategoryFieldUpdate } from '@/lib/api/categoryFields';
 
-function parseOptionsJson(fieldOptions: string | undefined): string[] {
+function parseOptionsJson(fieldOptions: string[] | string | null | undefined): string[] {
+  if (Array.isArray(fieldOptions)) return fieldOptions.map((x: unknown) => String(x ?? ''));
   if (!fieldOptions?.trim()) return [];
   try {
     const arr = JSON.parse(fieldOptions);
@@ -99,7 +100,7 @@ export function CategoryFieldForm({
     if (formData.field_type === 'select' && !validateOptions()) return;
     const optionsJson =
       formData.field_type === 'select'
-        ? JSON.stringify(optionValues.map((v) => v.trim()).filter(Boolean))
+        ? optionValues.map((v) => v.trim()).filter(Boolean)
         : undefined;
     if (isEdit && initialField) {
       const data: CategoryFieldUpdate = {
@@ -286,7 +286,8 @@ export default function NewProductPage() {
         );
 
       case 'select':
-        const options = field.field_options ? JSON.parse(field.field_options) : [];
+        const options = !field.field_options ? []
+          : typeof field.field_options === 'string' ? JSON.parse(field.field_options) : field.field_options;
         return (
           <div key={field.id} className="space-y-2">
             <Label htmlFor={`field_${field.id}`}>
@@ -8,7 +8,7 @@ export interface CategoryField {
   field_name: string;
   field_label: string;
   field_type: 'text' | 'number' | 'decimal' | 'select' | 'boolean' | 'textarea';
-  field_options?: string;
+  field_options?: string[] | null;
   is_required: boolean;
   display_order: number;
   placeholder?: string;
@@ -24,7 +24,7 @@ export interface CategoryFieldCreate {
   field_name: string;
   field_label: string;
   field_type: 'text' | 'number' | 'decimal' | 'select' | 'boolean' | 'textarea';
-  field_options?: string;
+  field_options?: string[] | null;
   is_required?: boolean;
   display_order?: number;
   placeholder?: string;
@@ -37,7 +37,7 @@ export interface CategoryFieldUpdate {
   field_name?: string;
   field_label?: string;
   field_type?: 'text' | 'number' | 'decimal' | 'select' | 'boolean' | 'textarea';
-  field_options?: string;
+  field_options?: string[] | null;
   is_required?: boolean;
   display_order?: number;
   placeholder?: string;
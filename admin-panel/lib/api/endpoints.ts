@@ -33,6 +33,7 @@ export const API_ENDPOINTS = {
   productVariants: '/api/product-variants/',
   productVariant: (id: number) => `/api/product-variants/${id}/`,
   productVariantsBulk: (productId: number) => `/api/products/${productId}/variants/bulk/`,
+  productVariantsGenerate: (productId: number) => `/api/products/${productId}/variants/generate/`,
 
   // Orders
   orders: '/api/orders/',
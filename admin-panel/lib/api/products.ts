@@ -111,6 +111,21 @@ export const productVariantsApi = {
     );
     return response.data;
   },
+  generate: async (
+    productId: number,
+    data: {
+      selections?: Record<string, string[]>;
+      price_modifiers?: Record<string, Record<string, number>>;
+      base_price?: number | null;
+      delete_missing?: boolean;
+    }
+  ): Promise<{ message: string; created: number[]; updated: number[]; unchanged: number[]; deleted: number[] }> => {
+    const response = await apiClient.post<{ message: string; created: number[]; updated: number[]; unchanged: number[]; deleted: number[] }>(
+      getFullUrl(API_ENDPOINTS.productVariantsGenerate(productId)),
+      data
+    );
+    return response.data;
+  },
   delete: async (variantId: number): Promise<void> => {
     await apiClient.delete(getFullUrl(API_ENDPOINTS.productVariant(variantId)));
   },
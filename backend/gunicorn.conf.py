@@ -0,0 +1,64 @@
+"""
+Gunicorn settings for the production ASGI server: a master process managing WEB_CONCURRENCY
+uvicorn workers (HTTP and WebSockets), read automatically from the working directory:
+
+  python manage.py migrate --noinput            # once per deploy, before the new servers start
+  gunicorn sonic_backend.asgi:application
+
+The master imports the application before forking (preload), so every worker starts from a
+warmed-up copy of Django and shares its memory pages until they are written. Migrations are not
+run here: a release runs them once, not once per container or worker.
+
+Graceful reload: SIGHUP starts fresh workers and lets the old ones finish their requests
+(GRACEFUL_TIMEOUT), but with preload they fork the code already in the master. For new code,
+send SIGUSR2 (a new master and workers start next to the old ones), then SIGTERM to the old
+master, or roll the containers. Open notification sockets are closed either way; the app
+reconnects and catches up with last_seen_id.
+"""
+import gc
+import multiprocessing
+
+from decouple import config as env  # 'config' is a gunicorn setting name
+
+_redis_url = env('REDIS_URL', default='')
+
+bind = f"0.0.0.0:{env('PORT', default=8000, cast=int)}"
+worker_class = 'sonic_backend.workers.ASGIWorker'
+
+# One worker per CPU with Redis. Without it the response cache, its invalidation generations,
+# presence and the channel layer live in each process's memory, so workers would disagree.
+workers = env('WEB_CONCURRENCY', default=multiprocessing.cpu_count() if _redis_url else 1, cast=int)
+if workers > 1 and not _redis_url:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(
+        'WEB_CONCURRENCY > 1 needs REDIS_URL: the cache and the channel layer must be shared by the workers.'
+    )
+
+# Development (docker-compose): restart the workers when a source file changes; needs preload off
+reload = env('GUNICORN_RELOAD', default=False, cast=bool)
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool) and not reload
+
+# Seconds a worker gets to finish its requests on reload / shutdown, and to answer the master
+graceful_timeout = env('GRACEFUL_TIMEOUT', default=30, cast=int)
+timeout = 60
+keepalive = 5
+
+# Recycle a worker after this many requests (0 = never); the jitter keeps them from restarting together
+max_requests = env('MAX_REQUESTS', default=0, cast=int)
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    """In the master, once the preloaded app is imported and before the workers fork."""
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Import the views and serializers now rather than on each worker's first request
+    get_resolver().url_patterns
+    # A connection opened while importing must not be shared by the forked workers
+    connections.close_all()
+    # Move the imported objects out of the collector's reach: collections in a worker would
+    # otherwise write to (and so copy) the pages it shares with the master
+    gc.freeze()
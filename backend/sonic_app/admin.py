@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     Category, CategoryField, User, Product, ProductVariant, ProductFieldValue, ProductLead,
     Order, OrderItem, CustomizeOrders, AddToCart,
-    Banners, CMS, NotificationType, NotificationTable,
+    Banners, CMS, NotificationType, NotificationTable, NotificationArchive, BroadcastNotification,
     OrderEmails, Session, OTP
 )
 
@@ -127,7 +127,7 @@ class CMSAdmin(admin.ModelAdmin):
 
 @admin.register(NotificationType)
 class NotificationTypeAdmin(admin.ModelAdmin):
-    list_display = ['notif_name', 'notif_status', 'created_at']
+    list_display = ['notif_name', 'notif_status', 'notif_retention_days', 'created_at']
     list_filter = ['notif_status', 'created_at']
     search_fields = ['notif_name']
     readonly_fields = ['created_at', 'updated_at']
@@ -141,6 +141,21 @@ class NotificationTableAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ['broadcast_title', 'broadcast_type', 'is_delete', 'created_at']
+    list_filter = ['broadcast_type', 'is_delete', 'created_at']
+    search_fields = ['broadcast_title', 'broadcast_message']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['notification_title', 'notification_user', 'notification_type', 'created_at', 'archived_at']
+    list_filter = ['notification_type', 'archived_at']
+    search_fields = ['notification_title', 'notification_message', 'notification_user__username']
+
+
 @admin.register(OrderEmails)
 class OrderEmailsAdmin(admin.ModelAdmin):
     list_display = ['mail_subject', 'mail_to', 'mail_from', 'mail_status', 'created_at']
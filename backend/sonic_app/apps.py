@@ -5,3 +5,5 @@ class SonicAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sonic_app'
 
+    def ready(self):
+        from . import signals  # noqa: F401  (connects model signal handlers)
@@ -0,0 +1,188 @@
+"""
+Async handlers for the hottest read endpoints (product list and detail, categories/active,
+banners/active, cart list, notifications list), on with ASYNC_READ_VIEWS.
+
+Under Daphne a sync DRF view runs whole in a worker thread. With ASYNC_READ_VIEWS the GET actions
+a viewset lists in async_actions are served by a coroutine instead: authentication (Bearer token
+or session), the ETag check, the response cache, the count and the page go through Django's
+async ORM and cache APIs; content negotiation, permissions, pagination and rendering of
+compiled rows (sonic_app.rows) stay on the event loop. Serializers whose method fields query
+the database run as one sync step per response. Every other method and action keeps the sync
+view. The responses are the sync path's, byte for byte (tests/test_async_views.py).
+
+Django's ORM and cache backends are still synchronous underneath, so each a-method is a hand-off
+to the request's thread: compare both paths with run_load_test --compare-url before turning
+this on. The flag is read when the URLs load.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .conditional import LIST_VALIDATORS, ConditionalGetMixin
+from .media import media_base_url
+from .response_cache import ageneration_token
+from .rows import FastListMixin
+
+# Query parameters the viewsets' get_queryset() handle without a query. Any other one may be a
+# django-filter ModelChoiceFilter (validated with a query) or an attr.* filter, so with those the
+# queryset is built in a sync step.
+QUERYSET_PARAMS = frozenset({
+    'page', 'ordering', 'search', 'fields', 'expand', 'format',
+    'user_id', 'read', 'status', 'category', 'min_price', 'max_price',
+})
+
+
+class AsyncReadMixin:
+    """
+    Serves the actions in async_actions from a coroutine when ASYNC_READ_VIEWS is on: the
+    handler for action x is ax (alist, aretrieve, aactive, ...). Put it first among the bases.
+    """
+
+    async_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or not set(cls.async_actions) & set(actions.values()):
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            method = request.method.lower()
+            action = actions.get('get' if method == 'head' else method)
+            if method not in ('get', 'head') or action not in cls.async_actions:
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = {**actions, 'head': action}
+            self.request = request
+            return await self.adispatch(request, *args, **kwargs)
+
+        # cls, initkwargs, actions, csrf_exempt, ...: what the router and the schema read
+        return functools.update_wrapper(async_view, view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() with the checks and the handler awaited."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            response = await getattr(self, 'a' + self.action)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """APIView.initial() plus ConditionalGetMixin's validators, authenticating with await."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+        if isinstance(self, ConditionalGetMixin):
+            await self.acheck_validators(request)
+
+    async def aperform_authentication(self, request):
+        """Set request.user / request.auth like Request._authenticate(), without a sync query."""
+        for authenticator in request.authenticators:
+            if hasattr(authenticator, 'aauthenticate'):
+                user_auth = await authenticator.aauthenticate(request)
+            elif isinstance(authenticator, SessionAuthentication):
+                # request.auser comes from AuthenticationMiddleware
+                auser = getattr(request._request, 'auser', None)
+                user = await auser() if auser else None
+                user_auth = None
+                if user is not None and user.is_active:
+                    authenticator.enforce_csrf(request)
+                    user_auth = (user, None)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(request)
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+        request._authenticator = None
+        request._not_authenticated()
+
+    async def acheck_validators(self, request):
+        self._validators = None
+        self._conditional_object = None
+        if not self._conditional_get(request):
+            return
+        if self.action == 'list':
+            stats = await (await self.afilter_queryset(self.get_queryset())).aaggregate(**LIST_VALIDATORS)
+            parts, last_modified = [stats['last'], stats['count']], None
+        else:
+            self._conditional_object = await self.aget_object()
+            parts, last_modified = self._detail_validators(self._conditional_object)
+        self._check_validators(request, parts, last_modified, await ageneration_token(self._conditional_models()))
+
+    async def afilter_queryset(self, queryset):
+        if set(self.request.query_params) - QUERYSET_PARAMS:
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    async def aget_object(self):
+        if getattr(self, '_conditional_object', None) is not None:
+            return self._conditional_object
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """paginate_queryset() counting and reading the page with the async ORM; None without pagination."""
+        paginator = self.paginator
+        page_size = paginator and paginator.get_page_size(self.request)
+        if not page_size:
+            return None
+        paginator.request = self.request
+        pages = paginator.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property: filled here, Paginator.page() does not count again
+        pages.count = await queryset.acount()
+        page_number = paginator.get_page_number(self.request, pages)
+        try:
+            paginator.page = pages.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        paginator.page.object_list = [row async for row in paginator.page.object_list]
+        if pages.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        return paginator.page.object_list
+
+    async def aserialize(self, instance, many=False):
+        """serializer.data in one sync step (method fields and lazy relations query)."""
+        return await sync_to_async(lambda: self.get_serializer(instance, many=many).data)()
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        compiled = self.list_row_builder() if isinstance(self, FastListMixin) else None
+        if compiled is not None:
+            rows = self.list_rows(queryset, compiled)
+            page = await self.apaginate_queryset(rows)
+            build, media_base = compiled[2], media_base_url(request)
+            if page is None:
+                return Response([build(row, media_base) async for row in rows])
+            return self.get_paginated_response([build(row, media_base) for row in page])
+        page = await self.apaginate_queryset(queryset)
+        if page is None:
+            return Response(await self.aserialize(queryset, many=True))
+        return self.get_paginated_response(await self.aserialize(page, many=True))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(await self.aserialize(await self.aget_object()))
@@ -1,19 +1,55 @@
 """
-Authentication for mobile API (Bearer token from OTP login).
+Authentication for mobile API (Bearer token from OTP login), over HTTP and WebSocket.
 """
+import hashlib
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import authentication
 from django.utils import timezone
 from .models import Session
 
+# Subprotocol a browser client offers before its token: new WebSocket(url, ['bearer', token])
+WEBSOCKET_AUTH_SUBPROTOCOL = 'bearer'
+
+
+def _session_query(token):
+    return Session.objects.select_related('session_user').filter(auth_token=token, expire_date__gt=timezone.now())
+
+
+def _active(session):
+    user = session.session_user
+    return session if user.is_active and not user.is_delete else None
+
+
+def token_session(token):
+    """Unexpired Session holding this Bearer token, for an active user; or None."""
+    try:
+        return _active(_session_query(token).get())
+    except Session.DoesNotExist:
+        return None
+
+
+async def atoken_session(token):
+    """token_session() through the async ORM."""
+    try:
+        return _active(await _session_query(token).aget())
+    except Session.DoesNotExist:
+        return None
+
 
 class BearerTokenAuthentication(authentication.BaseAuthentication):
     """
     Authenticate mobile requests using Authorization: Bearer <token>.
     Token is stored on Session.auth_token when user logs in via OTP.
+    aauthenticate() is the same check for the async views (sonic_app.async_views).
     """
     keyword = 'Bearer'
 
-    def authenticate(self, request):
+    def token(self, request):
         auth_header = authentication.get_authorization_header(request)
         if not auth_header:
             return None
@@ -22,20 +58,66 @@ class BearerTokenAuthentication(authentication.BaseAuthentication):
         if len(parts) != 2 or parts[0] != self.keyword:
             return None
 
-        token = parts[1].strip()
-        if not token:
-            return None
+        return parts[1].strip() or None
 
-        try:
-            session = Session.objects.select_related('session_user').get(
-                auth_token=token,
-                expire_date__gt=timezone.now(),
-            )
-        except Session.DoesNotExist:
+    def authenticate(self, request):
+        token = self.token(request)
+        session = token_session(token) if token else None
+        if session is None:
             return None
 
-        user = session.session_user
-        if not user.is_active or user.is_delete:
+        return (session.session_user, session)
+
+    async def aauthenticate(self, request):
+        token = self.token(request)
+        session = await atoken_session(token) if token else None
+        if session is None:
             return None
 
-        return (user, session)
+        return (session.session_user, session)
+
+
+def websocket_token(scope):
+    """Bearer token of a WebSocket handshake: ?token=... or the subprotocol after 'bearer'."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if query.get('token'):
+        return query['token'][0]
+    subprotocols = [protocol.strip() for protocol in scope.get('subprotocols') or []]
+    lowered = [protocol.lower() for protocol in subprotocols]
+    if WEBSOCKET_AUTH_SUBPROTOCOL in lowered:
+        index = lowered.index(WEBSOCKET_AUTH_SUBPROTOCOL)
+        if index + 1 < len(subprotocols):
+            return subprotocols[index + 1]
+    return None
+
+
+def cached_token_user(token):
+    """
+    User of token_session(), cached for WEBSOCKET_AUTH_CACHE_TIMEOUT seconds (unknown tokens too),
+    so a reconnect storm costs cache reads instead of session queries. A logout or expiry can
+    take that long to reach new sockets.
+    """
+    key = 'ws-auth:' + hashlib.sha256(token.encode()).hexdigest()
+    user = cache.get(key)
+    if user is None:
+        session = token_session(token)
+        user = session.session_user if session else False
+        cache.set(key, user, settings.WEBSOCKET_AUTH_CACHE_TIMEOUT)
+    return user or None
+
+
+class BearerTokenAuthMiddleware(BaseMiddleware):
+    """
+    Channels middleware that signs WebSocket handshakes in with the REST API's Bearer token.
+    Put it inside AuthMiddlewareStack: a Django session (admin panel) still works, and
+    scope['user'] is only replaced while it is anonymous.
+    """
+
+    async def __call__(self, scope, receive, send):
+        user = scope.get('user')
+        if user is None or not user.is_authenticated:
+            token = websocket_token(scope)
+            user = await database_sync_to_async(cached_token_user)(token) if token else None
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
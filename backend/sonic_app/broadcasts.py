@@ -0,0 +1,131 @@
+"""
+Broadcast notifications: a message to every user is one BroadcastNotification row, not one
+NotificationTable copy per user.
+
+A user sees the broadcasts sent after they joined that are neither deleted nor hidden for them.
+Their read / hidden state is a BroadcastReceipt written the first time it changes, so a broadcast
+costs one row to send plus one small row per user who opens it. Broadcast ids come from the
+personal notifications' id sequence, so "newer than id" and "mark id read" work across both
+kinds. A user's feed (the list endpoint with user_id) is a UNION ALL of the two, ordered and
+paginated in SQL.
+"""
+from django.db.models import BooleanField, CharField, Exists, IntegerField, OuterRef, Q, Subquery, Value
+from rest_framework import serializers
+
+from .models import BroadcastNotification, BroadcastReceipt, User
+
+# Channel-layer group every notification socket joins for broadcasts
+BROADCAST_GROUP = 'notifications_broadcast'
+
+# Keys of a feed entry: NotificationTableSerializer's fields plus 'broadcast'
+FEED_FIELDS = (
+    'id', 'notification_user', 'notification_user_username', 'notification_type', 'notification_type_name',
+    'notification_title', 'notification_message', 'notification_read', 'created_at', 'updated_at', 'broadcast',
+)
+
+
+def _receipts(user_id, **flags):
+    return BroadcastReceipt.objects.filter(receipt_broadcast=OuterRef('pk'), receipt_user_id=user_id, **flags)
+
+
+def visible_broadcasts(user_id):
+    """Broadcasts the user gets: sent since they joined, not deleted for everyone or hidden by them."""
+    joined = User.objects.filter(pk=user_id).values('date_joined')[:1]
+    return BroadcastNotification.objects.filter(is_delete=False, created_at__gte=Subquery(joined)).exclude(
+        Exists(_receipts(user_id, is_delete=True))
+    )
+
+
+def user_broadcasts(user_id):
+    """visible_broadcasts() with the user's read flag as 'read'."""
+    return visible_broadcasts(user_id).annotate(read=Exists(_receipts(user_id, receipt_read=True)))
+
+
+def unread_broadcasts(user_id):
+    return user_broadcasts(user_id).filter(read=False)
+
+
+def _write_receipts(user_id, broadcast_ids, **flags):
+    BroadcastReceipt.objects.bulk_create(
+        [BroadcastReceipt(receipt_broadcast_id=pk, receipt_user_id=user_id, **flags) for pk in broadcast_ids],
+        update_conflicts=True,
+        unique_fields=['receipt_user', 'receipt_broadcast'],
+        update_fields=[*flags, 'updated_at'],
+    )
+
+
+def mark_broadcasts_read(user_id, broadcast_ids=None, up_to_id=None):
+    """
+    Read receipts for the user's unread broadcasts among broadcast_ids, up to and including
+    up_to_id, or all of them when neither is given. Returns how many were unread.
+    """
+    broadcasts = unread_broadcasts(user_id)
+    if broadcast_ids is not None:
+        broadcasts = broadcasts.filter(pk__in=broadcast_ids)
+    elif up_to_id is not None:
+        broadcasts = broadcasts.filter(pk__lte=up_to_id)
+    broadcast_ids = list(broadcasts.values_list('pk', flat=True))
+    _write_receipts(user_id, broadcast_ids, receipt_read=True)
+    return len(broadcast_ids)
+
+
+def hide_broadcasts(user_id, broadcast_ids):
+    """Delete broadcasts from one user's feed; returns how many were visible."""
+    broadcast_ids = list(visible_broadcasts(user_id).filter(pk__in=broadcast_ids).values_list('pk', flat=True))
+    _write_receipts(user_id, broadcast_ids, is_delete=True)
+    return len(broadcast_ids)
+
+
+def feed(personal, user, read=None, notification_type=None, search=None, ordering=('-created_at',)):
+    """
+    The user's personal notifications (the already filtered queryset) and broadcasts as one
+    queryset of FEED_FIELDS tuples in ordering (created_at, then id the same way). read applies to
+    both halves; notification_type and search filter the broadcasts the way the list filters
+    filter the personal rows.
+    """
+    broadcasts = user_broadcasts(user.pk)
+    if read is not None:
+        personal = personal.filter(notification_read=read)
+        broadcasts = broadcasts.filter(read=read)
+    if notification_type:
+        broadcasts = broadcasts.filter(broadcast_type_id=notification_type)
+    if search:
+        broadcasts = broadcasts.filter(Q(broadcast_title__icontains=search) | Q(broadcast_message__icontains=search))
+    personal_rows = personal.order_by().values_list(
+        'id', 'notification_user_id', 'notification_user__username', 'notification_type_id',
+        'notification_type__notif_name', 'notification_title', 'notification_message', 'notification_read',
+        'created_at', 'updated_at', Value(False, output_field=BooleanField()),
+    )
+    ordering = list(ordering or ('-created_at',))
+    ordering.append('-id' if ordering[0].startswith('-') else 'id')
+    return personal_rows.union(_broadcast_rows(broadcasts, user), all=True).order_by(*ordering)
+
+
+def _broadcast_rows(broadcasts, user):
+    return broadcasts.order_by().values_list(
+        'id', Value(user.pk, output_field=IntegerField()), Value(user.username, output_field=CharField()),
+        'broadcast_type_id', 'broadcast_type__notif_name', 'broadcast_title', 'broadcast_message', 'read',
+        'created_at', 'updated_at', Value(True, output_field=BooleanField()),
+    )
+
+
+def broadcast_entry(user, broadcast_id):
+    """One broadcast as the user's feed entry, or None when they do not get it."""
+    entries = feed_entries(_broadcast_rows(user_broadcasts(user.pk).filter(pk=broadcast_id), user))
+    return entries[0] if entries else None
+
+
+def feed_entries(rows, fields=None):
+    """
+    Feed rows as dicts shaped like NotificationTableSerializer output, plus 'broadcast'; only
+    fields (the serializer's fields after ?fields=) when given.
+    """
+    timestamp = serializers.DateTimeField().to_representation
+    keep = None if fields is None else [name for name in FEED_FIELDS if name in fields or name == 'broadcast']
+    entries = []
+    for row in rows:
+        entry = dict(zip(FEED_FIELDS, row))
+        entry['created_at'] = timestamp(entry['created_at'])
+        entry['updated_at'] = timestamp(entry['updated_at'])
+        entries.append(entry if keep is None else {name: entry[name] for name in keep})
+    return entries
@@ -0,0 +1,225 @@
+"""
+Versioned whole-catalogue snapshot for the mobile app (GET /app/catalog).
+
+Every write to a category (or one of its fields), a product (or its variants / field values) or a
+banner appends a CatalogChange row once the transaction commits; the newest row id is the
+catalogue version. Signal handlers record single saves, bulk writes call record_catalog_changes()
+themselves. Each process keeps the document of all active rows in memory and patches it with just
+the rows changed since its version, so a version bump costs a query per changed kind, not a full
+rebuild. ?since=<version> returns those rows plus the ids that left the catalogue.
+
+The prune_catalog_changes command deletes log rows older than CATALOG_CHANGE_RETENTION_DAYS; a
+client whose since predates the rows left gets the full document again.
+"""
+import threading
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Banners, CatalogChange, Category, CategoryField, Product, ProductVariant
+
+KIND_CATEGORY = 'category'
+KIND_PRODUCT = 'product'
+KIND_BANNER = 'banner'
+
+_lock = threading.Lock()
+_snapshot = {'version': None, 'docs': None}
+
+
+def record_catalog_changes(kind, ids):
+    """Log a change for each id; written after commit so a rolled back write bumps nothing."""
+    ids = sorted({int(pk) for pk in ids if pk is not None})
+    if ids:
+        transaction.on_commit(
+            lambda: CatalogChange.objects.bulk_create([CatalogChange(kind=kind, object_id=pk) for pk in ids])
+        )
+
+
+def prune_catalog_changes(days, batch_size=1000, dry_run=False):
+    """
+    Delete the log rows older than days, oldest first and a batch per transaction; returns how
+    many went (or would go). The newest row is always kept, as it is the catalogue version, and
+    everything above the oldest row kept stays, so the log never has gaps.
+    """
+    newest = CatalogChange.objects.aggregate(last=Max('id'))['last']
+    if newest is None:
+        return 0
+    cutoff = CatalogChange.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days), id__lt=newest
+    ).aggregate(last=Max('id'))['last']
+    if cutoff is None:
+        return 0
+    expired = CatalogChange.objects.filter(id__lte=cutoff)
+    if dry_run:
+        return expired.count()
+    deleted = 0
+    while ids := list(expired.order_by('id').values_list('id', flat=True)[:batch_size]):
+        with transaction.atomic():
+            deleted += CatalogChange.objects.filter(id__in=ids).delete()[0]
+    return deleted
+
+
+def reset_catalog_snapshot():
+    """Drop this process's in-memory document; the next request rebuilds it."""
+    with _lock:
+        _snapshot.update(version=None, docs=None)
+
+
+def _file_url(model, field_name, name):
+    if not name:
+        return None
+    if '://' in name:
+        return name
+    return model._meta.get_field(field_name).storage.url(name)
+
+
+def _decimal(value):
+    return str(value) if value is not None else None
+
+
+def _load_categories(ids=None):
+    queryset = Category.objects.filter(is_delete=False, category_status=True)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    docs = {}
+    for row in queryset.values('id', 'category_name', 'category_description', 'category_image', 'display_order'):
+        row['category_image'] = _file_url(Category, 'category_image', row['category_image'])
+        row['fields'] = []
+        docs[row['id']] = row
+    fields = (
+        CategoryField.objects.filter(category_id__in=queryset.values('id'), is_delete=False)
+        .order_by('display_order', 'field_name')
+        .values(
+            'id', 'category_id', 'field_name', 'field_label', 'field_type', 'field_options', 'is_required',
+            'placeholder', 'help_text', 'is_variant_dimension', 'variant_order',
+        )
+    )
+    for field in fields:
+        docs[field.pop('category_id')]['fields'].append(field)
+    return docs
+
+
+def _load_products(ids=None):
+    # Child products are not listed on their own, as in the product list
+    queryset = Product.objects.filter(is_delete=False, product_status=True, product_parent_id__isnull=True)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    docs = {}
+    rows = queryset.values(
+        'id', 'product_name', 'product_description', 'product_price', 'product_weight', 'product_image',
+        'product_category_id', 'product_is_parent', 'attributes',
+    )
+    for row in rows:
+        row['product_category'] = row.pop('product_category_id')
+        row['product_price'] = _decimal(row['product_price'])
+        row['product_weight'] = _decimal(row['product_weight'])
+        row['product_image'] = _file_url(Product, 'product_image', row['product_image'])
+        row['variants'] = []
+        docs[row['id']] = row
+    variants = (
+        ProductVariant.objects.filter(product_id__in=queryset.values('id'))
+        .order_by('display_order', 'id')
+        .values('id', 'product_id', 'variant_value_1', 'variant_value_2', 'price')
+    )
+    for variant in variants:
+        variant['price'] = _decimal(variant['price'])
+        docs[variant.pop('product_id')]['variants'].append(variant)
+    return docs
+
+
+def _load_banners(ids=None):
+    queryset = Banners.objects.filter(is_delete=False, banner_status=True)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    docs = {}
+    for row in queryset.values('id', 'banner_title', 'banner_image', 'banner_product_id', 'banner_order'):
+        row['banner_image'] = _file_url(Banners, 'banner_image', row['banner_image'])
+        docs[row['id']] = row
+    return docs
+
+
+# kind -> (document key, loader, sort key matching the model's default ordering)
+SECTIONS = {
+    KIND_CATEGORY: ('categories', _load_categories, lambda doc: (doc['display_order'], -doc['id'])),
+    KIND_PRODUCT: ('products', _load_products, lambda doc: -doc['id']),
+    KIND_BANNER: ('banners', _load_banners, lambda doc: (doc['banner_order'], -doc['id'])),
+}
+
+
+def _version_bounds():
+    bounds = CatalogChange.objects.aggregate(first=Min('id'), last=Max('id'))
+    return bounds['first'], bounds['last'] or 0
+
+
+def _covers(since, first, version):
+    """Whether the log still holds every change after `since` (prune_catalog_changes drops old rows)."""
+    if since is None or since > version:
+        return False
+    return since == version if first is None else since >= first - 1
+
+
+def _changed_ids(since, version):
+    changed = {kind: set() for kind in SECTIONS}
+    rows = CatalogChange.objects.filter(id__gt=since, id__lte=version).values_list('kind', 'object_id').distinct()
+    for kind, object_id in rows:
+        if kind in changed:
+            changed[kind].add(object_id)
+    return changed
+
+
+def _sync_snapshot():
+    """Bring the in-memory document up to the current version; returns (first, version). Hold _lock."""
+    # Read the version before the rows: a write landing in between is sent again next time, never lost
+    first, version = _version_bounds()
+    if _snapshot['docs'] is None or not _covers(_snapshot['version'], first, version):
+        _snapshot['docs'] = {kind: loader() for kind, (_, loader, _) in SECTIONS.items()}
+    elif _snapshot['version'] < version:
+        for kind, ids in _changed_ids(_snapshot['version'], version).items():
+            if not ids:
+                continue
+            docs = _snapshot['docs'][kind]
+            fresh = SECTIONS[kind][1](ids)
+            for pk in ids - fresh.keys():
+                docs.pop(pk, None)
+            docs.update(fresh)
+    _snapshot['version'] = version
+    return first, version
+
+
+def build_catalog(since=None):
+    """
+    The catalogue document at the current version:
+    {"version": 42, "full": true, "categories": [...], "products": [...], "banners": [...]}.
+
+    With a since version the log still covers, only the rows changed after it are listed and
+    "deleted" holds the ids per section that were deleted or deactivated. Otherwise (no since,
+    or one too old or unknown) the full document is returned with "full": true.
+    """
+    with _lock:
+        first, version = _sync_snapshot()
+        docs = _snapshot['docs']
+        if not _covers(since, first, version):
+            document = {'version': version, 'full': True}
+            for kind, (key, _, sort_key) in SECTIONS.items():
+                document[key] = sorted(docs[kind].values(), key=sort_key)
+            return document
+        document = {'version': version, 'full': False, 'since': since, 'deleted': {}}
+        for kind, ids in _changed_ids(since, version).items():
+            key, _, sort_key = SECTIONS[kind]
+            document[key] = sorted((docs[kind][pk] for pk in ids if pk in docs[kind]), key=sort_key)
+            document['deleted'][key] = sorted(pk for pk in ids if pk not in docs[kind])
+        return document
+
+
+def absolute_media_urls(document, base):
+    """Copy of the document with image paths made absolute (base from sonic_app.media.media_base_url)."""
+    images = {'categories': 'category_image', 'products': 'product_image', 'banners': 'banner_image'}
+    document = dict(document)
+    for key, field in images.items():
+        document[key] = [
+            {**doc, field: base + doc[field]} if doc[field] and '://' not in doc[field] else doc
+            for doc in document[key]
+        ]
+    return document
@@ -0,0 +1,107 @@
+"""
+Conditional GET for the ModelViewSets: ETag / Last-Modified validators and 304 Not Modified.
+
+list: the ETag hashes MAX(updated_at) and COUNT(*) of the filtered queryset, one aggregate query.
+retrieve: the row's updated_at. Both also hash the query string (pages, fields=, expand=), the
+requesting user and the response-cache generations (sonic_app.response_cache) of the viewset's model and of conditional_models, the
+other models its serializer reads (nested variants, category names, ...), so writes that do not
+touch the row itself still change the ETag.
+
+The check runs in initial(), after authentication and permissions and before the handler, so a
+304 costs no serializer work. Last-Modified is sent (and If-Modified-Since honoured) on detail
+routes whose representation is the row alone; a list can lose rows without its newest
+updated_at moving, so lists are validated by ETag only.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .response_cache import generation_token
+
+
+# Aggregates behind a list's ETag
+LIST_VALIDATORS = {'last': Max('updated_at'), 'count': Count('pk')}
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Weak comparison of an If-None-Match header with our ETag: CompressionMiddleware (or a
+    compressing proxy) hands out W/"..." and the client sends that back.
+    """
+    tags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+    return etag.removeprefix('W/') in tags or '*' in tags
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class ConditionalGetMixin:
+    """Adds ETag / Last-Modified to list and retrieve and answers If-None-Match / If-Modified-Since with 304."""
+
+    conditional_models = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        self._conditional_object = None
+        if not self._conditional_get(request):
+            return
+        if self.action == 'list':
+            stats = self.filter_queryset(self.get_queryset()).aggregate(**LIST_VALIDATORS)
+            parts, last_modified = [stats['last'], stats['count']], None
+        else:
+            self._conditional_object = self.get_object()
+            parts, last_modified = self._detail_validators(self._conditional_object)
+        self._check_validators(request, parts, last_modified, generation_token(self._conditional_models()))
+
+    def _conditional_get(self, request):
+        return request.method in ('GET', 'HEAD') and self.action in ('list', 'retrieve')
+
+    def _conditional_models(self):
+        return (self.get_queryset().model, *self.conditional_models)
+
+    def _detail_validators(self, obj):
+        """(ETag parts, Last-Modified date or None) of a retrieved row."""
+        return [obj.pk, obj.updated_at], None if self.conditional_models else obj.updated_at
+
+    def _check_validators(self, request, parts, last_modified, generations):
+        parts = [
+            *parts, sorted(request.query_params.lists()), getattr(request.user, 'pk', None),
+            request.accepted_media_type, generations,
+        ]
+        etag = quote_etag(hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest())
+        self._validators = (etag, last_modified)
+        if self._not_modified(request, etag, last_modified):
+            raise NotModified()
+
+    def _not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since'))
+        return bool(last_modified and if_modified_since and int(last_modified.timestamp()) <= if_modified_since)
+
+    def get_object(self):
+        if getattr(self, '_conditional_object', None) is not None:
+            return self._conditional_object
+        return super().get_object()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
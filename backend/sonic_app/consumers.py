@@ -1,63 +1,130 @@
 """
 WebSocket consumers for real-time notifications
 """
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from . import presence
+from .auth import WEBSOCKET_AUTH_SUBPROTOCOL
+from .broadcasts import BROADCAST_GROUP
+from .services import NotificationService, UnreadCounter, mark_read_batch_params
+
 User = get_user_model()
 
+# Close code sent to sockets that stayed silent for WEBSOCKET_IDLE_TIMEOUT (4000-4999: application codes)
+IDLE_CLOSE_CODE = 4408
+
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time notifications
     
-    Connects users to their personal notification channel
+    Connects users to their personal notification channel. The user comes from a Django session
+    or a Bearer token (sonic_app.auth.BearerTokenAuthMiddleware); anonymous handshakes are
+    rejected, and sockets that send nothing (not even a ping) for WEBSOCKET_IDLE_TIMEOUT seconds
+    are closed with IDLE_CLOSE_CODE. While open, the socket keeps its user online (sonic_app.presence).
+
+    A reconnecting app passes ?last_seen_id=<id> (or sends {"type": "replay", "last_seen_id": id})
+    and gets the notifications it missed as "replay" messages, one batch per replay_next.
     """
     
     async def connect(self):
         """Handle WebSocket connection"""
-        # Get user from scope (set by AuthMiddlewareStack)
+        # Get user from scope (set by AuthMiddlewareStack / BearerTokenAuthMiddleware)
         self.user = self.scope.get('user')
-        
-        # Accept anonymous connections for now, but could enforce auth here
-        if self.user and self.user.is_authenticated:
-            # Create a unique group name for this user
-            self.group_name = f'notifications_{self.user.id}'
-            
-            # Add this connection to the user's notification group
-            await self.channel_layer.group_add(
-                self.group_name,
-                self.channel_name
-            )
-            
-            await self.accept()
-            
-            # Send welcome message
-            await self.send(text_data=json.dumps({
-                'type': 'connection_established',
-                'message': 'Connected to notification service'
-            }))
+        self.idle_task = None
+        self.unread_count = 0
+
+        if not (self.user and self.user.is_authenticated):
+            # Closing before accept() rejects the handshake (HTTP 403)
+            await self.close()
+            return
+
+        # Create a unique group name for this user
+        self.group_name = f'notifications_{self.user.id}'
+
+        # Add this connection to the user's notification group and the broadcast group
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+        await self.channel_layer.group_add(BROADCAST_GROUP, self.channel_name)
+
+        # A client that authenticated with the subprotocol expects it echoed back
+        offered = [protocol.strip() for protocol in self.scope.get('subprotocols') or []]
+        subprotocol = next((p for p in offered if p.lower() == WEBSOCKET_AUTH_SUBPROTOCOL), None)
+        await self.accept(subprotocol=subprotocol)
+        # Online: notifications reach this user here instead of as pushes
+        await sync_to_async(presence.socket_opened)(self.user.id, self.channel_name)
+        self.presence_refreshed = self.last_activity = time.monotonic()
+        if settings.WEBSOCKET_IDLE_TIMEOUT:
+            self.idle_task = asyncio.ensure_future(self.close_when_idle(settings.WEBSOCKET_IDLE_TIMEOUT))
         else:
-            # For unauthenticated users, we can still accept but won't add to groups
-            await self.accept()
-            await self.send(text_data=json.dumps({
-                'type': 'connection_established',
-                'message': 'Connected (unauthenticated)'
-            }))
+            self.idle_task = asyncio.ensure_future(self.keep_present())
+
+        # Send welcome message
+        await self.send(text_data=json.dumps({
+            'type': 'connection_established',
+            'message': 'Connected to notification service'
+        }))
+
+        # Badge count, then what was missed while disconnected
+        await self.unread_count_message({'unread_count': await database_sync_to_async(UnreadCounter.get)(self.user.id)})
+        self.replay_cursor = None
+        last_seen_id = parse_qs(self.scope.get('query_string', b'').decode('latin-1')).get('last_seen_id', [''])[0]
+        if last_seen_id.isdigit():
+            await self.start_replay(int(last_seen_id))
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if self.idle_task:
+            self.idle_task.cancel()
         if self.user and self.user.is_authenticated:
-            # Remove from notification group
+            await sync_to_async(presence.socket_closed)(self.user.id, self.channel_name)
+            # Remove from notification groups
             await self.channel_layer.group_discard(
                 self.group_name,
                 self.channel_name
             )
-    
-    async def receive(self, text_data):
+            await self.channel_layer.group_discard(BROADCAST_GROUP, self.channel_name)
+
+    async def close_when_idle(self, timeout):
+        """Close the socket once the client has been silent for timeout seconds."""
+        while True:
+            remaining = self.last_activity + timeout - time.monotonic()
+            if remaining <= 0:
+                await self.close(code=IDLE_CLOSE_CODE)
+                return
+            await asyncio.sleep(remaining)
+
+    async def keep_present(self):
+        """With WEBSOCKET_IDLE_TIMEOUT off a silent socket stays open, so it stays online too."""
+        while True:
+            await asyncio.sleep(presence.PRESENCE_FLOOR / 3)
+            await sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
+
+    async def refresh_presence(self):
+        """
+        Any frame keeps the socket counted as online. The entry is rewritten at most every
+        PRESENCE_GRACE / 2 seconds, well inside the grace its expiry has over the idle timeout.
+        """
+        if self.last_activity - self.presence_refreshed >= presence.PRESENCE_GRACE / 2:
+            self.presence_refreshed = self.last_activity
+            await sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
         """Handle messages received from WebSocket"""
+        self.last_activity = time.monotonic()
+        await self.refresh_presence()
+        if text_data is None:
+            return
         try:
             data = json.loads(text_data)
             message_type = data.get('type', 'unknown')
@@ -69,6 +136,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                     'timestamp': data.get('timestamp')
                 }))
             
+            # Replay of missed notifications, one batch at a time
+            elif message_type == 'replay':
+                last_seen_id = data.get('last_seen_id')
+                if isinstance(last_seen_id, int) and last_seen_id >= 0:
+                    await self.start_replay(last_seen_id)
+            elif message_type == 'replay_next':
+                if self.replay_cursor is not None:
+                    await self.send_replay_batch()
+
             # Handle mark as read requests
             elif message_type == 'mark_read':
                 notification_id = data.get('notification_id')
@@ -78,6 +154,26 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                         'type': 'marked_read',
                         'notification_id': notification_id
                     }))
+
+            # Many at once: {"notification_ids": [...]} or {"up_to_id": id}, acknowledged together
+            elif message_type == 'mark_read_batch':
+                try:
+                    notification_ids, up_to_id = mark_read_batch_params(data)
+                except ValueError as e:
+                    await self.send(text_data=json.dumps({
+                        'type': 'error',
+                        'message': str(e)
+                    }))
+                    return
+                marked = await database_sync_to_async(NotificationService.mark_read_batch)(
+                    self.user.id, notification_ids, up_to_id
+                )
+                await self.send(text_data=json.dumps({
+                    'type': 'marked_read_batch',
+                    'notification_ids': notification_ids,
+                    'up_to_id': up_to_id,
+                    'marked': marked
+                }))
         
         except json.JSONDecodeError:
             await self.send(text_data=json.dumps({
@@ -85,6 +181,39 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 'message': 'Invalid JSON'
             }))
     
+    async def start_replay(self, last_seen_id):
+        """Replay the user's notifications after last_seen_id, starting with the first batch."""
+        self.replay_cursor = last_seen_id
+        self.replayed = 0
+        await self.send_replay_batch()
+
+    async def send_replay_batch(self):
+        """
+        Send the next NOTIFICATION_REPLAY_BATCH_SIZE missed notifications. The following batch goes
+        out only when the client asks with replay_next, so a slow phone never has more than one
+        batch queued and a reconnect storm costs one small indexed query per socket at a time.
+        Past NOTIFICATION_REPLAY_MAX rows the replay stops with truncated=true: reload the list over
+        REST instead.
+        """
+        limit = min(settings.NOTIFICATION_REPLAY_BATCH_SIZE, settings.NOTIFICATION_REPLAY_MAX - self.replayed)
+        rows = await database_sync_to_async(NotificationService.notifications_after)(
+            self.user.id, self.replay_cursor, limit + 1
+        )
+        batch, more = rows[:limit], len(rows) > limit
+        self.replayed += len(batch)
+        if batch:
+            self.replay_cursor = batch[-1]['id']
+        truncated = more and self.replayed >= settings.NOTIFICATION_REPLAY_MAX
+        await self.send(text_data=json.dumps({
+            'type': 'replay',
+            'notifications': batch,
+            'last_id': self.replay_cursor,
+            'more': more and not truncated,
+            'truncated': truncated
+        }))
+        if not more or truncated:
+            self.replay_cursor = None
+
     async def notification_message(self, event):
         """
         Handle notification messages sent to this consumer's group
@@ -96,21 +225,26 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'notification': event['notification']
         }))
     
-    @database_sync_to_async
-    def mark_notification_read(self, notification_id):
-        """Mark a notification as read in the database"""
-        from sonic_app.models import NotificationTable
-        try:
-            notification = NotificationTable.objects.get(
-                id=notification_id,
-                notification_user=self.user
-            )
-            notification.notification_read = True
-            notification.save()
-            return True
-        except NotificationTable.DoesNotExist:
-            return False
-
-
+    async def broadcast_message(self, event):
+        """
+        A notification for every user (NotificationService.send_notification_to_all), sent once to
+        the broadcast group; each socket adds unread_delta to the count it last sent, so a broadcast
+        costs no query per socket
+        """
+        if self.user.id in event['exclude_ids']:
+            return
+        await self.notification_message(event)
+        await self.unread_count_message({'unread_count': self.unread_count + event['unread_delta']})
 
+    async def unread_count_message(self, event):
+        """Badge count changed (sonic_app.services.UnreadCounter.push)"""
+        self.unread_count = event['unread_count']
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': event['unread_count']
+        }))
 
+    @database_sync_to_async
+    def mark_notification_read(self, notification_id):
+        """Mark a notification as read in the database (pushes the new unread_count)"""
+        return NotificationService.mark_notification_read(notification_id, self.user.id)
@@ -0,0 +1,262 @@
+"""
+Faceted attribute filtering for products.
+
+Dynamic attributes live in ProductFieldValue (EAV). For filtering they are denormalised into
+Product.attributes, a JSONB object keyed by CategoryField.field_name with typed values
+({"karat": "22K", "purity": 91.6, "hallmarked": true}) and a GIN index, so equality filters are
+a single indexed containment (@>) test. Numeric ranges use the indexed ProductFieldValue.value_number
+column instead. Variant dimensions (Size, Karat, ...) are matched against
+ProductVariant.variant_value_1/2 according to each category's variant_order.
+
+Query parameters (on /products/, /products/search/ and /products/facets/):
+  attr.<field_name>=v1,v2      any of the values
+  attr.<field_name>.min=90     numeric lower bound (number/decimal fields)
+  attr.<field_name>.max=99     numeric upper bound
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, Max, Min, Q
+
+from .models import CategoryField, ProductFieldValue, ProductVariant
+
+ATTR_PREFIX = 'attr.'
+NUMERIC_TYPES = ProductFieldValue.NUMERIC_FIELD_TYPES
+
+# Typed JSON value per field, taken from the typed ProductFieldValue columns.
+UPDATE_ATTRIBUTES_SQL = """
+UPDATE sonic_app_product p SET attributes = coalesce((
+    SELECT jsonb_object_agg(cf.field_name,
+        CASE
+            WHEN v.value_number IS NOT NULL THEN to_jsonb(trim_scale(v.value_number))
+            WHEN v.value_boolean IS NOT NULL THEN to_jsonb(v.value_boolean)
+            ELSE to_jsonb(v.field_value)
+        END)
+    FROM sonic_app_product_field_value v
+    JOIN sonic_app_category_field cf ON cf.id = v.category_field_id
+    WHERE v.product_id = p.id AND cf.is_delete = false AND cf.is_variant_dimension = false
+), '{}'::jsonb)
+"""
+
+# Set-based equivalent of ProductFieldValue.set_typed_values(), for when a field's field_type changes;
+# values are trimmed of the same ProductFieldValue.VALUE_WHITESPACE and numbers matched with the same NUMBER_PATTERN.
+UPDATE_TYPED_VALUES_SQL = r"""
+UPDATE sonic_app_product_field_value v SET
+    value_number = CASE
+        WHEN cf.field_type IN ('number', 'decimal') AND btrim(v.field_value, %(whitespace)s) ~ %(number_pattern)s
+            THEN btrim(v.field_value, %(whitespace)s)::numeric
+    END,
+    value_boolean = CASE
+        WHEN cf.field_type = 'boolean' THEN lower(btrim(v.field_value, %(whitespace)s)) IN ('true', '1', 'yes')
+    END
+FROM sonic_app_category_field cf
+WHERE cf.id = v.category_field_id AND cf.id = ANY(%(ids)s)
+"""
+
+
+def update_product_attributes(product_ids=None):
+    """Rebuild Product.attributes from field values for the given ids (all products when None)."""
+    sql, params = UPDATE_ATTRIBUTES_SQL, []
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        sql += ' WHERE p.id = ANY(%s)'
+        params = [product_ids]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def update_typed_field_values(category_field_ids):
+    """Recompute value_number/value_boolean for every value of the given category fields."""
+    category_field_ids = list(category_field_ids)
+    if not category_field_ids:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_TYPED_VALUES_SQL, {
+            'number_pattern': ProductFieldValue.NUMBER_PATTERN, 'whitespace': ProductFieldValue.VALUE_WHITESPACE,
+            'ids': category_field_ids,
+        })
+        return cursor.rowcount
+
+
+def typed_attribute_value(field_type, raw):
+    """Convert a query-string value to the JSON type stored in Product.attributes (None if invalid)."""
+    raw = ProductFieldValue.normalize_value(raw)
+    if field_type in NUMERIC_TYPES:
+        return ProductFieldValue.parse_number(raw)
+    if field_type == 'boolean':
+        return raw.lower() in ProductFieldValue.TRUE_VALUES
+    return raw
+
+
+def parse_attribute_params(query_params):
+    """{'karat': {'values': ['22K']}, 'purity': {'min': '90'}} from attr.* query parameters."""
+    parsed = {}
+    for key in query_params:
+        if not key.startswith(ATTR_PREFIX):
+            continue
+        name, _, bound = key[len(ATTR_PREFIX):].partition('.')
+        if not name:
+            continue
+        value = query_params.get(key, '')
+        spec = parsed.setdefault(name, {})
+        if bound in ('min', 'max'):
+            spec[bound] = value
+        elif not bound:
+            spec['values'] = [v.strip() for v in value.split(',') if v.strip()]
+    return parsed
+
+
+def _variant_slots(field_names):
+    """{field_name: {category_id: 1 or 2}} for variant-dimension fields (slot = position by variant_order)."""
+    dims = CategoryField.objects.filter(is_variant_dimension=True, is_delete=False).order_by(
+        'category_id', 'variant_order', 'display_order', 'id'
+    ).values_list('category_id', 'field_name')
+    slots, position = {}, {}
+    for category_id, field_name in dims:
+        position[category_id] = position.get(category_id, 0) + 1
+        if field_name in field_names and position[category_id] <= 2:
+            slots.setdefault(field_name, {})[category_id] = position[category_id]
+    return slots
+
+
+def _attribute_types(field_names):
+    """{field_name: {field_type: [category_id, ...]}} for non-variant fields; a name may differ in type per category."""
+    types = {}
+    for category_id, field_name, field_type in CategoryField.objects.filter(
+        field_name__in=field_names, is_delete=False, is_variant_dimension=False
+    ).values_list('category_id', 'field_name', 'field_type'):
+        types.setdefault(field_name, {}).setdefault(field_type, []).append(category_id)
+    return types
+
+
+def apply_attribute_filters(queryset, query_params):
+    """
+    Filter a Product queryset by attr.* parameters. Unknown fields and invalid values are ignored.
+    Values are typed per category, so a field that is a number in one category and text in another
+    matches each category's products with its own type.
+    """
+    specs = parse_attribute_params(query_params)
+    if not specs:
+        return queryset
+    field_types = _attribute_types(specs.keys())
+    slots = _variant_slots(set(specs))
+    for name, spec in specs.items():
+        values = spec.get('values')
+        by_type = field_types.get(name, {})
+        if values:
+            match = Q()
+            for category_id, slot in slots.get(name, {}).items():
+                match |= Q(
+                    product_category_id=category_id,
+                    id__in=ProductVariant.objects.filter(**{f'variant_value_{slot}__in': values}).values('product_id'),
+                )
+            for field_type, category_ids in by_type.items():
+                for raw in values:
+                    typed = typed_attribute_value(field_type, raw)
+                    if typed is not None:
+                        match |= Q(
+                            product_category_id__in=category_ids,
+                            attributes__contains={name: float(typed) if isinstance(typed, Decimal) else typed},
+                        )
+            if match:
+                queryset = queryset.filter(match)
+        if any(field_type in NUMERIC_TYPES for field_type in by_type):
+            # Ranges use the (category_field, value_number) index rather than the JSON document.
+            bounds = {}
+            for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+                typed = ProductFieldValue.parse_number(spec[bound]) if spec.get(bound) else None
+                if typed is not None:
+                    bounds[f'value_number__{lookup}'] = typed
+            if bounds:
+                queryset = queryset.filter(id__in=ProductFieldValue.objects.filter(
+                    category_field__field_name=name, category_field__field_type__in=NUMERIC_TYPES,
+                    category_field__is_delete=False, category_field__is_variant_dimension=False, **bounds
+                ).values('product_id'))
+    return queryset
+
+
+def _number_label(number):
+    """A value_number as facet value text, without trailing zeros ("91.60" -> "91.6")."""
+    return f'{number.normalize():f}'
+
+
+def facet_counts(queryset, category_id=None):
+    """
+    Value counts for every attribute and variant dimension over the products in queryset.
+    A fixed handful of grouped queries (field values, one per variant slot) regardless of catalogue size.
+    """
+    product_ids = queryset.order_by().values('id')
+    fields = CategoryField.objects.filter(is_delete=False)
+    if category_id:
+        fields = fields.filter(category_id=category_id)
+    facets = {}
+    for f in fields.order_by('display_order', 'id').values('field_name', 'field_label', 'field_type', 'is_variant_dimension'):
+        facets.setdefault(f['field_name'], {
+            'field_name': f['field_name'],
+            'field_label': f['field_label'],
+            'field_type': f['field_type'],
+            'is_variant_dimension': f['is_variant_dimension'],
+            'values': {},
+        })
+
+    values = ProductFieldValue.objects.filter(
+        product_id__in=product_ids, category_field__is_delete=False, category_field__is_variant_dimension=False
+    )
+    # Numbers are counted by value_number, so "91.6" and "91.60" are one value
+    text_rows = (
+        values.exclude(category_field__field_type__in=NUMERIC_TYPES)
+        .values('category_field__field_name', 'field_value')
+        .annotate(count=Count('product_id', distinct=True))
+    )
+    number_rows = (
+        values.filter(category_field__field_type__in=NUMERIC_TYPES, value_number__isnull=False)
+        .values('category_field__field_name', 'value_number')
+        .annotate(count=Count('product_id', distinct=True))
+    )
+    for rows, key, label in ((text_rows, 'field_value', str), (number_rows, 'value_number', _number_label)):
+        for row in rows:
+            facet = facets.get(row['category_field__field_name'])
+            if facet is not None:
+                value = label(row[key])
+                facet['values'][value] = facet['values'].get(value, 0) + row['count']
+
+    slot_names = {}
+    for name, by_category in _variant_slots({n for n, f in facets.items() if f['is_variant_dimension']}).items():
+        for cat_id, slot in by_category.items():
+            slot_names[(cat_id, slot)] = name
+    for slot in (1, 2):
+        column = f'variant_value_{slot}'
+        rows = (
+            ProductVariant.objects.filter(product_id__in=product_ids)
+            .exclude(**{f'{column}__isnull': True}).exclude(**{column: ''})
+            .values('product__product_category_id', column)
+            .annotate(count=Count('product_id', distinct=True))
+        )
+        for row in rows:
+            name = slot_names.get((row['product__product_category_id'], slot))
+            if name is not None:
+                values = facets[name]['values']
+                values[row[column]] = values.get(row[column], 0) + row['count']
+
+    ranges = {
+        row['category_field__field_name']: (row['low'], row['high'])
+        for row in ProductFieldValue.objects.filter(
+            product_id__in=product_ids, category_field__is_delete=False, value_number__isnull=False
+        ).values('category_field__field_name').annotate(low=Min('value_number'), high=Max('value_number'))
+    }
+    result = []
+    for facet in facets.values():
+        if not facet['values']:
+            continue
+        facet['values'] = sorted(
+            ({'value': v, 'count': c} for v, c in facet['values'].items()), key=lambda item: (-item['count'], item['value'])
+        )
+        if facet['field_type'] in NUMERIC_TYPES and not facet['is_variant_dimension']:
+            low, high = ranges.get(facet['field_name'], (None, None))
+            facet['min'] = float(low) if low is not None else None
+            facet['max'] = float(high) if high is not None else None
+        result.append(facet)
+    return result
@@ -0,0 +1,35 @@
+"""
+Move old read or soft-deleted notifications from NotificationTable to NotificationArchive.
+Usage:
+  python manage.py archive_notifications
+  python manage.py archive_notifications --days 30 --batch-size 5000
+  python manage.py archive_notifications --dry-run
+
+Each notification type keeps its own NotificationType.notif_retention_days (0 = keep forever);
+types without one use --days, default NOTIFICATION_RETENTION_DAYS. Meant to run daily (cron).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sonic_app.retention import archive_notifications
+
+
+class Command(BaseCommand):
+    help = 'Archives read or soft-deleted notifications older than their type\'s retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention for types without their own (default NOTIFICATION_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must be 0 or more')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        default_days = options['days'] if options['days'] is not None else settings.NOTIFICATION_RETENTION_DAYS
+        moved = archive_notifications(default_days, options['batch_size'], options['dry_run'])
+        verb = 'would archive' if options['dry_run'] else 'archived'
+        for notification_type, count in moved:
+            self.stdout.write(f'{notification_type.notif_name}: {verb} {count}')
+        self.stdout.write(self.style.SUCCESS(f'Total {verb}: {sum(count for _, count in moved)}'))
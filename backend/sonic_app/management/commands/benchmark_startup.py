@@ -0,0 +1,173 @@
+"""
+Time how long each way of starting the server takes to answer GET /app/health, and how much
+memory it holds once up (PSS of the whole process tree, so pages the gunicorn workers share
+with the master are counted once).
+Usage:
+  python manage.py benchmark_startup
+  python manage.py benchmark_startup --runs 5 --workers 4 --profiles daphne,gunicorn
+  REDIS_URL=redis://127.0.0.1:6379/0 python manage.py benchmark_startup --workers 4
+
+Profiles:
+  compose              the old docker-compose command: makemigrations, migrate, runserver
+  daphne               the old image command: migrate, then one Daphne process
+  gunicorn             gunicorn.conf.py: --workers uvicorn workers forked from a preloaded master
+  gunicorn-no-preload  the same, each worker importing the app itself
+The one-shot `migrate --noinput` a deploy now runs before the servers start is timed on its
+own. Point the database settings at a migrated database; more than one worker needs REDIS_URL
+(gunicorn.conf.py refuses to start without it). PSS is read from /proc (Linux).
+"""
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MANAGE = [sys.executable, 'manage.py']
+APP = 'sonic_backend.asgi:application'
+
+
+def profile_commands(port):
+    """name -> (argv, extra environment)"""
+    bind = f'127.0.0.1:{port}'
+    migrate = 'python manage.py migrate --noinput'
+    gunicorn = ['gunicorn', '--bind', bind, APP]
+    return {
+        'compose': (['sh', '-c', (
+            f'python manage.py makemigrations --noinput --dry-run && {migrate} '
+            f'&& python manage.py runserver --noreload {bind}'
+        )], {}),
+        'daphne': (['sh', '-c', f'{migrate} && daphne -b 127.0.0.1 -p {port} {APP}'], {}),
+        'gunicorn': (gunicorn, {'GUNICORN_PRELOAD': 'True'}),
+        'gunicorn-no-preload': (gunicorn, {'GUNICORN_PRELOAD': 'False'}),
+    }
+
+
+def process_group(pgid):
+    """Pids of the live processes in a process group."""
+    pids = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # the command name (field 2) may contain spaces; the fields after it are fixed
+            fields = (entry / 'stat').read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid:
+            pids.append(int(entry.name))
+    return pids
+
+
+def pss_mb(pids):
+    """Proportional set size of the processes in MB, None where /proc has no smaps_rollup."""
+    total = 0
+    for pid in pids:
+        try:
+            rollup = Path(f'/proc/{pid}/smaps_rollup').read_text()
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return None
+        for line in rollup.splitlines():
+            if line.startswith('Pss:'):
+                total += int(line.split()[1])
+    return total / 1024 if pids else None
+
+
+class Command(BaseCommand):
+    help = 'Measures time to first healthy response and memory for each server start-up profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='compose,daphne,gunicorn,gunicorn-no-preload', help='Comma-separated profiles to run')
+        parser.add_argument('--runs', type=int, default=3, help='Starts per profile')
+        parser.add_argument('--workers', type=int, default=1, help='WEB_CONCURRENCY for the gunicorn profiles')
+        parser.add_argument('--port', type=int, default=8150)
+        parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for a start')
+        parser.add_argument('--settle', type=float, default=2, help='Seconds to let the workers boot before reading memory')
+
+    def handle(self, *args, **options):
+        commands = profile_commands(options['port'])
+        names = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = set(names) - set(commands)
+        if unknown:
+            raise CommandError(f"Unknown profile(s): {', '.join(sorted(unknown))}; choose from {', '.join(commands)}")
+        if options['runs'] < 1 or options['workers'] < 1:
+            raise CommandError('--runs and --workers must be at least 1')
+        env = {**os.environ, 'WEB_CONCURRENCY': str(options['workers'])}
+        env.pop('GUNICORN_RELOAD', None)
+
+        migrate = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            subprocess.run([*MANAGE, 'migrate', '--noinput'], cwd=settings.BASE_DIR, env=env, check=True, capture_output=True)
+            migrate.append(time.perf_counter() - started)
+
+        results = []
+        for name in names:
+            argv, extra = commands[name]
+            runs = [self.start(argv, {**env, **extra}, options) for _ in range(options['runs'])]
+            results.append((name, [seconds for seconds, _, _ in runs], runs[-1][1], runs[-1][2]))
+
+        header = f"{'profile':<22} {'ready mean':>10} {'min':>7} {'max':>7} {'procs':>6} {'PSS MB':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        self.stdout.write(self.row('migrate (one-shot)', migrate))
+        for name, seconds, procs, memory in results:
+            self.stdout.write(self.row(name, seconds, procs, memory))
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['runs']} run(s) per profile, {options['workers']} gunicorn worker(s); times in seconds"
+        ))
+
+    def row(self, name, seconds, procs=None, memory=None):
+        procs = '' if procs is None else procs
+        memory = '-' if memory is None else f'{memory:.1f}'
+        return (
+            f'{name:<22} {statistics.mean(seconds):>10.2f} {min(seconds):>7.2f} {max(seconds):>7.2f} '
+            f'{procs:>6} {memory:>8}'
+        )
+
+    def start(self, argv, env, options):
+        """One start: (seconds to the first 200 from /app/health, processes, PSS MB)."""
+        url = f"http://127.0.0.1:{options['port']}/app/health"
+        with tempfile.TemporaryFile() as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                argv, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+            )
+            try:
+                while True:
+                    if process.poll() is not None:
+                        log.seek(0)
+                        tail = log.read().decode(errors='replace').strip().splitlines()[-5:]
+                        raise CommandError(f"{' '.join(argv)} exited with {process.returncode}:\n" + '\n'.join(tail))
+                    try:
+                        if requests.get(url, timeout=1).status_code == 200:
+                            break
+                    except requests.RequestException:
+                        pass
+                    if time.perf_counter() - started > options['timeout']:
+                        raise CommandError(f"{' '.join(argv)} did not answer {url} within {options['timeout']}s")
+                    time.sleep(0.05)
+                seconds = time.perf_counter() - started
+                time.sleep(options['settle'])
+                pids = process_group(process.pid)
+                return seconds, len(pids), pss_mb(pids)
+            finally:
+                self.stop(process)
+
+    def stop(self, process):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        except ProcessLookupError:
+            pass
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
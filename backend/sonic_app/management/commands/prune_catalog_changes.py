@@ -0,0 +1,37 @@
+"""
+Delete old rows of the catalogue change log (CatalogChange, behind GET /app/catalog?since=).
+Usage:
+  python manage.py prune_catalog_changes
+  python manage.py prune_catalog_changes --days 7 --batch-size 5000
+  python manage.py prune_catalog_changes --dry-run
+
+Rows older than --days (default CATALOG_CHANGE_RETENTION_DAYS, 0 keeps all) are deleted; the
+newest row, the catalogue version, always stays. Apps last synced before the oldest row left get
+the full document on their next request. Meant to run daily (cron).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sonic_app.catalog import prune_catalog_changes
+
+
+class Command(BaseCommand):
+    help = 'Deletes catalogue change log rows older than the retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Retention in days (default CATALOG_CHANGE_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must be 0 or more')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        days = options['days'] if options['days'] is not None else settings.CATALOG_CHANGE_RETENTION_DAYS
+        if days == 0:
+            self.stdout.write(self.style.SUCCESS('Retention is 0 days: keeping every change'))
+            return
+        count = prune_catalog_changes(days, options['batch_size'], options['dry_run'])
+        verb = 'would delete' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(f'Catalogue changes {verb}: {count}'))
@@ -0,0 +1,249 @@
+"""
+Replay a mobile-app session mix against a running server and report latency percentiles per endpoint,
+and the bytes sent over the wire against the decoded body size (what response compression saves).
+Usage:
+  python manage.py seed_load_data
+  daphne -b 127.0.0.1 -p 8000 sonic_backend.asgi:application   # in another terminal
+  python manage.py run_load_test --concurrency 20 --duration 60
+  python manage.py run_load_test --base-url http://127.0.0.1:8000 --json-out results.json
+
+Side by side, e.g. the sync views against the async ones (sonic_app.async_views):
+  daphne -b 127.0.0.1 -p 8000 sonic_backend.asgi:application
+  ASYNC_READ_VIEWS=True daphne -b 127.0.0.1 -p 8001 sonic_backend.asgi:application
+  python manage.py run_load_test --base-url http://127.0.0.1:8000 --compare-url http://127.0.0.1:8001
+The same seeded session mix runs against each server in turn, then throughput and latency are
+compared per endpoint.
+
+Ids and Bearer tokens are read from the local database (sessions created by seed_load_data
+with the same --prefix), so point DATABASE_URL at the database the server is using.
+"""
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sonic_app.models import Category, Product, Session
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Thread-safe latency and response-size sink keyed by endpoint label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.sizes = {}
+
+    def add(self, label, elapsed_ms, ok, wire_bytes=0, body_bytes=0):
+        with self._lock:
+            self.samples.setdefault(label, []).append(elapsed_ms)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+            wire, body = self.sizes.get(label, (0, 0))
+            self.sizes[label] = (wire + wire_bytes, body + body_bytes)
+
+    def summary(self, wall_seconds):
+        rows = []
+        for label in sorted(self.samples):
+            values = sorted(self.samples[label])
+            wire, body = self.sizes.get(label, (0, 0))
+            rows.append({
+                'endpoint': label,
+                'count': len(values),
+                'errors': self.errors.get(label, 0),
+                'rps': round(len(values) / wall_seconds, 2) if wall_seconds else 0,
+                'mean_ms': round(sum(values) / len(values), 2),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'max_ms': round(values[-1], 2),
+                'wire_kb': round(wire / len(values) / 1024, 2),
+                'saved_pct': round(100 * (1 - wire / body), 1) if body else 0.0,
+            })
+        return rows
+
+
+class MobileSession:
+    """One simulated app session: launch, browse a category, open products, check cart/orders/notifications."""
+
+    def __init__(self, base_url, recorder, rng, categories, products, identity, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.rng = rng
+        self.categories = categories
+        self.products = products
+        self.user_id, token = identity if identity else (None, None)
+        self.timeout = timeout
+        self.http = requests.Session()
+        if token:
+            self.http.headers['Authorization'] = f'Bearer {token}'
+
+    def get(self, label, path, params=None):
+        start = time.perf_counter()
+        ok = False
+        wire_bytes = body_bytes = 0
+        try:
+            resp = self.http.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+            ok = resp.status_code < 400
+            # requests decodes gzip/br; Content-Length is what actually crossed the network
+            body_bytes = len(resp.content)
+            wire_bytes = int(resp.headers.get('Content-Length', body_bytes))
+        except requests.RequestException:
+            pass
+        self.recorder.add(f'GET {label}', (time.perf_counter() - start) * 1000, ok, wire_bytes, body_bytes)
+
+    def run(self):
+        rng = self.rng
+        # App launch
+        self.get('/app/categories/active/', '/app/categories/active/')
+        self.get('/app/banners/active/', '/app/banners/active/')
+        # Browse one or two categories, a few pages each
+        for category_id in rng.sample(self.categories, min(len(self.categories), rng.randint(1, 2))):
+            for page in range(1, rng.randint(1, 3) + 1):
+                self.get('/app/products/?category=', '/app/products/', {'category': category_id, 'page': page})
+        if rng.random() < 0.3:
+            self.get('/app/products/?search=', '/app/products/', {'search': rng.choice(['ring', 'gold', 'chain', 'royal'])})
+        # Product detail views
+        for product_id in rng.sample(self.products, min(len(self.products), rng.randint(1, 4))):
+            self.get('/app/products/{id}/', f'/app/products/{product_id}/')
+        if self.user_id is None:
+            return
+        self.get('/app/cart/?user_id=', '/app/cart/', {'user_id': self.user_id})
+        if rng.random() < 0.6:
+            self.get('/app/notifications/?user_id=', '/app/notifications/', {'user_id': self.user_id})
+        if rng.random() < 0.4:
+            self.get('/app/orders/?user_id=', '/app/orders/', {'user_id': self.user_id})
+
+
+class Command(BaseCommand):
+    help = 'Replays a realistic mobile session mix against a running server and reports p50/p95/p99 per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=10, help='Parallel simulated app users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--prefix', default='load', help='Prefix used by seed_load_data (selects sessions to log in as)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+        parser.add_argument('--json-out', default=None, help='Also write the summary as JSON to this path')
+        parser.add_argument(
+            '--compare-url', default=None,
+            help='Run the same mix against this second server afterwards and compare the two per endpoint',
+        )
+
+    def handle(self, *args, **options):
+        categories = list(
+            Category.objects.filter(is_delete=False, category_status=True).values_list('id', flat=True)
+        )
+        products = list(
+            Product.objects.filter(is_delete=False, product_status=True, product_parent_id__isnull=True)
+            .order_by('id').values_list('id', flat=True)[:5000]
+        )
+        identities = list(
+            Session.objects.filter(
+                session_key__startswith=f"{options['prefix']}_",
+                auth_token__isnull=False,
+                expire_date__gt=timezone.now(),
+            ).order_by('id').values_list('session_user_id', 'auth_token')[:5000]
+        )
+        if not categories or not products:
+            raise CommandError('No active categories/products found. Run seed_load_data first.')
+        if not identities:
+            self.stdout.write(self.style.WARNING('No seeded sessions found; running anonymous catalogue traffic only.'))
+
+        runs = [self.run_mix(options['base_url'], options, categories, products, identities)]
+        if options['compare_url']:
+            runs.append(self.run_mix(options['compare_url'], options, categories, products, identities))
+            self.write_comparison(*runs)
+
+        if options['json_out']:
+            with open(options['json_out'], 'w') as fh:
+                json.dump(runs[0] if len(runs) == 1 else {'runs': runs}, fh, indent=2)
+            self.stdout.write(f"Wrote {options['json_out']}")
+
+    def run_mix(self, base_url, options, categories, products, identities):
+        """Run the session mix against one server, print its table and return the summary."""
+        recorder = Recorder()
+        deadline = time.monotonic() + options['duration']
+        sessions_done = [0]
+        lock = threading.Lock()
+
+        def worker(worker_id):
+            rng = random.Random(options['seed'] * 1000 + worker_id)
+            while time.monotonic() < deadline:
+                identity = rng.choice(identities) if identities else None
+                MobileSession(
+                    base_url, recorder, rng, categories, products, identity, options['timeout']
+                ).run()
+                with lock:
+                    sessions_done[0] += 1
+
+        self.stdout.write(
+            f"Running {options['concurrency']} users for {options['duration']}s against {base_url} ..."
+        )
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+        wall = time.monotonic() - started
+
+        rows = recorder.summary(wall)
+        total = sum(r['count'] for r in rows)
+        header = (
+            f"{'endpoint':<36} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+            f" {'kB/req':>8} {'saved':>6}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in rows:
+            self.stdout.write(
+                f"{r['endpoint']:<36} {r['count']:>7} {r['errors']:>5} {r['rps']:>8} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}"
+                f" {r['wire_kb']:>8} {r['saved_pct']:>5}%"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{sessions_done[0]} sessions, {total} requests in {wall:.1f}s ({total / wall:.1f} req/s). Latencies in ms; '
+            'kB/req is on the wire, saved is against the uncompressed body.'
+        ))
+        return {
+            'base_url': base_url,
+            'concurrency': options['concurrency'],
+            'duration_s': round(wall, 2),
+            'sessions': sessions_done[0],
+            'requests': total,
+            'endpoints': rows,
+        }
+
+    def write_comparison(self, first, second):
+        """Per-endpoint rps and p50/p95 of the two runs; ratio is second / first throughput."""
+        self.stdout.write(f"\nA = {first['base_url']}   B = {second['base_url']}")
+        header = (
+            f"{'endpoint':<36} {'rps A':>8} {'rps B':>8} {'B/A':>6} {'p50 A':>8} {'p50 B':>8} {'p95 A':>8} {'p95 B':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        second_rows = {r['endpoint']: r for r in second['endpoints']}
+        for a in first['endpoints']:
+            b = second_rows.get(a['endpoint'])
+            if b is None:
+                continue
+            ratio = f"{b['rps'] / a['rps']:.2f}" if a['rps'] else '-'
+            self.stdout.write(
+                f"{a['endpoint']:<36} {a['rps']:>8} {b['rps']:>8} {ratio:>6} "
+                f"{a['p50_ms']:>8} {b['p50_ms']:>8} {a['p95_ms']:>8} {b['p95_ms']:>8}"
+            )
+        a_rps, b_rps = first['requests'] / first['duration_s'], second['requests'] / second['duration_s']
+        self.stdout.write(f"{'all requests':<36} {a_rps:>8.1f} {b_rps:>8.1f} {b_rps / a_rps if a_rps else 0:>6.2f}")
@@ -0,0 +1,381 @@
+"""
+Bulk-generate a deterministic catalogue, users and activity for capacity planning.
+Usage:
+  python manage.py seed_load_data
+  python manage.py seed_load_data --products 20000 --users 5000 --seed 7
+  python manage.py seed_load_data --flush   # remove a previous run with the same prefix first
+
+Every row is written with bulk_create in batches. All seeded rows carry the --prefix
+(default "load") in a name/key column so they can be found again by run_load_test and
+removed with --flush. The same --seed always produces the same data.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from sonic_app.models import (
+    Category, CategoryField, User, Product, ProductVariant, ProductFieldValue, ProductLead,
+    Order, OrderItem, AddToCart, NotificationType, NotificationTable, Session, StoredFile
+)
+from sonic_app.catalog import KIND_CATEGORY, KIND_PRODUCT, record_catalog_changes
+from sonic_app.facets import update_product_attributes
+from sonic_app.search import update_product_search_vectors
+
+LOAD_PASSWORD = 'load123'
+
+# Smallest valid PNG, used as the stored product image so /media/ is exercised too
+PNG_1X1 = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01'
+    b'\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDATx\x9cc\x00\x01'
+    b'\x00\x00\x05\x00\x01\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
+CATEGORY_NAMES = ['Necklace', 'Rings', 'Earrings', 'Bangles', 'Bracelets', 'Pendants', 'Chains', 'Anklets']
+
+# (field_name, field_label, field_type, options, variant_order)
+FIELD_TEMPLATES = [
+    ('karat', 'Karat', 'select', ['14K', '18K', '22K', '24K'], 1),
+    ('size', 'Size', 'select', [str(s) for s in range(6, 16)], 2),
+    ('purity', 'Purity', 'decimal', None, None),
+    ('stone_count', 'Stone Count', 'number', None, None),
+    ('stone_type', 'Stone Type', 'select', ['Diamond', 'Ruby', 'Emerald', 'Sapphire', 'None'], None),
+    ('hallmarked', 'Hallmarked', 'boolean', None, None),
+    ('finish', 'Finish', 'text', None, None),
+    ('care_notes', 'Care Notes', 'textarea', None, None),
+]
+
+ADJECTIVES = ['Classic', 'Royal', 'Floral', 'Antique', 'Modern', 'Temple', 'Kundan', 'Minimal', 'Twisted', 'Bridal']
+FINISHES = ['Polished', 'Matte', 'Hammered', 'Brushed', 'Oxidised']
+ORDER_STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+DEVICE_TYPES = ['android', 'ios']
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generates a deterministic dataset (catalogue, users, sessions, orders, notifications) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed => same data)')
+        parser.add_argument('--prefix', default='load', help='Marker used in usernames, product names and session keys')
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--products', type=int, default=2000, help='Total parent products across all categories')
+        parser.add_argument('--variants-per-product', type=int, default=6, help='Upper bound; actual count is random up to this')
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--sessions-per-user', type=int, default=1)
+        parser.add_argument('--carts-per-user', type=int, default=3)
+        parser.add_argument('--orders-per-user', type=int, default=4)
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--notifications-per-user', type=int, default=30)
+        parser.add_argument('--leads', type=int, default=1000)
+        parser.add_argument('--files', type=int, default=50, help='Stored product images shared across products')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--flush', action='store_true', help='Delete rows from a previous run with the same prefix first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        if options['flush']:
+            self._flush()
+        elif User.objects.filter(username__startswith=f'{self.prefix}_user_').exists():
+            raise CommandError(
+                f'Seed data with prefix "{self.prefix}" already exists. Use --flush or a different --prefix.'
+            )
+
+        with transaction.atomic():
+            files = self._seed_files(options['files'])
+            categories = self._seed_categories(options['categories'])
+            fields_by_category = self._seed_category_fields(categories)
+            products = self._seed_products(categories, options['products'], files)
+            variants = self._seed_variants(products, fields_by_category, options['variants_per_product'])
+            field_value_count = self._seed_field_values(products, fields_by_category)
+            # bulk_create skips the signal handlers
+            update_product_search_vectors([p.id for p in products])
+            update_product_attributes([p.id for p in products])
+            record_catalog_changes(KIND_CATEGORY, [c.id for c in categories])
+            record_catalog_changes(KIND_PRODUCT, [p.id for p in products])
+            users, staff = self._seed_users(options['users'])
+            session_count = self._seed_sessions(users, options['sessions_per_user'])
+            # Carts and orders only hold products a customer could have bought
+            active = [p for p in products if p.product_status]
+            cart_count = self._seed_carts(users, active, variants, options['carts_per_user'])
+            order_count, item_count = self._seed_orders(
+                users, active, variants, options['orders_per_user'], options['items_per_order']
+            )
+            notification_count = self._seed_notifications(users, options['notifications_per_user'])
+            lead_count = self._seed_leads(staff, products, variants, options['leads'])
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded dataset "{self.prefix}" (seed={options["seed"]}):'))
+        self.stdout.write(f'  Stored files:        {len(files)}')
+        self.stdout.write(f'  Categories:          {len(categories)}')
+        self.stdout.write(f'  Category fields:     {sum(len(f) for f in fields_by_category.values())}')
+        self.stdout.write(f'  Products:            {len(products)}')
+        self.stdout.write(f'  Variants:            {sum(len(v) for v in variants.values())}')
+        self.stdout.write(f'  Field values:        {field_value_count}')
+        self.stdout.write(f'  Users:               {len(users)} (+1 staff)')
+        self.stdout.write(f'  Sessions:            {session_count}')
+        self.stdout.write(f'  Cart items:          {cart_count}')
+        self.stdout.write(f'  Orders / items:      {order_count} / {item_count}')
+        self.stdout.write(f'  Notifications:       {notification_count}')
+        self.stdout.write(f'  Leads:               {lead_count}')
+        self.stdout.write(f'  Login password:      {LOAD_PASSWORD}')
+
+    def _bulk(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def _flush(self):
+        """Delete a previous run. Cascades remove sessions, carts, orders, notifications, variants and field values."""
+        p = self.prefix
+        User.objects.filter(username__startswith=f'{p}_').delete()
+        Product.objects.filter(product_name__startswith=f'[{p}] ').delete()
+        Category.objects.filter(category_name__startswith=f'[{p}] ').delete()
+        NotificationType.objects.filter(notif_name=f'[{p}] Load Test').delete()
+        StoredFile.objects.filter(name__startswith=f'products/{p}_').delete()
+        self.stdout.write(self.style.WARNING(f'Flushed previous "{p}" seed data'))
+
+    def _seed_files(self, count):
+        return self._bulk(StoredFile, [
+            StoredFile(name=f'products/{self.prefix}_{i:05d}.png', data=PNG_1X1, content_type='image/png')
+            for i in range(count)
+        ])
+
+    def _seed_categories(self, count):
+        return self._bulk(Category, [
+            Category(
+                category_name=f'[{self.prefix}] {CATEGORY_NAMES[i % len(CATEGORY_NAMES)]} {i + 1}',
+                category_description=f'Seeded category {i + 1}',
+                category_status=True,
+                display_order=i,
+            )
+            for i in range(count)
+        ])
+
+    def _seed_category_fields(self, categories):
+        fields = []
+        for category in categories:
+            for order, (name, label, field_type, options, variant_order) in enumerate(FIELD_TEMPLATES):
+                fields.append(CategoryField(
+                    category=category,
+                    field_name=name,
+                    field_label=label,
+                    field_type=field_type,
+                    field_options=list(options) if options else None,
+                    is_required=order < 2,
+                    display_order=order,
+                    is_variant_dimension=variant_order is not None,
+                    variant_order=variant_order,
+                ))
+        fields_by_category = {c.id: [] for c in categories}
+        for field in self._bulk(CategoryField, fields):
+            fields_by_category[field.category_id].append(field)
+        return fields_by_category
+
+    def _seed_products(self, categories, count, files):
+        if not categories:
+            return []
+        rng = self.rng
+        products = []
+        for i in range(count):
+            category = categories[i % len(categories)]
+            base = category.category_name.split('] ', 1)[-1].rsplit(' ', 1)[0]
+            name = f'{rng.choice(ADJECTIVES)} {base} {i + 1:05d}'
+            products.append(Product(
+                product_name=f'[{self.prefix}] {name}',
+                product_description=f'{name} in {rng.choice(FINISHES).lower()} finish. Seeded for load testing.',
+                product_price=Decimal(rng.randint(5000, 500000)) / 100,
+                product_weight=Decimal(rng.randint(500, 50000)) / 1000,
+                product_image=files[i % len(files)].name if files else None,
+                product_category=category,
+                product_status=rng.random() > 0.05,
+            ))
+        return self._bulk(Product, products)
+
+    def _seed_variants(self, products, fields_by_category, max_per_product):
+        rng = self.rng
+        variants = []
+        for product in products:
+            dims = sorted(
+                (f for f in fields_by_category.get(product.product_category_id, []) if f.is_variant_dimension),
+                key=lambda f: f.variant_order,
+            )
+            if len(dims) < 2 or max_per_product <= 0:
+                continue
+            combos = [(a, b) for a in dims[0].field_options for b in dims[1].field_options]
+            picked = rng.sample(combos, min(len(combos), rng.randint(1, max_per_product)))
+            for order, (v1, v2) in enumerate(picked):
+                variants.append(ProductVariant(
+                    product=product,
+                    variant_value_1=v1,
+                    variant_value_2=v2,
+                    price=(product.product_price or Decimal('0')) + rng.randint(0, 200),
+                    display_order=order,
+                ))
+        by_product = {}
+        for variant in self._bulk(ProductVariant, variants):
+            by_product.setdefault(variant.product_id, []).append(variant)
+        return by_product
+
+    def _field_value(self, field):
+        rng = self.rng
+        if field.field_type == 'select':
+            return rng.choice(field.field_options)
+        if field.field_type == 'number':
+            return str(rng.randint(0, 60))
+        if field.field_type == 'decimal':
+            return str(rng.choice([58.5, 75.0, 91.6, 99.9]))
+        if field.field_type == 'boolean':
+            return rng.choice(['true', 'false'])
+        if field.field_type == 'textarea':
+            return 'Store in a dry pouch. Avoid perfume and water contact.'
+        return rng.choice(FINISHES)
+
+    def _seed_field_values(self, products, fields_by_category):
+        values = []
+        for product in products:
+            for field in fields_by_category.get(product.product_category_id, []):
+                if field.is_variant_dimension:
+                    continue
+                value = ProductFieldValue(product=product, category_field=field, field_value=self._field_value(field))
+                value.set_typed_values(field.field_type)
+                values.append(value)
+        self._bulk(ProductFieldValue, values)
+        return len(values)
+
+    def _seed_users(self, count):
+        password = make_password(LOAD_PASSWORD)  # hash once; PBKDF2 per row would dominate the run
+        users = [
+            User(
+                username=f'{self.prefix}_user_{i:06d}',
+                email=f'{self.prefix}_user_{i:06d}@example.com',
+                password=password,
+                first_name='Load',
+                last_name=f'User {i}',
+                phone_number=f'9{self.rng.randint(0, 99):02d}{i:07d}',
+                company_name=f'Load Co {i % 97}',
+                is_approved=True,
+                is_phone_verified=True,
+                approved_at=self.now,
+            )
+            for i in range(count)
+        ]
+        users = self._bulk(User, users)
+        staff = User.objects.create(
+            username=f'{self.prefix}_staff',
+            email=f'{self.prefix}_staff@example.com',
+            password=password,
+            is_staff=True,
+            is_approved=True,
+        )
+        return users, staff
+
+    def _token(self, nbytes):
+        return f'{self.rng.getrandbits(nbytes * 8):0{nbytes * 2}x}'
+
+    def _seed_sessions(self, users, per_user):
+        sessions = []
+        for user in users:
+            for n in range(per_user):
+                sessions.append(Session(
+                    session_user=user,
+                    session_key=f'{self.prefix}_{user.id}_{n}'[:40],
+                    auth_token=self._token(24),
+                    fcm_token=f'{self.prefix}-fcm-{self._token(16)}',
+                    device_type=self.rng.choice(DEVICE_TYPES),
+                    expire_date=self.now + timezone.timedelta(days=30),
+                ))
+        self._bulk(Session, sessions)
+        return len(sessions)
+
+    def _pick_line(self, products, variants):
+        """Pick a (product, variant or None) pair from products (the active ones, see handle())."""
+        product = self.rng.choice(products)
+        options = variants.get(product.id)
+        return product, (self.rng.choice(options) if options else None)
+
+    def _seed_carts(self, users, products, variants, per_user):
+        if not products:
+            return 0
+        carts = []
+        for user in users:
+            seen = set()
+            for _ in range(per_user):
+                product, variant = self._pick_line(products, variants)
+                key = (product.id, variant.id if variant else None)
+                if key in seen:  # unique_together (user, product, variant, status)
+                    continue
+                seen.add(key)
+                carts.append(AddToCart(
+                    cart_user=user, cart_product=product, cart_variant=variant,
+                    cart_quantity=self.rng.randint(1, 3), cart_status=True,
+                ))
+        self._bulk(AddToCart, carts)
+        return len(carts)
+
+    def _seed_orders(self, users, products, variants, per_user, items_per_order):
+        if not products:
+            return 0, 0
+        rng = self.rng
+        orders, lines = [], []
+        for user in users:
+            for _ in range(per_user):
+                order_lines = [self._pick_line(products, variants) for _ in range(rng.randint(1, items_per_order))]
+                quantities = [rng.randint(1, 3) for _ in order_lines]
+                prices = [(v.price if v and v.price is not None else p.product_price) or Decimal('0') for p, v in order_lines]
+                total = sum(price * qty for price, qty in zip(prices, quantities))
+                orders.append(Order(
+                    order_user=user,
+                    order_price=total,
+                    order_total_price=total,
+                    order_status=rng.choice(ORDER_STATUSES),
+                    order_date=self.now - timezone.timedelta(days=rng.randint(0, 365)),
+                ))
+                lines.append(list(zip(order_lines, quantities, prices)))
+        orders = self._bulk(Order, orders)
+        items = [
+            OrderItem(order=order, product=product, product_variant=variant, quantity=qty, price=price)
+            for order, order_lines in zip(orders, lines)
+            for (product, variant), qty, price in order_lines
+        ]
+        self._bulk(OrderItem, items)
+        return len(orders), len(items)
+
+    def _seed_notifications(self, users, per_user):
+        notification_type, _ = NotificationType.objects.get_or_create(
+            notif_name=f'[{self.prefix}] Load Test',
+            defaults={'notif_status': True, 'created_at': self.now, 'updated_at': self.now},
+        )
+        notifications = [
+            NotificationTable(
+                notification_user=user,
+                notification_type=notification_type,
+                notification_title=f'Update {n + 1}',
+                notification_message='Your order status has changed. Tap to view details.',
+                notification_read=self.rng.random() < 0.7,
+            )
+            for user in users
+            for n in range(per_user)
+        ]
+        self._bulk(NotificationTable, notifications)
+        return len(notifications)
+
+    def _seed_leads(self, staff, products, variants, count):
+        if not products:
+            return 0
+        leads = []
+        for i in range(count):
+            product, variant = self._pick_line(products, variants)
+            leads.append(ProductLead(
+                product=product,
+                product_variant=variant,
+                company_name=f'Lead Co {i % 211}',
+                phone_number=f'8{i:09d}',
+                quantity=self.rng.randint(1, 20),
+                submitted_by=staff,
+            ))
+        self._bulk(ProductLead, leads)
+        return len(leads)
@@ -0,0 +1,30 @@
+"""
+Absolute URLs for uploaded media (category/product/banner images, customize-order uploads).
+
+A media URL is a base followed by the storage URL of the file (MEDIA_URL + name). The base is
+MEDIA_BASE_URL when set (a CDN or custom domain in front of /media/), else the scheme and host of
+the request. It is worked out once per request (MediaURLField keeps it in the serializer context)
+so serializing a page costs a string join per image.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+# Base when there is neither MEDIA_BASE_URL nor a request (shell, management commands)
+FALLBACK_BASE_URL = 'http://localhost:8000'
+
+
+def media_base_url(request=None):
+    """'https://cdn.example.com' / 'http://host:port' (no trailing slash) to put in front of media paths."""
+    if settings.MEDIA_BASE_URL:
+        return settings.MEDIA_BASE_URL.rstrip('/')
+    if request is not None:
+        return request.build_absolute_uri('/').rstrip('/')
+    return FALLBACK_BASE_URL
+
+
+def media_url(name, base, storage=default_storage):
+    """Absolute URL of a stored file name; names and storage URLs (S3, ...) that are already absolute are kept."""
+    if '://' in name:
+        return name
+    url = storage.url(name)
+    return url if '://' in url else base + url
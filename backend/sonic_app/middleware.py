@@ -1,28 +1,125 @@
-"""Request logging and CSRF exemption for API."""
+"""
+Request logging, CSRF exemption for API and response compression.
 
+All three run sync or async, whichever the rest of the stack is: under ASGI a sync-only
+middleware would put every request, async views included, through a thread hand-off.
+"""
+import gzip
+
+import brotli
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+# Content codings we produce, preferred first when the client ranks them equally
+ENCODINGS = ('br', 'gzip')
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'}
+
+
+class SyncAndAsyncMiddleware:
+    """Base for middleware that works in sync and async stacks alike; subclasses change the response in process()."""
+    sync_capable = True
+    async_capable = True
 
-class DisableCSRFForAPIMiddleware:
-    """
-    Skip CSRF check for /app/ and /api/ so mobile and other API clients can POST
-    without a CSRF token. Must run before django.middleware.csrf.CsrfViewMiddleware.
-    """
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        return response
+
+
+class DisableCSRFForAPIMiddleware(SyncAndAsyncMiddleware):
+    """
+    Skip CSRF check for /app/ and /api/ so mobile and other API clients can POST
+    without a CSRF token. Must run before django.middleware.csrf.CsrfViewMiddleware.
+    """
 
     def process_view(self, request, view_func, view_args, view_kwargs):
         if request.path.startswith("/app/") or request.path.startswith("/api/"):
             request.csrf_processing_done = True
 
 
-class RequestLogMiddleware:
+class RequestLogMiddleware(SyncAndAsyncMiddleware):
     """Log every incoming request so we can see API calls in the backend terminal."""
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
     def __call__(self, request):
         print(f"[BACKEND] {request.method} {request.path}", flush=True)
-        return self.get_response(request)
+        return super().__call__(request)
+
+
+def _accepted_encodings(header):
+    """{'br': 1.0, 'gzip': 0.5, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """'br' or 'gzip' (whichever the client ranks higher, Brotli on a tie), or None."""
+    accepted = _accepted_encodings(header or '')
+    ranked = [(accepted.get(coding, accepted.get('*', 0.0)), -index, coding) for index, coding in enumerate(ENCODINGS)]
+    quality, _, coding = max(ranked)
+    return coding if quality > 0 else None
+
+
+def _compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith(('+json', '+xml'))
+    )
+
+
+class CompressionMiddleware(SyncAndAsyncMiddleware):
+    """
+    Brotli or gzip for text and JSON responses of at least
+    COMPRESSION_MIN_SIZE bytes, negotiated from Accept-Encoding. Streaming responses (exports,
+    filesystem media), responses that already carry a Content-Encoding and binary media such as
+    the images ServeDBMediaView returns pass through untouched. GZIP_LEVEL and BROTLI_QUALITY cap
+    the CPU spent per response. Place it near the top so it sees the final body.
+    """
+
+    def process(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding') or not _compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        min_size = settings.COMPRESSION_MIN_SIZE
+        if not min_size or len(response.content) < min_size:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=settings.GZIP_LEVEL, mtime=0)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The bytes changed, so a strong validator no longer holds (sonic_app.conditional compares weakly)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,49 @@
+# Generated manually - full-text search for products (tsvector + GIN, optional pg_trgm)
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Same document as sonic_app.search.product_search_vector(); kept inline so the migration does not import app code.
+BACKFILL_SEARCH_VECTOR = """
+UPDATE sonic_app_product p SET search_vector =
+    setweight(to_tsvector('english', coalesce(p.product_name, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(
+        (SELECT c.category_name FROM sonic_app_category c WHERE c.id = p.product_category_id), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(
+        (SELECT string_agg(v.field_value, ' ') FROM sonic_app_product_field_value v WHERE v.product_id = p.id), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(p.product_description, '')), 'C');
+"""
+
+# pg_trgm powers typo-tolerant name matching. Skipped (search still works) on servers that do not ship it.
+CREATE_TRIGRAM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS product_name_trgm_gin ON sonic_app_product USING gin (product_name gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0013_add_storedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Maintained by sonic_app.search', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEX, 'DROP INDEX IF EXISTS product_name_trgm_gin;'),
+    ]
@@ -0,0 +1,41 @@
+# Generated manually - denormalised typed attributes (JSONB + GIN) for faceted filtering
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Same as sonic_app.facets.UPDATE_ATTRIBUTES_SQL at the time of this migration.
+BACKFILL_ATTRIBUTES = r"""
+UPDATE sonic_app_product p SET attributes = coalesce((
+    SELECT jsonb_object_agg(cf.field_name,
+        CASE
+            WHEN cf.field_type IN ('number', 'decimal') AND v.field_value ~ '^\s*-?\d+(\.\d+)?\s*$'
+                THEN to_jsonb(trim(v.field_value)::numeric)
+            WHEN cf.field_type = 'boolean'
+                THEN to_jsonb(lower(trim(v.field_value)) IN ('true', '1', 'yes'))
+            ELSE to_jsonb(v.field_value)
+        END)
+    FROM sonic_app_product_field_value v
+    JOIN sonic_app_category_field cf ON cf.id = v.category_field_id
+    WHERE v.product_id = p.id AND cf.is_delete = false AND cf.is_variant_dimension = false
+), '{}'::jsonb)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0014_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='attributes',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Typed field values by field_name; maintained by sonic_app.facets'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['attributes'], name='product_attributes_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.RunSQL(BACKFILL_ATTRIBUTES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated manually - native JSON field_options and typed ProductFieldValue columns
+
+import json
+
+from django.db import migrations, models
+
+
+def normalize_field_options(apps, schema_editor):
+    """Make every field_options value valid JSON text so the column can be cast to jsonb."""
+    CategoryField = apps.get_model('sonic_app', 'CategoryField')
+    for field in CategoryField.objects.exclude(field_options__isnull=True).only('id', 'field_options'):
+        raw = field.field_options.strip()
+        if not raw:
+            options = None
+        else:
+            try:
+                options = json.loads(raw)
+            except ValueError:
+                # Hand-entered "20, 21, 22" style options
+                options = [part.strip() for part in raw.split(',') if part.strip()]
+        CategoryField.objects.filter(pk=field.pk).update(
+            field_options=json.dumps(options) if options is not None else None
+        )
+
+
+# Same rules as ProductFieldValue.set_typed_values(); kept inline so the migration does not import app code.
+BACKFILL_TYPED_VALUES = r"""
+UPDATE sonic_app_product_field_value v SET
+    value_number = CASE
+        WHEN cf.field_type IN ('number', 'decimal') AND trim(v.field_value) ~ '^[+-]?(\d{1,14}(\.\d*)?|\.\d+)$'
+            THEN trim(v.field_value)::numeric
+    END,
+    value_boolean = CASE
+        WHEN cf.field_type = 'boolean' THEN lower(trim(v.field_value)) IN ('true', '1', 'yes')
+    END
+FROM sonic_app_category_field cf
+WHERE cf.id = v.category_field_id;
+"""
+
+# Product.attributes now takes its typed values from the columns above.
+REFRESH_ATTRIBUTES = """
+UPDATE sonic_app_product p SET attributes = coalesce((
+    SELECT jsonb_object_agg(cf.field_name,
+        CASE
+            WHEN v.value_number IS NOT NULL THEN to_jsonb(trim_scale(v.value_number))
+            WHEN v.value_boolean IS NOT NULL THEN to_jsonb(v.value_boolean)
+            ELSE to_jsonb(v.field_value)
+        END)
+    FROM sonic_app_product_field_value v
+    JOIN sonic_app_category_field cf ON cf.id = v.category_field_id
+    WHERE v.product_id = p.id AND cf.is_delete = false AND cf.is_variant_dimension = false
+), '{}'::jsonb);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0015_product_attributes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_field_options, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='categoryfield',
+            name='field_options',
+            field=models.JSONField(blank=True, help_text='List of options for select type', null=True),
+        ),
+        migrations.AddField(
+            model_name='productfieldvalue',
+            name='value_number',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, help_text='field_value as a number for number/decimal fields', max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='productfieldvalue',
+            name='value_boolean',
+            field=models.BooleanField(blank=True, editable=False, help_text='field_value for boolean fields', null=True),
+        ),
+        migrations.RunSQL(BACKFILL_TYPED_VALUES, migrations.RunSQL.noop),
+        migrations.RunSQL(REFRESH_ATTRIBUTES, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='productfieldvalue',
+            index=models.Index(fields=['category_field', 'value_number'], name='field_value_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productfieldvalue',
+            index=models.Index(condition=models.Q(('value_boolean__isnull', False)), fields=['category_field', 'value_boolean'], name='field_value_boolean_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated manually - one row per (product, variant_value_1, variant_value_2)
+
+from django.db import migrations, models
+
+# Keep the oldest row of each duplicate group; move order items, cart rows and leads onto it first.
+# Constraints are checked immediately so no deferred trigger events block the ALTER TABLE that follows.
+MERGE_DUPLICATE_VARIANTS = """
+SET CONSTRAINTS ALL IMMEDIATE;
+
+CREATE TEMP TABLE variant_duplicates AS
+SELECT id, keep_id FROM (
+    SELECT id, min(id) OVER (PARTITION BY product_id, variant_value_1, variant_value_2) AS keep_id
+    FROM sonic_app_product_variant
+) ranked
+WHERE id <> keep_id;
+
+UPDATE sonic_app_order_item t SET product_variant_id = d.keep_id
+    FROM variant_duplicates d WHERE t.product_variant_id = d.id;
+UPDATE sonic_app_addtocart t SET cart_variant_id = d.keep_id
+    FROM variant_duplicates d WHERE t.cart_variant_id = d.id;
+UPDATE sonic_app_product_lead t SET product_variant_id = d.keep_id
+    FROM variant_duplicates d WHERE t.product_variant_id = d.id;
+DELETE FROM sonic_app_product_variant v USING variant_duplicates d WHERE v.id = d.id;
+DROP TABLE variant_duplicates;
+
+SET CONSTRAINTS ALL DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0016_typed_field_values'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_DUPLICATE_VARIANTS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='productvariant',
+            constraint=models.UniqueConstraint(fields=('product', 'variant_value_1', 'variant_value_2'), name='unique_product_variant_values', nulls_distinct=False),
+        ),
+    ]
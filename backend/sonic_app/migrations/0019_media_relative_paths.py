@@ -0,0 +1,44 @@
+# Generated manually - store media file fields as paths relative to MEDIA_URL
+
+from urllib.parse import unquote, urlsplit
+
+from django.db import migrations
+
+MEDIA_FIELDS = [
+    ('Category', 'category_image'),
+    ('Product', 'product_image'),
+    ('CustomizeOrders', 'order_image'),
+    ('CustomizeOrders', 'order_audio'),
+    ('Banners', 'banner_image'),
+]
+
+
+def relative_media_path(value):
+    """'https://host/media/categories/a.jpg?x=1' -> 'categories/a.jpg'; None for URLs outside /media/."""
+    url = value[max(value.rfind('http', 0, value.index('://')), 0):]
+    path = unquote(urlsplit(url).path)
+    if '/media/' not in path:
+        return None
+    return path.rsplit('/media/', 1)[1] or None
+
+
+def strip_media_urls(apps, schema_editor):
+    """Rows whose file field holds a full URL instead of the storage name."""
+    for model_name, field_name in MEDIA_FIELDS:
+        model = apps.get_model('sonic_app', model_name)
+        rows = model.objects.filter(**{f'{field_name}__contains': '://'}).values_list('pk', field_name)
+        for pk, value in rows:
+            path = relative_media_path(value)
+            if path:
+                model.objects.filter(pk=pk).update(**{field_name: path})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0018_catalog_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_media_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated manually - index for replaying a user's notifications by id on WebSocket reconnect
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0019_media_relative_paths'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationtable',
+            index=models.Index(
+                condition=models.Q(('is_delete', False)), fields=['notification_user', 'id'], name='notification_user_id_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated manually - per-user unread notification counters
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0020_notification_user_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('counter_user', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter',
+                    serialize=False, to=settings.AUTH_USER_MODEL
+                )),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Notification Counter',
+                'verbose_name_plural': 'Notification Counters',
+                'db_table': 'sonic_app_notificationcounter',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationtable',
+            index=models.Index(
+                condition=models.Q(('is_delete', False), ('notification_read', False)), fields=['notification_user'],
+                name='notification_unread_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated manually - notification archive table and per-type retention
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0021_notification_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationtype',
+            name='notif_retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('notification_title', models.CharField(max_length=255)),
+                ('notification_message', models.TextField(blank=True, null=True)),
+                ('notification_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('is_delete', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+                ('notification_type', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications',
+                    to='sonic_app.notificationtype'
+                )),
+                ('notification_user', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications',
+                    to=settings.AUTH_USER_MODEL
+                )),
+            ],
+            options={
+                'verbose_name': 'Archived Notification',
+                'verbose_name_plural': 'Archived Notifications',
+                'db_table': 'sonic_app_notification_archive',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['notification_user', 'created_at'], name='notification_archive_user_idx'),
+                ],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationtable',
+            index=models.Index(
+                condition=models.Q(('notification_read', True), ('is_delete', True), _connector='OR'),
+                fields=['notification_type', 'created_at'], name='notification_retention_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated manually - broadcast notifications stored once, with per-user receipts
+
+import django.db.models.deletion
+import sonic_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0022_notification_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigIntegerField(
+                    db_default=sonic_app.models.NextNotificationId(), primary_key=True, serialize=False
+                )),
+                ('broadcast_title', models.CharField(max_length=255)),
+                ('broadcast_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_delete', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('broadcast_type', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='sonic_app.notificationtype'
+                )),
+            ],
+            options={
+                'verbose_name': 'Broadcast Notification',
+                'verbose_name_plural': 'Broadcast Notifications',
+                'db_table': 'sonic_app_broadcast_notification',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt_read', models.BooleanField(default=False)),
+                ('is_delete', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('receipt_broadcast', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='receipts',
+                    to='sonic_app.broadcastnotification'
+                )),
+                ('receipt_user', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts',
+                    to=settings.AUTH_USER_MODEL
+                )),
+            ],
+            options={
+                'verbose_name': 'Broadcast Receipt',
+                'verbose_name_plural': 'Broadcast Receipts',
+                'db_table': 'sonic_app_broadcast_receipt',
+                'constraints': [
+                    models.UniqueConstraint(fields=('receipt_user', 'receipt_broadcast'), name='broadcast_receipt_unique'),
+                ],
+            },
+        ),
+    ]
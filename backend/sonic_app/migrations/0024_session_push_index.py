@@ -0,0 +1,19 @@
+# Generated manually - index for reading the push tokens of live sessions
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0023_broadcast_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(
+                condition=models.Q(('fcm_token__isnull', False)), fields=['expire_date'], name='session_push_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated manually - notification counters hold personal notifications only; unread broadcasts are counted on read
+
+from django.db import migrations
+
+
+def drop_counters(apps, schema_editor):
+    """The stored counts included broadcasts; each user's is recounted on its first read."""
+    apps.get_model('sonic_app', 'NotificationCounter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0024_session_push_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated manually - type field values padded with tabs/newlines the way ProductFieldValue.normalize_value() does
+
+from django.db import migrations
+
+# 0016 trimmed spaces only. Same rules as ProductFieldValue.set_typed_values(); inline so the
+# migration does not import app code.
+RETYPE_PADDED_VALUES = r"""
+UPDATE sonic_app_product_field_value v SET
+    value_number = CASE
+        WHEN cf.field_type IN ('number', 'decimal')
+            AND btrim(v.field_value, E' \t\n\r\f\v') ~ '^[+-]?([0-9]{1,14}(\.[0-9]*)?|\.[0-9]+)$'
+            THEN btrim(v.field_value, E' \t\n\r\f\v')::numeric
+    END,
+    value_boolean = CASE
+        WHEN cf.field_type = 'boolean' THEN lower(btrim(v.field_value, E' \t\n\r\f\v')) IN ('true', '1', 'yes')
+    END
+FROM sonic_app_category_field cf
+WHERE cf.id = v.category_field_id AND v.field_value ~ E'^[\t\n\r\f\v]|[\t\n\r\f\v]$';
+"""
+
+REFRESH_ATTRIBUTES = r"""
+UPDATE sonic_app_product p SET attributes = coalesce((
+    SELECT jsonb_object_agg(cf.field_name,
+        CASE
+            WHEN v.value_number IS NOT NULL THEN to_jsonb(trim_scale(v.value_number))
+            WHEN v.value_boolean IS NOT NULL THEN to_jsonb(v.value_boolean)
+            ELSE to_jsonb(v.field_value)
+        END)
+    FROM sonic_app_product_field_value v
+    JOIN sonic_app_category_field cf ON cf.id = v.category_field_id
+    WHERE v.product_id = p.id AND cf.is_delete = false AND cf.is_variant_dimension = false
+), '{}'::jsonb)
+WHERE p.id IN (
+    SELECT product_id FROM sonic_app_product_field_value WHERE field_value ~ E'^[\t\n\r\f\v]|[\t\n\r\f\v]$'
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sonic_app', '0025_personal_notification_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RETYPE_PADDED_VALUES, migrations.RunSQL.noop),
+        migrations.RunSQL(REFRESH_ATTRIBUTES, migrations.RunSQL.noop),
+    ]
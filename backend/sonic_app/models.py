@@ -1,8 +1,15 @@
+import re
+from decimal import Decimal
+
 from django.db import models
 from django.db.models import Q
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .response_cache import GenerationQuerySet
+
 
 class Category(models.Model):
     """Product category model for jewelry types (Necklace, Rings, etc.)"""
@@ -16,6 +23,8 @@ class Category(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_category'
         verbose_name = 'Category'
@@ -89,7 +98,7 @@ class CategoryField(models.Model):
     field_name = models.CharField(max_length=255)
     field_label = models.CharField(max_length=255)
     field_type = models.CharField(max_length=50, choices=FIELD_TYPE_CHOICES, default='text')
-    field_options = models.TextField(null=True, blank=True, help_text='JSON array of options for select type')
+    field_options = models.JSONField(null=True, blank=True, help_text='List of options for select type')
     is_required = models.BooleanField(default=False)
     display_order = models.IntegerField(default=0)
     placeholder = models.CharField(max_length=255, null=True, blank=True)
@@ -101,6 +110,8 @@ class CategoryField(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_category_field'
         verbose_name = 'Category Field'
@@ -142,16 +153,25 @@ class Product(models.Model):
         related_name='child_products'
     )
     product_status = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False, help_text='Maintained by sonic_app.search')
+    attributes = models.JSONField(default=dict, blank=True, editable=False, help_text='Typed field values by field_name; maintained by sonic_app.facets')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_product'
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        # The pg_trgm index on product_name is created in migration 0014 (only when the extension is available)
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            GinIndex(fields=['attributes'], name='product_attributes_gin', opclasses=['jsonb_path_ops']),
+        ]
 
     def soft_delete(self):
         """Soft delete the product"""
@@ -177,11 +197,21 @@ class ProductVariant(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_product_variant'
         verbose_name = 'Product Variant'
         verbose_name_plural = 'Product Variants'
         ordering = ['product', 'display_order', 'id']
+        constraints = [
+            # NULLS NOT DISTINCT (PostgreSQL 15+) so single-dimension variants are unique too
+            models.UniqueConstraint(
+                fields=['product', 'variant_value_1', 'variant_value_2'],
+                name='unique_product_variant_values',
+                nulls_distinct=False,
+            ),
+        ]
 
     def __str__(self):
         parts = [self.variant_value_1]
@@ -202,15 +232,81 @@ class ProductFieldValue(models.Model):
         on_delete=models.CASCADE,
         related_name='values'
     )
+    NUMERIC_FIELD_TYPES = ('number', 'decimal')
+    TRUE_VALUES = ('true', '1', 'yes')
+
     field_value = models.TextField()
+    value_number = models.DecimalField(
+        max_digits=20, decimal_places=6, null=True, blank=True, editable=False,
+        help_text='field_value as a number for number/decimal fields'
+    )
+    value_boolean = models.BooleanField(null=True, blank=True, editable=False, help_text='field_value for boolean fields')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_product_field_value'
         verbose_name = 'Product Field Value'
         verbose_name_plural = 'Product Field Values'
         unique_together = ['product', 'category_field']
+        indexes = [
+            models.Index(fields=['category_field', 'value_number'], name='field_value_number_idx'),
+            models.Index(
+                fields=['category_field', 'value_boolean'], name='field_value_boolean_idx',
+                condition=Q(value_boolean__isnull=False)
+            ),
+        ]
+
+    # What counts as a number (up to 14 integer digits); matched in Python and in SQL
+    NUMBER_PATTERN = r'^[+-]?([0-9]{1,14}(\.[0-9]*)?|\.[0-9]+)$'
+    # Trimmed from both ends before a value is typed, in Python (normalize_value) and in SQL (btrim)
+    VALUE_WHITESPACE = ' \t\n\r\f\v'
+
+    @classmethod
+    def normalize_value(cls, raw):
+        return str(raw).strip(cls.VALUE_WHITESPACE)
+
+    @classmethod
+    def parse_number(cls, raw):
+        """
+        Decimal for a numeric field value, None unless it is plain digits with an optional sign and
+        decimal point that fit value_number: NUMBER_PATTERN after normalize_value(), the same rule
+        facets.UPDATE_TYPED_VALUES_SQL applies (no exponents, underscores, NaN or Infinity).
+        """
+        text = cls.normalize_value(raw)
+        return Decimal(text) if re.fullmatch(cls.NUMBER_PATTERN, text) else None
+
+    def set_typed_values(self, field_type=None):
+        """Fill value_number/value_boolean from field_value according to the field's field_type."""
+        field_type = field_type or self.category_field.field_type
+        self.value_number = self.parse_number(self.field_value) if field_type in self.NUMERIC_FIELD_TYPES else None
+        self.value_boolean = (
+            self.normalize_value(self.field_value).lower() in self.TRUE_VALUES if field_type == 'boolean' else None
+        )
+
+    @classmethod
+    def bulk_upsert(cls, values):
+        """
+        Insert or update (on product + category_field) in one statement. Like bulk_create this skips
+        save() and signals: category_field must be loaded, and callers refresh search/attributes.
+        """
+        for value in values:
+            value.set_typed_values(value.category_field.field_type)
+        return cls.objects.bulk_create(
+            values,
+            update_conflicts=True,
+            unique_fields=['product', 'category_field'],
+            update_fields=['field_value', 'value_number', 'value_boolean', 'updated_at'],
+        )
+
+    def save(self, *args, **kwargs):
+        self.set_typed_values()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'field_value' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'value_number', 'value_boolean'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.product.product_name} - {self.category_field.field_label}: {self.field_value}"
@@ -239,6 +335,8 @@ class Order(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_order'
         verbose_name = 'Order'
@@ -281,6 +379,8 @@ class CustomizeOrders(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_customizeorders'
         verbose_name = 'Customize Order'
@@ -321,6 +421,8 @@ class OrderItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_order_item'
         verbose_name = 'Order Item'
@@ -349,6 +451,8 @@ class AddToCart(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_addtocart'
         verbose_name = 'Cart Item'
@@ -395,6 +499,8 @@ class ProductLead(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_product_lead'
         verbose_name = 'Product Lead'
@@ -423,6 +529,8 @@ class Banners(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_banners'
         verbose_name = 'Banner'
@@ -450,6 +558,8 @@ class CMS(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_cms'
         verbose_name = 'CMS Page'
@@ -471,11 +581,16 @@ class NotificationType(models.Model):
     notif_id = models.AutoField(primary_key=True)
     notif_name = models.CharField(max_length=150)
     notif_status = models.BooleanField(default=True)
+    # Days read/soft-deleted notifications of this type stay in NotificationTable before
+    # archive_notifications moves them out; null uses NOTIFICATION_RETENTION_DAYS, 0 keeps them
+    notif_retention_days = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(null=True, blank=True)
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_notification_type'
         verbose_name = 'Notification Type'
@@ -508,11 +623,41 @@ class NotificationTable(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_notificationtable'
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-created_at']
+        indexes = [
+            # WebSocket replay: a user's notifications after the last id the app has seen
+            models.Index(fields=['notification_user', 'id'], name='notification_user_id_idx', condition=Q(is_delete=False)),
+            # Recounting a user's unread notifications (NotificationCounter)
+            models.Index(
+                fields=['notification_user'], name='notification_unread_idx',
+                condition=Q(notification_read=False, is_delete=False),
+            ),
+            # archive_notifications: the oldest archivable rows of a type
+            models.Index(
+                fields=['notification_type', 'created_at'], name='notification_retention_idx',
+                condition=Q(notification_read=True) | Q(is_delete=True),
+            ),
+        ]
+
+    # Fields behind the user's unread count (sonic_app.services.UnreadCounter)
+    UNREAD_STATE_FIELDS = ('notification_user_id', 'notification_read', 'is_delete')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.UNREAD_STATE_FIELDS) <= set(field_names):
+            # As loaded, so a save that leaves them alone does not recount (sonic_app.signals)
+            instance.loaded_unread_state = instance.unread_state()
+        return instance
+
+    def unread_state(self):
+        return tuple(getattr(self, name) for name in self.UNREAD_STATE_FIELDS)
 
     def soft_delete(self):
         """Soft delete the notification"""
@@ -524,6 +669,119 @@ class NotificationTable(models.Model):
         return f"{self.notification_title} - {self.notification_user.username}"
 
 
+class NextNotificationId(models.Func):
+    """The next value of NotificationTable's id sequence."""
+    template = "nextval(pg_get_serial_sequence('sonic_app_notificationtable', 'id'))"
+    output_field = models.BigIntegerField()
+
+
+class BroadcastNotification(models.Model):
+    """
+    A notification for every active user, stored once (NotificationService.send_notification_to_all).
+    Per-user state lives in BroadcastReceipt rows, created only when a user reads or deletes it.
+    """
+    # From NotificationTable's sequence: one id space for personal and broadcast notifications
+    # (mark read by id, WebSocket replay cursors)
+    id = models.BigIntegerField(primary_key=True, db_default=NextNotificationId())
+    broadcast_type = models.ForeignKey(
+        NotificationType,
+        on_delete=models.CASCADE,
+        related_name='broadcasts'
+    )
+    broadcast_title = models.CharField(max_length=255)
+    broadcast_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    is_delete = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = GenerationQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'sonic_app_broadcast_notification'
+        verbose_name = 'Broadcast Notification'
+        verbose_name_plural = 'Broadcast Notifications'
+        ordering = ['-created_at']
+
+    def soft_delete(self):
+        """Soft delete the broadcast for everyone"""
+        self.is_delete = True
+        self.deleted_at = timezone.now()
+        self.save()
+
+    def __str__(self):
+        return f"{self.broadcast_title} (broadcast)"
+
+
+class BroadcastReceipt(models.Model):
+    """One user's read / deleted state of a broadcast; no row means unread."""
+    receipt_broadcast = models.ForeignKey(BroadcastNotification, on_delete=models.CASCADE, related_name='receipts')
+    receipt_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts')
+    receipt_read = models.BooleanField(default=False)
+    is_delete = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = GenerationQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'sonic_app_broadcast_receipt'
+        verbose_name = 'Broadcast Receipt'
+        verbose_name_plural = 'Broadcast Receipts'
+        constraints = [
+            models.UniqueConstraint(fields=['receipt_user', 'receipt_broadcast'], name='broadcast_receipt_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt_user_id} - {self.receipt_broadcast_id}"
+
+
+class NotificationArchive(models.Model):
+    """Notifications moved out of NotificationTable by archive_notifications (same ids)."""
+    id = models.BigIntegerField(primary_key=True)
+    notification_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.ForeignKey(
+        NotificationType,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    notification_title = models.CharField(max_length=255)
+    notification_message = models.TextField(null=True, blank=True)
+    notification_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    is_delete = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'sonic_app_notification_archive'
+        verbose_name = 'Archived Notification'
+        verbose_name_plural = 'Archived Notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['notification_user', 'created_at'], name='notification_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_title} - {self.notification_user_id} (archived)"
+
+
+class NotificationCounter(models.Model):
+    """Unread personal notification count per user for the app badge, kept by sonic_app.services.UnreadCounter."""
+    counter_user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sonic_app_notificationcounter'
+        verbose_name = 'Notification Counter'
+        verbose_name_plural = 'Notification Counters'
+
+    def __str__(self):
+        return f"{self.counter_user_id}: {self.unread_count} unread"
+
+
 class OrderEmails(models.Model):
     """Order-related email records model"""
     mail_id = models.AutoField(primary_key=True)
@@ -538,6 +796,8 @@ class OrderEmails(models.Model):
     is_delete = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_orderemails'
         verbose_name = 'Order Email'
@@ -568,11 +828,17 @@ class Session(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     expire_date = models.DateTimeField()
 
+    objects = GenerationQuerySet.as_manager()
+
     class Meta:
         db_table = 'sonic_app_session'
         verbose_name = 'Session'
         verbose_name_plural = 'Sessions'
         ordering = ['-created_at']
+        indexes = [
+            # Push tokens of live sessions (sonic_app.push.live_token_chunks)
+            models.Index(fields=['expire_date'], name='session_push_idx', condition=Q(fcm_token__isnull=False)),
+        ]
 
     def __str__(self):
         return f"Session {self.session_key} - {self.session_user.username}"
@@ -619,3 +885,25 @@ class StoredFile(models.Model):
         verbose_name = 'Stored File'
         verbose_name_plural = 'Stored Files'
 
+
+
+class CatalogChange(models.Model):
+    """Append-only log of catalogue writes; the newest id is the catalogue version (see sonic_app.catalog)."""
+    KIND_CHOICES = [
+        ('category', 'Category'),
+        ('product', 'Product'),
+        ('banner', 'Banner'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sonic_app_catalog_change'
+        verbose_name = 'Catalog Change'
+        verbose_name_plural = 'Catalog Changes'
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id}"
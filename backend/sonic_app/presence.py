@@ -0,0 +1,74 @@
+"""
+Which users have a notification socket open.
+
+NotificationConsumer records each open socket, by channel name, in the default cache (shared by
+all workers when it is Redis): one entry per user mapping their sockets' channel names to the
+time each stops counting. NotificationService sends channel-layer messages only to users who are
+online and pushes to the phones of everyone else; their notifications wait for the replay on
+reconnect.
+
+Every frame a socket receives refreshes its expiry (heartbeat()). A socket is closed after
+WEBSOCKET_IDLE_TIMEOUT seconds without one, so presence_timeout() outlasts that: a user counts as
+online for as long as any of their sockets can be open, and an entry left behind by a worker
+that died lapses on its own. With the idle timeout off the consumer refreshes its entry itself.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seconds an entry outlives the socket's idle timeout; a busy socket rewrites it every half of that
+PRESENCE_GRACE = 30
+# Entry lifetime with WEBSOCKET_IDLE_TIMEOUT = 0 (sockets are never closed for silence)
+PRESENCE_FLOOR = 300
+
+
+def presence_timeout():
+    """Seconds a socket's entry lasts after its last refresh."""
+    idle = settings.WEBSOCKET_IDLE_TIMEOUT
+    return idle + PRESENCE_GRACE if idle else PRESENCE_FLOOR
+
+
+def _presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def _live(sockets, now):
+    return {channel_name: expires for channel_name, expires in (sockets or {}).items() if expires > now}
+
+
+def _update(user_id, channel_name, expires=None):
+    """
+    Set (or, without expires, drop) one socket's entry. Two sockets of a user written at the
+    same moment may lose one update; the next heartbeat puts it back and a dropped socket lapses.
+    """
+    key, now = _presence_key(user_id), time.time()
+    sockets = _live(cache.get(key), now)
+    if expires is None:
+        sockets.pop(channel_name, None)
+    else:
+        sockets[channel_name] = expires
+    if sockets:
+        cache.set(key, sockets, math.ceil(max(sockets.values()) - now))
+    else:
+        cache.delete(key)
+
+
+def heartbeat(user_id, channel_name):
+    """Keep this socket counted for another presence_timeout() seconds (on open and on each frame)."""
+    _update(user_id, channel_name, time.time() + presence_timeout())
+
+
+socket_opened = heartbeat
+
+
+def socket_closed(user_id, channel_name):
+    _update(user_id, channel_name)
+
+
+def online_user_ids(user_ids):
+    """The ids among user_ids with at least one open socket (one cache round trip)."""
+    keys = {_presence_key(user_id): user_id for user_id in user_ids}
+    now = time.time()
+    return {keys[key] for key, sockets in cache.get_many(keys).items() if _live(sockets, now)}
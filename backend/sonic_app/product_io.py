@@ -0,0 +1,449 @@
+"""
+Bulk product import/export (CSV or XLSX).
+
+File layout: one row per product variant. Product columns repeat on every variant row, and a
+product without variants is a single row with empty variant columns. Category field values use
+attr.<field_name> columns (the same names as the attr.* list filters), so an exported file can be
+edited and imported back as-is:
+
+  product_id, product_name, category, product_description, product_price, product_weight,
+  product_status, variant_value_1, variant_value_2, variant_price, attr.purity, attr.stone_type, ...
+
+Rows with a product_id update that product; rows without one update the product with the same
+name in the same category, or create it. Import streams the file and works in chunks of
+IMPORT_CHUNK_SIZE products: categories and fields come from maps loaded once, each chunk is
+validated and then written with bulk_create/bulk_update in one transaction. A product with an
+invalid row is skipped as a whole and every problem is reported with its row number; the rest of
+the file still imports. Existing variants and field values missing from the file are kept.
+"""
+import csv
+import io
+from itertools import islice
+from decimal import Decimal, InvalidOperation
+from zipfile import BadZipFile
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from .catalog import KIND_PRODUCT, record_catalog_changes
+from .facets import ATTR_PREFIX, update_product_attributes
+from .models import Category, CategoryField, Product, ProductFieldValue, ProductVariant
+from .search import update_product_search_vectors
+
+PRODUCT_COLUMNS = [
+    'product_id', 'product_name', 'category', 'product_description',
+    'product_price', 'product_weight', 'product_status',
+]
+VARIANT_COLUMNS = ['variant_value_1', 'variant_value_2', 'variant_price']
+FILE_FORMATS = ('csv', 'xlsx')
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 1000
+MAX_ID = 2 ** 63 - 1
+TRUE_VALUES = ('true', '1', 'yes', 'active')
+FALSE_VALUES = ('false', '0', 'no', 'inactive')
+
+
+class ProductFileError(ValueError):
+    """The uploaded file cannot be read as a product sheet at all (as opposed to per-row errors)."""
+
+
+def detect_file_format(filename):
+    """'xlsx' or 'csv' from the file name, None when unknown."""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FILE_FORMATS else None
+
+
+def _xlsx_rows(uploaded_file):
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except (BadZipFile, KeyError, OSError) as exc:
+        raise ProductFileError(f'Not a valid XLSX file: {exc}')
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _cell_text(cell):
+    if isinstance(cell, float) and cell.is_integer():
+        # XLSX number cells come back as floats: 12.0 is the id (or size) 12
+        return str(int(cell))
+    return '' if cell is None else str(cell).strip()
+
+
+def read_rows(uploaded_file, file_format):
+    """Yield (row_number, {column: text}) from a CSV or XLSX upload, one row at a time."""
+    if file_format == 'xlsx':
+        rows = _xlsx_rows(uploaded_file)
+    else:
+        rows = csv.reader(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline=''))
+    header = None
+    try:
+        for number, row in enumerate(rows, start=1):
+            cells = [_cell_text(cell) for cell in row]
+            if header is None:
+                header = cells
+                if 'product_name' not in header and 'product_id' not in header:
+                    raise ProductFileError('Header row must contain product_name or product_id.')
+                continue
+            if any(cells):
+                yield number, dict(zip(header, cells))
+    except UnicodeDecodeError:
+        raise ProductFileError('CSV files must be UTF-8 encoded.')
+    if header is None:
+        raise ProductFileError('The file is empty.')
+
+
+def _id(value):
+    """An id column as an int ("12", or "12.0" from a spreadsheet), None when it is not a valid id."""
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not number.is_finite() or number != number.to_integral_value() or not 0 < number <= MAX_ID:
+        return None
+    return int(number)
+
+
+def _decimal(value, label, errors, field):
+    """value as a Decimal that fits the model DecimalField field; None when blank or invalid (errors recorded)."""
+    if value == '':
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        errors.append(f'{label} must be a number.')
+        return None
+    try:
+        field.run_validators(number)
+    except ValidationError as exc:
+        errors.extend(f'{label}: {message}' for message in exc.messages)
+        return None
+    return number
+
+
+def _check_length(model, column, value, errors):
+    max_length = model._meta.get_field(column).max_length
+    if value and len(value) > max_length:
+        errors.append(f'{column} must be at most {max_length} characters.')
+
+
+class ProductImporter:
+    """Streams rows into products, variants and field values. Use import_products() for one-off calls."""
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.categories_by_id = {}
+        self.categories_by_name = {}
+        for category in Category.objects.filter(is_delete=False):
+            self.categories_by_id[category.id] = category
+            self.categories_by_name.setdefault(category.category_name.strip().lower(), []).append(category)
+        self.fields = {}
+        for field in CategoryField.objects.filter(is_delete=False, is_variant_dimension=False):
+            self.fields.setdefault(field.category_id, {})[field.field_name] = field
+        self.rows = 0
+        self.products_created = 0
+        self.products_updated = 0
+        self.variants_created = 0
+        self.variants_updated = 0
+        self.field_values = 0
+        self.errors = []
+
+    def run(self, rows):
+        chunk = {}
+        for number, row in rows:
+            self.rows += 1
+            key = self._product_key(row)
+            if key not in chunk and len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = {}
+            chunk.setdefault(key, []).append((number, row))
+        if chunk:
+            self._import_chunk(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'products_created': self.products_created,
+            'products_updated': self.products_updated,
+            'variants_created': self.variants_created,
+            'variants_updated': self.variants_updated,
+            'field_values': self.field_values,
+            'errors': self.errors,
+        }
+
+    @staticmethod
+    def _product_key(row):
+        if row.get('product_id'):
+            product_id = _id(row['product_id'])
+            return ('id', row['product_id'] if product_id is None else str(product_id))
+        return ('name', row.get('category', '').lower(), row.get('product_name', ''))
+
+    def _resolve_category(self, value, errors):
+        if _id(value) in self.categories_by_id:
+            return self.categories_by_id[_id(value)]
+        matches = self.categories_by_name.get(value.lower(), [])
+        if len(matches) == 1:
+            return matches[0]
+        if not value:
+            errors.append('category is required.')
+        elif matches:
+            errors.append(f'Category "{value}" is ambiguous; use its id.')
+        else:
+            errors.append(f'Unknown category "{value}".')
+        return None
+
+    def _existing_products(self, chunk):
+        """Products referenced by the chunk, by id and by (category_id, name): two queries."""
+        ids = {_id(key[1]) for key in chunk if key[0] == 'id'} - {None}
+        by_id = Product.objects.filter(is_delete=False).in_bulk(ids) if ids else {}
+        names = {key[2] for key in chunk if key[0] == 'name' and key[2]}
+        by_name = {}
+        if names:
+            for product in Product.objects.filter(
+                is_delete=False, product_parent_id__isnull=True, product_name__in=names
+            ).order_by('id'):
+                by_name.setdefault((product.product_category_id, product.product_name), product)
+        return by_id, by_name
+
+    def _parse(self, rows, by_id, by_name):
+        """Validate one product's rows; returns None (errors recorded) if any row is invalid."""
+        number, first = rows[0]
+        errors = []
+        product = category = None
+        if first.get('product_id'):
+            product_id = first['product_id']
+            product = by_id.get(_id(product_id))
+            if product is None:
+                errors.append(f'Product {product_id} does not exist.')
+            elif not first.get('category'):
+                # Updates may leave the category column out or blank
+                category = self.categories_by_id.get(product.product_category_id)
+        if category is None and (product is None or first.get('category')):
+            category = self._resolve_category(first.get('category', ''), errors)
+        if product is None and category is not None and not first.get('product_id'):
+            product = by_name.get((category.id, first.get('product_name', '')))
+        if product is None:
+            product = Product(product_is_parent=False)
+
+        values = {}
+        if 'product_name' in first:
+            values['product_name'] = first['product_name']
+            if not first['product_name']:
+                errors.append('product_name is required.')
+            _check_length(Product, 'product_name', first['product_name'], errors)
+        if 'product_description' in first:
+            values['product_description'] = first['product_description'] or None
+        for column in ('product_price', 'product_weight'):
+            if column in first:
+                values[column] = _decimal(first[column], column, errors, Product._meta.get_field(column))
+        if 'product_status' in first:
+            status = first['product_status'].lower()
+            if status and status not in TRUE_VALUES + FALSE_VALUES:
+                errors.append('product_status must be true or false.')
+            values['product_status'] = status not in FALSE_VALUES
+        if category is not None:
+            values['product_category'] = category
+        if product.pk is None and not values.get('product_weight'):
+            errors.append('product_weight is required for new products.')
+
+        variants = {}
+        field_values = {}
+        fields = self.fields.get(category.id, {}) if category is not None else {}
+        problems = [(number, message) for message in errors]
+        for row_number, row in rows:
+            row_errors = []
+            if row.get('variant_value_1'):
+                key = (row['variant_value_1'], row.get('variant_value_2') or None)
+                for column in ('variant_value_1', 'variant_value_2'):
+                    _check_length(ProductVariant, column, row.get(column), row_errors)
+                price = _decimal(
+                    row.get('variant_price', ''), 'variant_price', row_errors, ProductVariant._meta.get_field('price')
+                )
+                variants[key] = (price, 'variant_price' in row)
+            elif row.get('variant_value_2'):
+                row_errors.append('variant_value_2 needs variant_value_1.')
+            for column, value in row.items():
+                if not column.startswith(ATTR_PREFIX) or value == '':
+                    continue
+                name = column[len(ATTR_PREFIX):]
+                field = fields.get(name)
+                if field is None:
+                    row_errors.append(f'{name} is not a field of this category.')
+                elif (
+                    field.field_type in ProductFieldValue.NUMERIC_FIELD_TYPES
+                    and ProductFieldValue.parse_number(value) is None
+                ):
+                    row_errors.append(f'{name} must be a number.')
+                else:
+                    field_values[field] = value
+            problems.extend((row_number, message) for message in row_errors)
+
+        if problems:
+            self.errors.extend({'row': row_number, 'error': message} for row_number, message in problems)
+            return None
+        return {'product': product, 'values': values, 'variants': variants, 'field_values': field_values}
+
+    def _import_chunk(self, chunk):
+        by_id, by_name = self._existing_products(chunk)
+        specs = [spec for spec in (self._parse(rows, by_id, by_name) for rows in chunk.values()) if spec]
+        if not specs:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            created, updated, update_fields = [], {}, {'updated_at'}
+            for spec in specs:
+                product = spec['product']
+                for name, value in spec['values'].items():
+                    setattr(product, name, value)
+                if product.pk is None:
+                    created.append(product)
+                else:
+                    product.updated_at = now
+                    update_fields.update(spec['values'])
+                    updated[product.pk] = product
+            Product.objects.bulk_create(created)
+            if updated:
+                Product.objects.bulk_update(list(updated.values()), sorted(update_fields))
+            self.products_created += len(created)
+            self.products_updated += len(updated)
+            product_ids = [spec['product'].pk for spec in specs]
+            self._save_variants(specs, product_ids, now)
+            self._save_field_values(specs)
+            # Bulk writes skip the signal handlers that maintain these
+            update_product_search_vectors(product_ids)
+            update_product_attributes(product_ids)
+            record_catalog_changes(KIND_PRODUCT, product_ids)
+
+    def _save_variants(self, specs, product_ids, now):
+        existing, next_order = {}, {}
+        for variant in ProductVariant.objects.filter(product_id__in=product_ids):
+            existing[(variant.product_id, variant.variant_value_1, variant.variant_value_2)] = variant
+            next_order[variant.product_id] = max(next_order.get(variant.product_id, 0), variant.display_order + 1)
+        created, updated = [], []
+        for spec in specs:
+            product = spec['product']
+            for (value_1, value_2), (price, has_price) in spec['variants'].items():
+                variant = existing.get((product.pk, value_1, value_2))
+                if variant is None:
+                    order = next_order.get(product.pk, 0)
+                    next_order[product.pk] = order + 1
+                    created.append(ProductVariant(
+                        product=product, variant_value_1=value_1, variant_value_2=value_2,
+                        price=price, display_order=order,
+                    ))
+                elif has_price and variant.price != price:
+                    variant.price = price
+                    variant.updated_at = now
+                    updated.append(variant)
+        ProductVariant.objects.bulk_create(created)
+        ProductVariant.objects.bulk_update(updated, ['price', 'updated_at'])
+        self.variants_created += len(created)
+        self.variants_updated += len(updated)
+
+    def _save_field_values(self, specs):
+        values = [
+            ProductFieldValue(product=spec['product'], category_field=field, field_value=raw)
+            for spec in specs
+            for field, raw in spec['field_values'].items()
+        ]
+        ProductFieldValue.bulk_upsert(values)
+        self.field_values += len(values)
+
+
+def import_products(uploaded_file, file_format, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import a CSV/XLSX upload; returns the summary dict with per-row errors."""
+    return ProductImporter(chunk_size).run(read_rows(uploaded_file, file_format))
+
+
+def export_field_names():
+    return list(
+        CategoryField.objects.filter(is_delete=False, is_variant_dimension=False)
+        .order_by('field_name').values_list('field_name', flat=True).distinct()
+    )
+
+
+def iter_export_rows(queryset):
+    """Yield the header, then one list per variant (or per product without variants), streaming from the DB."""
+    field_names = export_field_names()
+    yield PRODUCT_COLUMNS + VARIANT_COLUMNS + [ATTR_PREFIX + name for name in field_names]
+    products = queryset.select_related('product_category').prefetch_related(
+        Prefetch('variants', queryset=ProductVariant.objects.order_by('display_order', 'id')),
+        Prefetch(
+            'field_values',
+            queryset=ProductFieldValue.objects.filter(
+                category_field__is_delete=False, category_field__is_variant_dimension=False
+            ).select_related('category_field'),
+        ),
+    ).order_by('id')
+    for product in products.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        base = [
+            product.id,
+            product.product_name,
+            product.product_category.category_name if product.product_category else '',
+            product.product_description or '',
+            product.product_price,
+            product.product_weight,
+            'true' if product.product_status else 'false',
+        ]
+        attributes = {value.category_field.field_name: value.field_value for value in product.field_values.all()}
+        attribute_cells = [attributes.get(name, '') for name in field_names]
+        variants = list(product.variants.all())
+        if not variants:
+            yield base + ['', '', ''] + attribute_cells
+        for variant in variants:
+            yield base + [variant.variant_value_1, variant.variant_value_2 or '', variant.price] + attribute_cells
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv_export(queryset):
+    writer = csv.writer(_Echo())
+    for row in iter_export_rows(queryset):
+        yield writer.writerow(['' if cell is None else cell for cell in row])
+
+
+async def aiter_csv_export(queryset):
+    """
+    Async wrapper for StreamingHttpResponse under ASGI (Daphne), which would otherwise read a sync
+    iterator into a list before sending. Rows are produced in batches on the sync thread that owns
+    the DB connection (the export uses a server-side cursor).
+    """
+    lines = iter_csv_export(queryset)
+    next_batch = sync_to_async(lambda: ''.join(islice(lines, EXPORT_CHUNK_SIZE)))
+    while batch := await next_batch():
+        yield batch
+
+
+async def aiter_file(fileobj, block_size=64 * 1024):
+    """Stream a (temporary) file under ASGI and close it afterwards."""
+    read = sync_to_async(fileobj.read, thread_sensitive=False)
+    try:
+        while block := await read(block_size):
+            yield block
+    finally:
+        fileobj.close()
+
+
+def write_xlsx_export(queryset, fileobj):
+    """
+    Write the export to fileobj with a write-only workbook (rows are flushed to disk, not kept in
+    memory). Unlike the CSV export this is buffered: the zip is only readable once complete.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Products')
+    for row in iter_export_rows(queryset):
+        sheet.append([float(cell) if isinstance(cell, Decimal) else cell for cell in row])
+    workbook.save(fileobj)
@@ -0,0 +1,214 @@
+"""
+Push notifications to the phones of users without an open notification socket.
+
+Tokens come from Session.fcm_token (kept by SessionViewSet.update_fcm_token): the live tokens of
+the recipients are read TOKEN_CHUNK_SIZE at a time, so a broadcast never holds every user's
+tokens at once. Each chunk is split into multicast batches of the transport's max_batch_size and
+sent PUSH_CONCURRENCY batches at a time. Tokens the provider reports as unregistered or invalid
+are cleared from their sessions. With PUSH_IN_BACKGROUND the whole send runs on a small
+process-wide executor that is drained before the process exits.
+
+The transport is PUSH_TRANSPORT, a dotted path (empty turns push off):
+
+- sonic_app.push.FCMPushTransport: Firebase Cloud Messaging via firebase-admin (the optional
+  "push" extra), with the service account file FCM_CREDENTIALS_FILE
+- sonic_app.push.LocalPushTransport: keeps messages in memory (tests, development)
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Session
+from .presence import online_user_ids
+
+logger = logging.getLogger(__name__)
+
+# Per-token result meaning "drop this token"; None is success, any other string a transient error
+INVALID_TOKEN = 'invalid-token'
+
+# Sessions read per query, checked against presence and sent before the next chunk is read
+TOKEN_CHUNK_SIZE = 5000
+# Sends running at once on the background executor (each one uses up to PUSH_CONCURRENCY threads)
+BACKGROUND_SENDS = 2
+
+_transports = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class LocalPushTransport:
+    """Records messages instead of sending them; tokens in invalid_tokens are reported as invalid."""
+
+    max_batch_size = 500
+    sent = []
+    invalid_tokens = set()
+
+    def send(self, tokens, title, body, data):
+        LocalPushTransport.sent.append({'tokens': list(tokens), 'title': title, 'body': body, 'data': data})
+        return [INVALID_TOKEN if token in self.invalid_tokens else None for token in tokens]
+
+
+class FCMPushTransport:
+    """
+    Firebase Cloud Messaging multicast (at most 500 tokens per call).
+
+    firebase-admin is imported here rather than at module level: it is an optional extra, and its
+    gRPC stack must not be loaded in the preloaded gunicorn master, which is not fork-safe. The
+    transport is built lazily by get_transport(), so only worker processes that push import it.
+    """
+
+    max_batch_size = 500
+
+    def __init__(self):
+        try:
+            import firebase_admin
+            from firebase_admin import credentials, exceptions, messaging
+        except ImportError:
+            raise ImproperlyConfigured('FCMPushTransport needs firebase-admin: pip install "sonic-backend[push]"')
+        if not settings.FCM_CREDENTIALS_FILE:
+            raise ImproperlyConfigured('FCMPushTransport needs FCM_CREDENTIALS_FILE')
+        self.messaging = messaging
+        self.invalid_errors = (
+            messaging.UnregisteredError, messaging.SenderIdMismatchError, exceptions.InvalidArgumentError,
+        )
+        self.app = firebase_admin.initialize_app(
+            credentials.Certificate(settings.FCM_CREDENTIALS_FILE), name='sonic-push'
+        )
+
+    def send(self, tokens, title, body, data):
+        messaging = self.messaging
+        response = messaging.send_each_for_multicast(
+            messaging.MulticastMessage(
+                tokens=list(tokens),
+                notification=messaging.Notification(title=title, body=body),
+                data=data,
+            ),
+            app=self.app,
+        )
+        return [None if result.success else self._error(result.exception) for result in response.responses]
+
+    def _error(self, exception):
+        if isinstance(exception, self.invalid_errors):
+            return INVALID_TOKEN
+        return str(exception)
+
+
+def get_transport():
+    """The PUSH_TRANSPORT instance (one per process), or None when push is off."""
+    path = settings.PUSH_TRANSPORT
+    if not path:
+        return None
+    if path not in _transports:
+        _transports[path] = import_string(path)()
+    return _transports[path]
+
+
+def live_token_chunks(user_ids=None, exclude_ids=(), chunk_size=None):
+    """
+    Lists of (user id, FCM token) of the unexpired sessions of user_ids (None: every active user),
+    about chunk_size (default TOKEN_CHUNK_SIZE) at a time, ordered by token. A token is never
+    split across two chunks, so each one is pushed to once.
+    """
+    chunk_size = chunk_size or TOKEN_CHUNK_SIZE
+    sessions = Session.objects.filter(
+        expire_date__gt=timezone.now(),
+        fcm_token__isnull=False,
+        session_user__is_active=True,
+        session_user__is_delete=False
+    ).exclude(fcm_token='')
+    if user_ids is not None:
+        sessions = sessions.filter(session_user_id__in=user_ids)
+    if exclude_ids:
+        sessions = sessions.exclude(session_user_id__in=exclude_ids)
+    pairs = sessions.values_list('session_user_id', 'fcm_token').distinct().order_by('fcm_token', 'session_user_id')
+    chunk = []
+    for user_id, token in pairs.iterator(chunk_size=chunk_size):
+        if len(chunk) >= chunk_size and chunk[-1][1] != token:
+            yield chunk
+            chunk = []
+        chunk.append((user_id, token))
+    if chunk:
+        yield chunk
+
+
+def _send_batch(transport, batch, title, body, data):
+    try:
+        return transport.send(batch, title, body, data)
+    except Exception as e:
+        logger.exception('Push batch of %s tokens failed: %s', len(batch), e)
+        return [str(e)] * len(batch)
+
+
+def send_push(tokens, title, body, data=None):
+    """
+    Send to tokens in concurrent multicast batches and clear the tokens reported invalid.
+
+    Returns:
+        dict: {'tokens': int, 'sent': int, 'failed': int, 'pruned': int}
+    """
+    transport = get_transport()
+    if transport is None or not tokens:
+        return {'tokens': len(tokens), 'sent': 0, 'failed': 0, 'pruned': 0}
+    # FCM data payloads are string to string
+    data = {key: str(value) for key, value in (data or {}).items()}
+    size = transport.max_batch_size
+    batches = [tokens[i:i + size] for i in range(0, len(tokens), size)]
+    with ThreadPoolExecutor(max_workers=min(settings.PUSH_CONCURRENCY, len(batches))) as pool:
+        results = list(pool.map(lambda batch: _send_batch(transport, batch, title, body, data), batches))
+    errors = [(token, error) for batch, batch_errors in zip(batches, results) for token, error in zip(batch, batch_errors)]
+    invalid = [token for token, error in errors if error == INVALID_TOKEN]
+    if invalid:
+        Session.objects.filter(fcm_token__in=invalid).touch_update(fcm_token=None)
+    failed = sum(1 for _, error in errors if error is not None)
+    return {'tokens': len(tokens), 'sent': len(tokens) - failed, 'failed': failed - len(invalid), 'pruned': len(invalid)}
+
+
+def _push_offline(title, body, data, user_ids, exclude_ids):
+    """Push chunk by chunk to the tokens of the users with no socket open; returns how many tokens."""
+    pushed = 0
+    for pairs in live_token_chunks(user_ids, exclude_ids):
+        online = online_user_ids({user_id for user_id, _ in pairs})
+        tokens = sorted({token for user_id, token in pairs if user_id not in online})
+        send_push(tokens, title, body, data)
+        pushed += len(tokens)
+    return pushed
+
+
+def _push_in_background(*args):
+    try:
+        return _push_offline(*args)
+    except Exception as e:
+        logger.exception('Background push failed: %s', e)
+    finally:
+        connection.close()
+
+
+def background_executor():
+    """The process's push executor, created on first use and drained (not abandoned) at exit."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BACKGROUND_SENDS, thread_name_prefix='push')
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def push_to_offline_users(title, body, data=None, user_ids=None, exclude_ids=()):
+    """
+    Push to the phones of the users (None: every active user, less exclude_ids) that have no
+    notification socket open. Returns the number of tokens pushed to or, with PUSH_IN_BACKGROUND,
+    the Future of the send queued on background_executor().
+    """
+    if get_transport() is None:
+        return 0
+    args = (title, body, data, user_ids, tuple(exclude_ids))
+    if settings.PUSH_IN_BACKGROUND:
+        return background_executor().submit(_push_in_background, *args)
+    return _push_offline(*args)
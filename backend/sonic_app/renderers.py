@@ -0,0 +1,38 @@
+"""
+JSON renderer backed by orjson, selectable with the JSON_RENDERER setting.
+
+It writes the same bytes as rest_framework.renderers.JSONRenderer (compact separators, UTF-8,
+\\u2028/\\u2029 escaped, dates and decimals through DRF's encoder) several times faster. Anything
+orjson refuses (ints over 64 bits, nesting past 254 levels) and indented output go through the
+stock renderer. orjson is a dependency; settings refuses JSON_RENDERER=FastJSONRenderer without
+it. Known differences: floats in exponent form (1e16 vs 1e+16) and NaN/Infinity, which orjson
+writes as null where DRF raises.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # declared in pyproject; only so the module still imports where it is missing
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer that encodes with orjson when it is installed."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                # datetimes/dataclasses go through DRF's encoder so they format exactly as before
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
@@ -0,0 +1,229 @@
+"""
+Server-side cache for public GET responses that are the same for every user
+(categories/active, banners/active, cms/active, cms/<slug>, the first product list pages).
+
+Rendered responses are stored in the default cache (Redis when REDIS_URL is set, else local
+memory) under a key made of the URL, the sorted query params and one generation counter per
+model the response is built from. Any write to such a model bumps its counter, so old entries
+are simply never read again and expire on their own:
+
+- save()/delete() through the post_save/post_delete handlers in sonic_app.signals
+  (every model a ModelViewSet serves; for User also update_fields saves such as
+  update_last_login, which do not stamp updated_at)
+- QuerySet.update()/bulk_create()/bulk_update() through GenerationQuerySet (no signals there)
+
+Counters are bumped right away and again on commit, so a request that read the old rows while
+the write was in flight cannot leave them cached under the new generation.
+"""
+import functools
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import models, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.response import Response
+
+STATS_KEYS = {'hits': 'response-cache:hits', 'misses': 'response-cache:misses'}
+
+
+def _generation_key(model):
+    return f'response-cache:generation:{model._meta.label_lower}'
+
+
+def _clock():
+    # Counters (re)start from the clock, so one lost to eviction comes back above any value it had
+    return int(time.time() * 1000)
+
+
+def _incr(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, initial, None)
+        return initial
+
+
+async def _aincr(key, initial):
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, initial, None)
+        return initial
+
+
+def bump_generation(model):
+    """Invalidate every cached response built from this model."""
+    key = _generation_key(model)
+    _incr(key, _clock())
+    transaction.on_commit(lambda: _incr(key, _clock()))
+
+
+class GenerationQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk writes (which send no model signals) bump the response-cache generation.
+    touch_update() is update() that also stamps updated_at like save() does; use it for edits, so
+    updated_at stays usable as a Last-Modified date, and plain update() for derived columns.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_generation(self.model)
+        return rows
+
+    def touch_update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        return self.update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            bump_generation(self.model)
+        return created
+
+    def bulk_update(self, objs, *args, **kwargs):
+        rows = super().bulk_update(objs, *args, **kwargs)
+        if rows:
+            bump_generation(self.model)
+        return rows
+
+
+class CountingLocMemCache(LocMemCache):
+    """Local-memory cache that counts entries culled to stay under MAX_ENTRIES (per process)."""
+
+    evictions = 0
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        CountingLocMemCache.evictions += before - len(self._cache)
+
+
+def generation_token(models_used):
+    """'<gen>.<gen>...' for the models; changes whenever any of them is written."""
+    generation_keys = [_generation_key(model) for model in models_used]
+    generations = cache.get_many(generation_keys)
+    for key in generation_keys:
+        if key not in generations:
+            cache.add(key, _clock(), None)
+            generations[key] = cache.get(key)
+    return '.'.join(str(generations[key]) for key in generation_keys)
+
+
+async def ageneration_token(models_used):
+    """generation_token() through the async cache API."""
+    generation_keys = [_generation_key(model) for model in models_used]
+    generations = await cache.aget_many(generation_keys)
+    for key in generation_keys:
+        if key not in generations:
+            await cache.aadd(key, _clock(), None)
+            generations[key] = await cache.aget(key)
+    return '.'.join(str(generations[key]) for key in generation_keys)
+
+
+def _response_key(request, generations):
+    query = urlencode(sorted((name, value) for name, values in request.GET.lists() for value in values))
+    parts = [request.accepted_media_type, request.build_absolute_uri(request.path), query, generations]
+    return 'response-cache:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _hit(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def _cacheable(view, request, response):
+    """Render a 200 DRF Response for storing; None for anything else."""
+    if not isinstance(response, Response) or response.status_code != 200:
+        return None
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    response.render()
+    return (response.content, response['Content-Type'])
+
+
+def cache_response(*models_used, condition=None):
+    """
+    Cache a viewset handler's 200 responses until one of models_used changes (or
+    RESPONSE_CACHE_TIMEOUT passes). condition(request) can exclude requests, e.g. deep pages.
+    Apply below @action; async handlers (sonic_app.async_views) use the async cache API.
+    Responses carry X-Cache: HIT or MISS.
+    """
+    def skip(request):
+        return (
+            not settings.RESPONSE_CACHE_TIMEOUT or request.method != 'GET' or bool(condition and not condition(request))
+        )
+
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def awrapped(view, request, *args, **kwargs):
+                if skip(request):
+                    return await handler(view, request, *args, **kwargs)
+                key = _response_key(request, await ageneration_token(models_used))
+                cached = await cache.aget(key)
+                if cached is not None:
+                    await _aincr(STATS_KEYS['hits'], 1)
+                    return _hit(cached)
+                await _aincr(STATS_KEYS['misses'], 1)
+                response = await handler(view, request, *args, **kwargs)
+                entry = _cacheable(view, request, response)
+                if entry is not None:
+                    await cache.aset(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+                response['X-Cache'] = 'MISS'
+                return response
+            return awrapped
+
+        @functools.wraps(handler)
+        def wrapped(view, request, *args, **kwargs):
+            if skip(request):
+                return handler(view, request, *args, **kwargs)
+            # Key (with the generations) before the rows are read, so a concurrent write is never cached as new
+            key = _response_key(request, generation_token(models_used))
+            cached = cache.get(key)
+            if cached is not None:
+                _incr(STATS_KEYS['hits'], 1)
+                return _hit(cached)
+            _incr(STATS_KEYS['misses'], 1)
+            response = handler(view, request, *args, **kwargs)
+            entry = _cacheable(view, request, response)
+            if entry is not None:
+                cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapped
+    return decorator
+
+
+def _backend_evictions():
+    backend = caches['default']
+    if isinstance(backend, CountingLocMemCache):
+        return CountingLocMemCache.evictions
+    if isinstance(backend, RedisCache):
+        # Keys Redis dropped under maxmemory (server-wide)
+        return backend._cache.get_client().info('stats').get('evicted_keys')
+    return None
+
+
+def response_cache_stats():
+    """Hit/miss counters (shared when the cache is Redis) and backend evictions."""
+    counts = cache.get_many(STATS_KEYS.values())
+    hits, misses = counts.get(STATS_KEYS['hits'], 0), counts.get(STATS_KEYS['misses'], 0)
+    return {
+        'backend': settings.CACHES['default']['BACKEND'],
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+        'evictions': _backend_evictions(),
+    }
@@ -0,0 +1,118 @@
+"""
+Fast path for the hot list endpoints (products, orders, cart, notifications), on with FAST_LIST_ROWS.
+
+Instead of loading model instances and running every serializer field per row, the page is read
+with .values_list() and each tuple goes through a row-to-dict function generated once per
+serializer class and set of requested fields. The dicts are the serializer's output, key for key
+(tests/test_fast_rows.py compares the rendered bytes):
+
+- columns and FK ids are copied as they are; decimals, dates, choices and JSON go through the
+  serializer field's own to_representation
+- files/images become absolute media URLs (sonic_app.media), like MediaURLField
+- a dotted source through a null FK leaves the key out, like DRF does
+- a SerializerMethodField compiles only when Meta.row_annotations gives the equivalent annotation
+
+Nested serializers do not compile, so a request that includes one (the default product list)
+takes the serializer path; ?fields= / ?expand= pick the flat fields a grid actually needs.
+"""
+from django.conf import settings
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+
+from .media import media_base_url, media_url
+
+# Fields whose to_representation returns a database value unchanged
+IDENTITY_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.IntegerField, relations.PrimaryKeyRelatedField,
+)
+
+_builders = {}
+
+
+def _model_field(model, attrs):
+    for attr in attrs[:-1]:
+        model = model._meta.get_field(attr).related_model
+    return model._meta.get_field(attrs[-1])
+
+
+def _compile(serializer_class, names):
+    fields = serializer_class(context={}).fields
+    model = serializer_class.Meta.model
+    annotations = getattr(serializer_class.Meta, 'row_annotations', {})
+    columns, used_annotations, namespace = [], {}, {'media_url': media_url}
+    lines = ['def build(row, media_base):', '    d = {}']
+    for name in names:
+        field = fields[name]
+        index = len(columns)
+        value = f'row[{index}]'
+        guards = []
+        if name in annotations:
+            used_annotations[name] = annotations[name]
+            columns.append(name)
+            expression = value
+        elif (
+            isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer, relations.ManyRelatedField))
+            or field.source == '*'
+        ):
+            return None
+        else:
+            attrs = field.source_attrs
+            columns.append('__'.join(attrs))
+            if isinstance(field, serializers.FileField):
+                namespace[f'storage_{index}'] = _model_field(model, attrs).storage
+                expression = f'media_url({value}, media_base, storage_{index}) if {value} else None'
+            elif isinstance(field, IDENTITY_FIELDS):
+                expression = value
+            else:
+                namespace[f'convert_{index}'] = field.to_representation
+                expression = f'None if {value} is None else convert_{index}({value})'
+            # The FK ids along a dotted source, to tell a null relation from a null value
+            for depth in range(1, len(attrs)):
+                guards.append(f'row[{len(columns)}] is not None')
+                columns.append('__'.join(attrs[:depth]))
+        statement = f'd[{name!r}] = {expression}'
+        lines.append(f"    if {' and '.join(guards)}: {statement}" if guards else f'    {statement}')
+    lines.append('    return d')
+    exec('\n'.join(lines), namespace)
+    return columns, used_annotations, namespace['build']
+
+
+def row_builder(serializer):
+    """
+    (columns, annotations, build) for the fields the serializer has (after ?fields= / ?expand=),
+    or None when one of them cannot be compiled. build(row, media_base) turns one
+    values_list(*columns) tuple into the serializer's dict for that row.
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in _builders:
+        _builders[key] = _compile(*key)
+    return _builders[key]
+
+
+class FastListMixin:
+    """Serves list() from compiled row builders when FAST_LIST_ROWS is on and the requested fields allow it."""
+
+    def list_row_builder(self):
+        """row_builder() of this request's serializer, or None when the serializer path serves the list."""
+        return row_builder(self.get_serializer()) if settings.FAST_LIST_ROWS else None
+
+    def list_rows(self, queryset, compiled):
+        """The values_list() rows of the filtered queryset that compiled's build() takes."""
+        columns, annotations, _ = compiled
+        # Prefetches are for the serializer path; values_list() rows do not take them
+        queryset = queryset.prefetch_related(None)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.values_list(*columns)
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.list_row_builder()
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+        build = compiled[2]
+        rows = self.list_rows(self.filter_queryset(self.get_queryset()), compiled)
+        page = self.paginate_queryset(rows)
+        media_base = media_base_url(request)
+        if page is None:
+            return Response([build(row, media_base) for row in rows])
+        return self.get_paginated_response([build(row, media_base) for row in page])
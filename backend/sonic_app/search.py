@@ -0,0 +1,86 @@
+"""
+Full-text product search on PostgreSQL.
+
+Product.search_vector is a weighted tsvector over the product name (A), category name and
+dynamic field values such as karat or purity (B) and description (C). It is kept current by
+the signal handlers in signals.py; code that writes with bulk_create()/update() must call
+update_product_search_vectors() itself. When the pg_trgm extension is installed, product names
+are also matched by trigram word similarity so typos ("neklace") still find results.
+"""
+import re
+from functools import lru_cache
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Category, Product, ProductFieldValue
+
+SEARCH_CONFIG = 'english'
+
+
+def product_search_vector():
+    """Expression computing Product.search_vector; usable in .update() (no joins)."""
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef('product_category_id')).values('category_name')[:1],
+        output_field=TextField(),
+    )
+    field_values = Subquery(
+        ProductFieldValue.objects.filter(product_id=OuterRef('pk'))
+        .values('product_id')
+        .annotate(text=StringAgg('field_value', delimiter=' '))
+        .values('text'),
+        output_field=TextField(),
+    )
+    return (
+        SearchVector('product_name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(field_values, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('product_description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_product_search_vectors(product_ids=None):
+    """Recompute search_vector for the given product ids (all products when None) in one UPDATE."""
+    queryset = Product.objects.all()
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        queryset = queryset.filter(id__in=product_ids)
+    return queryset.update(search_vector=product_search_vector())
+
+
+@lru_cache(maxsize=None)
+def trigram_enabled():
+    """True when pg_trgm is installed in the current database (checked once per process)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def build_search_query(text):
+    """Prefix-match every word so results update as the user types: 'gold ri' -> gold:* & ri:*"""
+    terms = re.findall(r'\w+', (text or '').lower())
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f'{t}:*' for t in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_products(queryset, text):
+    """Filter and rank a Product queryset by relevance to text."""
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none()
+    queryset = queryset.annotate(rank=SearchRank(F('search_vector'), query))
+    match = Q(search_vector=query)
+    if trigram_enabled():
+        queryset = queryset.annotate(similarity=TrigramWordSimilarity(text, 'product_name'))
+        # %> uses the trigram GIN index and pg_trgm.word_similarity_threshold (default 0.6)
+        match |= Q(product_name__trigram_word_similar=text)
+        score = Greatest(F('rank'), F('similarity'))
+    else:
+        score = F('rank')
+    return queryset.filter(match).annotate(score=Coalesce(score, Value(0.0))).order_by('-score', '-created_at')
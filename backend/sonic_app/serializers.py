@@ -1,6 +1,10 @@
+import json
+
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from django.db.models import Max
+from django.db import models
+from django.db.models import Count, Max, Prefetch
+from .media import media_base_url, media_url
 from .models import (
     Category, CategoryField, User, Product, ProductVariant, ProductFieldValue, Order, OrderItem, CustomizeOrders, AddToCart,
     ProductLead,
@@ -9,7 +13,88 @@ from .models import (
 )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+def _param_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(serializer_class, query_params):
+    """
+    Field names a GET asked for, or None for all of them.
+
+    ?fields=a,b keeps only those fields. ?expand=x,y names which of Meta.expandable_fields (nested
+    lists and computed fields that cost queries) to include: alongside fields=, or on their own
+    with every other field. Without either parameter the response is unchanged.
+    """
+    fields_param, expand_param = query_params.get('fields'), query_params.get('expand')
+    if fields_param is None and expand_param is None:
+        return None
+    declared = set(serializer_class.Meta.fields)
+    expand = _param_list(expand_param or '')
+    if fields_param is not None:
+        wanted = _param_list(fields_param) | expand
+    else:
+        wanted = (declared - set(serializer_class.Meta.expandable_fields)) | expand
+    return wanted & declared
+
+
+def optimize_queryset(queryset, serializer_class, query_params):
+    """Add the select_related/prefetch_related (Meta.select_related_fields / Meta.prefetch_fields) of the fields requested."""
+    wanted = requested_fields(serializer_class, query_params)
+    meta = serializer_class.Meta
+    select = {path for name, path in meta.select_related_fields.items() if wanted is None or name in wanted}
+    prefetch = {}
+    for name, lookup in meta.prefetch_fields.items():
+        if wanted is None or name in wanted:
+            # Several fields can share one relation; the first lookup listed for it wins
+            prefetch.setdefault(getattr(lookup, 'prefetch_to', lookup), lookup)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch.values())
+    return queryset
+
+
+class SparseFieldsMixin:
+    """Drops the fields a GET did not ask for (see requested_fields) before anything is serialized."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        wanted = requested_fields(type(self), request.query_params)
+        if wanted is not None:
+            for name in list(self.fields):
+                if name not in wanted:
+                    self.fields.pop(name)
+
+
+class MediaURLField(serializers.FileField):
+    """File rendered as an absolute media URL (sonic_app.media), the base worked out once per request."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        base = self.context.get('media_base_url')
+        if base is None:
+            base = self.context['media_base_url'] = media_base_url(self.context.get('request'))
+        return media_url(value.name, base, value.storage)
+
+
+class MediaImageField(MediaURLField, serializers.ImageField):
+    """Image upload rendered like MediaURLField."""
+
+
+class MediaModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose file and image fields render as absolute media URLs."""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: MediaURLField,
+        models.ImageField: MediaImageField,
+    }
+
+
+class CategorySerializer(MediaModelSerializer):
     """Category serializer for jewelry categories"""
     products_count = serializers.SerializerMethodField()
 
@@ -30,34 +115,6 @@ class CategorySerializer(serializers.ModelSerializer):
             product_status=True
         ).count()
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('category_image'):
-            from django.conf import settings
-            import re
-            image_path = representation['category_image']
-            # If DB stored full URL (bug), extract path like categories/xyz.jpg
-            if image_path.startswith('http://') or image_path.startswith('https://'):
-                parts = image_path.split('/media/')
-                image_path = parts[-1] if len(parts) > 1 else image_path
-            # Handle path with embedded URL
-            elif '/media/' in image_path and '://' in image_path:
-                match = re.search(r'/media/([a-zA-Z0-9_/]+/[^?\s#]+\.(?:jpe?g|png|gif|webp))', image_path, re.I)
-                image_path = match.group(1) if match else image_path
-            media_url = getattr(settings, 'MEDIA_URL', '/media/')
-            if not media_url.endswith('/') and image_path and not image_path.startswith('/'):
-                media_url = media_url + '/'
-            full_path = f"{media_url.rstrip('/')}/{image_path.lstrip('/')}" if image_path else None
-            if full_path and '://' not in full_path:
-                request = self.context.get('request')
-                if request:
-                    representation['category_image'] = request.build_absolute_uri(full_path)
-                else:
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['category_image'] = f"{base_url.rstrip('/')}{full_path}"
-        return representation
-
 
 class CategoryFieldSerializer(serializers.ModelSerializer):
     """Category field serializer for dynamic fields"""
@@ -73,6 +130,19 @@ class CategoryFieldSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate_field_options(self, value):
+        """Options are stored as a JSON list; a JSON-encoded string (older clients) is decoded once here."""
+        if isinstance(value, str):
+            if not value.strip():
+                return None
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise serializers.ValidationError('Options must be a valid JSON array, e.g. ["20","21","22"].')
+        if value is not None and not isinstance(value, list):
+            raise serializers.ValidationError('Options must be a JSON array, e.g. ["20","21","22"].')
+        return value
+
     def validate(self, attrs):
         """Variant dimensions must be select with options. No limit on how many per category."""
         is_variant = attrs.get('is_variant_dimension', getattr(self.instance, 'is_variant_dimension', False))
@@ -86,21 +156,10 @@ class CategoryFieldSerializer(serializers.ModelSerializer):
                     {'field_type': 'Variant dimensions must use field type "Select" so options (e.g. Size 20,21,22) are defined.'}
                 )
             field_options = attrs.get('field_options') or getattr(self.instance, 'field_options', None)
-            if not field_options:
+            if not isinstance(field_options, list) or len(field_options) == 0:
                 raise serializers.ValidationError(
                     {'field_options': 'Variant dimensions must have Options (JSON array), e.g. ["20","21","22"].'}
                 )
-            try:
-                import json
-                opts = json.loads(field_options) if isinstance(field_options, str) else field_options
-                if not isinstance(opts, list) or len(opts) == 0:
-                    raise serializers.ValidationError(
-                        {'field_options': 'Options must be a non-empty JSON array, e.g. ["20","21","22"].'}
-                    )
-            except (TypeError, ValueError):
-                raise serializers.ValidationError(
-                    {'field_options': 'Options must be a valid JSON array, e.g. ["20","21","22"].'}
-                )
             variant_order = attrs.get('variant_order') if 'variant_order' in attrs else (self.instance and self.instance.variant_order)
             if variant_order is not None and (not isinstance(variant_order, int) or variant_order < 1):
                 raise serializers.ValidationError({'variant_order': 'Must be a positive integer.'})
@@ -129,9 +188,22 @@ class ProductFieldValueSerializer(serializers.ModelSerializer):
         model = ProductFieldValue
         fields = [
             'id', 'product', 'category_field', 'field_name', 'field_label',
-            'field_type', 'field_value', 'created_at', 'updated_at'
+            'field_type', 'field_value', 'value_number', 'value_boolean', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'value_number', 'value_boolean', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        """Number/decimal fields must hold a number so value_number can be filled."""
+        category_field = attrs.get('category_field') or (self.instance and self.instance.category_field)
+        field_value = attrs.get('field_value', getattr(self.instance, 'field_value', None))
+        if (
+            category_field is not None
+            and category_field.field_type in ProductFieldValue.NUMERIC_FIELD_TYPES
+            and str(field_value or '').strip()
+            and ProductFieldValue.parse_number(field_value) is None
+        ):
+            raise serializers.ValidationError({'field_value': f'{category_field.field_label} must be a number.'})
+        return attrs
 
 
 class ProductVariantSerializer(serializers.ModelSerializer):
@@ -155,13 +227,18 @@ class ProductVariantSerializer(serializers.ModelSerializer):
                 'dimension_2': obj.variant_value_2,
             }
         from .models import CategoryField
-        dims = list(
-            CategoryField.objects.filter(
-                category_id=obj.product.product_category_id,
-                is_variant_dimension=True,
-                is_delete=False
-            ).order_by('variant_order', 'display_order', 'id')[:2]
-        )
+        # Looked up once per category while serializing a list (the root context is shared)
+        dims_by_category = self.context.setdefault('variant_dimension_fields', {})
+        category_id = obj.product.product_category_id
+        if category_id not in dims_by_category:
+            dims_by_category[category_id] = list(
+                CategoryField.objects.filter(
+                    category_id=category_id,
+                    is_variant_dimension=True,
+                    is_delete=False
+                ).order_by('variant_order', 'display_order', 'id')[:2]
+            )
+        dims = dims_by_category[category_id]
         out = {}
         if len(dims) >= 1:
             out[dims[0].field_label] = obj.variant_value_1
@@ -321,7 +398,7 @@ class ProductLeadSerializer(serializers.ModelSerializer):
         }
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, MediaModelSerializer):
     """Product serializer"""
     product_parent_name = serializers.CharField(source='product_parent_id.product_name', read_only=True)
     product_category_name = serializers.CharField(source='product_category.category_name', read_only=True)
@@ -343,6 +420,18 @@ class ProductSerializer(serializers.ModelSerializer):
             'variants', 'variant_dimension_labels', 'dimension_1_options', 'dimension_2_options'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = [
+            'child_products', 'field_values', 'variants',
+            'variant_dimension_labels', 'dimension_1_options', 'dimension_2_options',
+        ]
+        select_related_fields = {
+            'product_category_name': 'product_category',
+            'product_parent_name': 'product_parent_id',
+        }
+        prefetch_fields = {
+            'field_values': Prefetch('field_values', queryset=ProductFieldValue.objects.select_related('category_field')),
+            'variants': 'variants',
+        }
         extra_kwargs = {
             'product_price': {'required': False, 'allow_null': True},
             'product_weight': {'required': False, 'allow_null': True},
@@ -386,23 +475,6 @@ class ProductSerializer(serializers.ModelSerializer):
             .order_by('variant_value_2').values_list('variant_value_2', flat=True).distinct()
         )
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('product_image'):
-            request = self.context.get('request')
-            if request:
-                representation['product_image'] = request.build_absolute_uri(representation['product_image'])
-            else:
-                # Fallback: construct URL manually if request is not available
-                from django.conf import settings
-                image_url = representation['product_image']
-                if image_url and not image_url.startswith('http'):
-                    # Construct absolute URL from relative URL
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['product_image'] = f"{base_url.rstrip('/')}{image_url}"
-        return representation
-
     def get_child_products(self, obj):
         if obj.product_is_parent:
             children = Product.objects.filter(product_parent_id=obj, is_delete=False)
@@ -410,10 +482,10 @@ class ProductSerializer(serializers.ModelSerializer):
         return []
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(MediaModelSerializer):
     """Order item serializer"""
     product_name = serializers.CharField(source='product.product_name', read_only=True)
-    product_image = serializers.ImageField(source='product.product_image', read_only=True)
+    product_image = MediaImageField(source='product.product_image', read_only=True)
     product_variant_display = serializers.SerializerMethodField()
 
     class Meta:
@@ -429,23 +501,8 @@ class OrderItemSerializer(serializers.ModelSerializer):
             return ProductVariantSerializer(obj.product_variant).data.get('display_values', {})
         return None
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('product_image'):
-            request = self.context.get('request')
-            if request:
-                representation['product_image'] = request.build_absolute_uri(representation['product_image'])
-            else:
-                from django.conf import settings
-                image_url = representation['product_image']
-                if image_url and not image_url.startswith('http'):
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['product_image'] = f"{base_url.rstrip('/')}{image_url}"
-        return representation
-
-
-class OrderSerializer(serializers.ModelSerializer):
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Order serializer"""
     order_user_username = serializers.CharField(source='order_user.username', read_only=True)
     order_product_name = serializers.CharField(source='order_product.product_name', read_only=True)
@@ -461,13 +518,26 @@ class OrderSerializer(serializers.ModelSerializer):
             'order_items', 'items_count', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = ['order_items', 'items_count']
+        select_related_fields = {
+            'order_user_username': 'order_user',
+            'order_product_name': 'order_product',
+        }
+        prefetch_fields = {
+            'order_items': Prefetch(
+                'order_items', queryset=OrderItem.objects.select_related('product', 'product_variant__product')
+            ),
+            'items_count': 'order_items',
+        }
+        # get_items_count as an annotation, for the values_list() rows of sonic_app.rows
+        row_annotations = {'items_count': Count('order_items')}
 
     def get_items_count(self, obj):
         """Get count of items in this order"""
         return obj.order_items.count()
 
 
-class CustomizeOrdersSerializer(serializers.ModelSerializer):
+class CustomizeOrdersSerializer(MediaModelSerializer):
     """Customize Orders serializer"""
     customize_user_username = serializers.CharField(source='customize_user.username', read_only=True)
 
@@ -481,27 +551,12 @@ class CustomizeOrdersSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('order_image'):
-            request = self.context.get('request')
-            if request:
-                representation['order_image'] = request.build_absolute_uri(representation['order_image'])
-            else:
-                from django.conf import settings
-                image_url = representation['order_image']
-                if image_url and not image_url.startswith('http'):
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['order_image'] = f"{base_url.rstrip('/')}{image_url}"
-        return representation
-
-
-class AddToCartSerializer(serializers.ModelSerializer):
+
+class AddToCartSerializer(SparseFieldsMixin, MediaModelSerializer):
     """Add to Cart serializer. Price not exposed (plan: do not show price)."""
     cart_user_username = serializers.CharField(source='cart_user.username', read_only=True)
     cart_product_name = serializers.CharField(source='cart_product.product_name', read_only=True)
-    cart_product_image = serializers.ImageField(source='cart_product.product_image', read_only=True)
+    cart_product_image = MediaImageField(source='cart_product.product_image', read_only=True)
     cart_variant_display = serializers.SerializerMethodField()
 
     class Meta:
@@ -513,29 +568,22 @@ class AddToCartSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = ['cart_variant_display']
+        select_related_fields = {
+            'cart_user_username': 'cart_user',
+            'cart_product_name': 'cart_product',
+            'cart_product_image': 'cart_product',
+            'cart_variant_display': 'cart_variant__product',
+        }
+        prefetch_fields = {}
 
     def get_cart_variant_display(self, obj):
         if obj.cart_variant_id:
             return ProductVariantSerializer(obj.cart_variant).data.get('display_values', {})
         return None
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('cart_product_image'):
-            request = self.context.get('request')
-            if request:
-                representation['cart_product_image'] = request.build_absolute_uri(representation['cart_product_image'])
-            else:
-                from django.conf import settings
-                image_url = representation['cart_product_image']
-                if image_url and not image_url.startswith('http'):
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['cart_product_image'] = f"{base_url.rstrip('/')}{image_url}"
-        return representation
-
-
-class BannersSerializer(serializers.ModelSerializer):
+
+class BannersSerializer(MediaModelSerializer):
     """Banners serializer"""
     banner_product_name = serializers.CharField(source='banner_product_id.product_name', read_only=True)
 
@@ -548,21 +596,6 @@ class BannersSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def to_representation(self, instance):
-        """Convert relative image URLs to absolute URLs"""
-        representation = super().to_representation(instance)
-        if representation.get('banner_image'):
-            request = self.context.get('request')
-            if request:
-                representation['banner_image'] = request.build_absolute_uri(representation['banner_image'])
-            else:
-                from django.conf import settings
-                image_url = representation['banner_image']
-                if image_url and not image_url.startswith('http'):
-                    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                    representation['banner_image'] = f"{base_url.rstrip('/')}{image_url}"
-        return representation
-
 
 class CMSSerializer(serializers.ModelSerializer):
     """CMS serializer"""
@@ -582,13 +615,13 @@ class NotificationTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = NotificationType
         fields = [
-            'notif_id', 'notif_name', 'notif_status',
+            'notif_id', 'notif_name', 'notif_status', 'notif_retention_days',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['notif_id', 'created_at', 'updated_at']
 
 
-class NotificationTableSerializer(serializers.ModelSerializer):
+class NotificationTableSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Notification Table serializer"""
     notification_user_username = serializers.CharField(source='notification_user.username', read_only=True)
     notification_type_name = serializers.CharField(source='notification_type.notif_name', read_only=True)
@@ -602,6 +635,7 @@ class NotificationTableSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = []
 
 
 class OrderEmailsSerializer(serializers.ModelSerializer):
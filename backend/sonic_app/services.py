@@ -6,7 +6,13 @@ import requests
 from django.conf import settings
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import NotificationTable, User, NotificationType
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from .broadcasts import BROADCAST_GROUP, mark_broadcasts_read, unread_broadcasts, user_broadcasts
+from .presence import online_user_ids
+from .push import push_to_offline_users
+from .models import BroadcastNotification, BroadcastReceipt, NotificationCounter, NotificationTable, User, NotificationType
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +88,104 @@ class OTPSmsService:
             return {'success': False, 'message': str(e), 'provider_response': None}
 
 
+def notification_payload(notification_id, title, message, type_name, read, created_at):
+    """A notification as the WebSocket sends it (live and replayed)."""
+    return {
+        'id': notification_id,
+        'title': title,
+        'message': message,
+        'type': type_name,
+        'read': read,
+        'created_at': created_at.isoformat()
+    }
+
+
+# Most ids one batched mark-read may name (the app sends what is on screen)
+MARK_READ_BATCH_MAX = 500
+
+
+def mark_read_batch_params(data):
+    """
+    (notification_ids, up_to_id) from a mark-read request body or socket message, exactly one of
+    them set. Raises ValueError with a message for the client when neither is usable.
+    """
+    notification_ids, up_to_id = data.get('notification_ids'), data.get('up_to_id')
+    if notification_ids is not None:
+        if not isinstance(notification_ids, list) or not all(
+            isinstance(notification_id, int) and not isinstance(notification_id, bool)
+            for notification_id in notification_ids
+        ):
+            raise ValueError('notification_ids must be a list of ids')
+        if len(notification_ids) > MARK_READ_BATCH_MAX:
+            raise ValueError(f'At most {MARK_READ_BATCH_MAX} notification_ids at a time')
+        return notification_ids, None
+    if isinstance(up_to_id, int) and not isinstance(up_to_id, bool):
+        return None, up_to_id
+    raise ValueError('notification_ids or up_to_id is required')
+
+
+class UnreadCounter:
+    """
+    Unread notification count per user: the personal notifications' count is kept in
+    NotificationCounter, so that part of the badge is one primary-key read instead of a scan of the
+    notifications table. Unread broadcasts are counted at read time from the broadcasts since the
+    user joined and their receipts, so sending a broadcast writes no counter rows.
+
+    Notification save()/delete() adjust the counter through the handlers in sonic_app.signals;
+    queryset updates (mark read, soft delete) send no signals, so their callers adjust it
+    themselves. A user without a counter row is counted on the first get().
+    """
+
+    @staticmethod
+    def get(user_id):
+        count = NotificationCounter.objects.filter(counter_user_id=user_id).values_list('unread_count', flat=True).first()
+        if count is None:
+            count = UnreadCounter._store(user_id)
+        return count + unread_broadcasts(user_id).count()
+
+    @staticmethod
+    def add(user_id, delta):
+        """Add delta (negative to subtract) in one UPDATE; a missing row is left for get() to count."""
+        if delta:
+            NotificationCounter.objects.filter(counter_user_id=user_id).update(
+                unread_count=Greatest(F('unread_count') + delta, 0)
+            )
+
+    @staticmethod
+    def recount(user_id):
+        """Count the user's unread personal notifications again and store them; returns the whole unread count."""
+        return UnreadCounter._store(user_id) + unread_broadcasts(user_id).count()
+
+    @staticmethod
+    def _store(user_id):
+        """
+        Count under the counter row's lock: an add() racing with the count waits for the new value,
+        and the count (a new snapshot per statement) sees any add() that committed first.
+        """
+        with transaction.atomic():
+            counter, _ = NotificationCounter.objects.select_for_update().get_or_create(counter_user_id=user_id)
+            counter.unread_count = NotificationTable.objects.filter(
+                notification_user_id=user_id,
+                notification_read=False,
+                is_delete=False
+            ).count()
+            counter.save(update_fields=['unread_count'])
+        return counter.unread_count
+
+    @staticmethod
+    def push(user_id):
+        """Send the user's current count to their sockets as an unread_count event, if they have any open."""
+        if not online_user_ids([user_id]):
+            return
+        async_to_sync(get_channel_layer().group_send)(
+            f'notifications_{user_id}',
+            {
+                'type': 'unread_count_message',
+                'unread_count': UnreadCounter.get(user_id)
+            }
+        )
+
+
 class NotificationService:
     """Service for sending notifications via WebSocket and storing in database"""
     
@@ -110,6 +214,9 @@ class NotificationService:
                 'error': 'Notification type not found'
             }
         
+        # Only users with a socket open get channel-layer messages; the others get a push
+        # and the notification is replayed when they reconnect
+        online = online_user_ids(user_ids)
         for user_id in user_ids:
             try:
                 user = User.objects.get(id=user_id)
@@ -124,17 +231,14 @@ class NotificationService:
                 )
                 
                 created_notifications.append(notification.id)
+                if user_id not in online:
+                    continue
                 
                 # Send via WebSocket
                 group_name = f'notifications_{user_id}'
-                notification_data = {
-                    'id': notification.id,
-                    'title': title,
-                    'message': message,
-                    'type': notification_type.notif_name,
-                    'read': False,
-                    'created_at': notification.created_at.isoformat()
-                }
+                notification_data = notification_payload(
+                    notification.id, title, message, notification_type.notif_name, False, notification.created_at
+                )
                 
                 # Send to WebSocket group
                 async_to_sync(channel_layer.group_send)(
@@ -144,9 +248,16 @@ class NotificationService:
                         'notification': notification_data
                     }
                 )
+                UnreadCounter.push(user_id)
                 
             except User.DoesNotExist:
                 continue
+
+        # Phones of the recipients that have no socket open
+        push_to_offline_users(
+            title, message, {'type': notification_type.notif_name},
+            user_ids=[user_id for user_id in user_ids if user_id not in online]
+        )
         
         return {
             'success': True,
@@ -157,7 +268,9 @@ class NotificationService:
     @staticmethod
     def send_notification_to_all(notification_type_id, title, message, exclude_ids=None):
         """
-        Send notification to all active users
+        Send notification to all active users as one broadcast (sonic_app.broadcasts): a single
+        BroadcastNotification row, hidden receipts for the excluded users and one WebSocket group
+        message. No counter rows are written: unread broadcasts are counted when the badge is read
         
         Args:
             notification_type_id (int): ID of the notification type
@@ -166,22 +279,50 @@ class NotificationService:
             exclude_ids (list, optional): List of user IDs to exclude
             
         Returns:
-            dict: Dictionary with success status and created notification IDs
+            dict: Dictionary with success status and the broadcast's ID
         """
-        exclude_ids = exclude_ids or []
-        active_users = User.objects.filter(
-            is_active=True,
-            is_delete=False
-        ).exclude(id__in=exclude_ids)
-        
-        user_ids = list(active_users.values_list('id', flat=True))
-        
-        return NotificationService.send_notification(
-            user_ids=user_ids,
-            notification_type_id=notification_type_id,
-            title=title,
-            message=message
+        exclude_ids = list(exclude_ids or [])
+        try:
+            notification_type = NotificationType.objects.get(notif_id=notification_type_id)
+        except NotificationType.DoesNotExist:
+            return {
+                'success': False,
+                'error': 'Notification type not found'
+            }
+
+        broadcast = BroadcastNotification.objects.create(
+            broadcast_type=notification_type,
+            broadcast_title=title,
+            broadcast_message=message
+        )
+        BroadcastReceipt.objects.bulk_create([
+            BroadcastReceipt(receipt_broadcast=broadcast, receipt_user_id=user_id, is_delete=True)
+            for user_id in User.objects.filter(id__in=exclude_ids).values_list('id', flat=True)
+        ])
+
+        async_to_sync(get_channel_layer().group_send)(
+            BROADCAST_GROUP,
+            {
+                'type': 'broadcast_message',
+                'notification': notification_payload(
+                    broadcast.id, title, message, notification_type.notif_name, False, broadcast.created_at
+                ),
+                'exclude_ids': exclude_ids,
+                # Each socket adds this to the count it last sent instead of reading the counter
+                'unread_delta': 1
+            }
         )
+        push_to_offline_users(
+            title, message, {'type': notification_type.notif_name, 'notification_id': broadcast.id},
+            exclude_ids=exclude_ids
+        )
+
+        return {
+            'success': True,
+            'notifications_created': 1,
+            'notification_ids': [broadcast.id],
+            'broadcast': True
+        }
     
     @staticmethod
     def mark_notification_read(notification_id, user_id):
@@ -195,17 +336,58 @@ class NotificationService:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            notification = NotificationTable.objects.get(
-                id=notification_id,
-                notification_user_id=user_id
-            )
-            notification.notification_read = True
-            notification.save()
+        notifications = NotificationTable.objects.filter(id=notification_id, notification_user_id=user_id)
+        # Only an unread row is written, so repeating the call does not lower the count again
+        if notifications.filter(notification_read=False, is_delete=False).touch_update(notification_read=True):
+            UnreadCounter.add(user_id, -1)
+            UnreadCounter.push(user_id)
             return True
-        except NotificationTable.DoesNotExist:
-            return False
-
+        if mark_broadcasts_read(user_id, [notification_id]):
+            UnreadCounter.push(user_id)
+            return True
+        return notifications.exists() or user_broadcasts(user_id).filter(id=notification_id).exists()
 
+    @staticmethod
+    def mark_read_batch(user_id, notification_ids=None, up_to_id=None):
+        """
+        Mark the user's unread notifications in notification_ids, every one up to and including
+        up_to_id, or all of them when neither is given, as read with a single UPDATE that sets only
+        notification_read and updated_at. Broadcasts among them get read receipts.
 
+        Returns:
+            int: How many notifications changed (already read or unknown ids are skipped)
+        """
+        notifications = NotificationTable.objects.filter(
+            notification_user_id=user_id,
+            notification_read=False,
+            is_delete=False
+        )
+        if notification_ids is not None:
+            notifications = notifications.filter(id__in=notification_ids)
+        elif up_to_id is not None:
+            notifications = notifications.filter(id__lte=up_to_id)
+        marked = notifications.touch_update(notification_read=True)
+        UnreadCounter.add(user_id, -marked)
+        marked += mark_broadcasts_read(user_id, notification_ids, up_to_id)
+        if marked:
+            UnreadCounter.push(user_id)
+        return marked
 
+    @staticmethod
+    def notifications_after(user_id, last_seen_id, limit):
+        """
+        The user's notifications and broadcasts with an id above last_seen_id, oldest first, at most
+        limit of them, as WebSocket payloads (keyset queries on the ids, no COUNT or OFFSET).
+        """
+        rows = list(NotificationTable.objects.filter(
+            notification_user_id=user_id,
+            is_delete=False,
+            id__gt=last_seen_id
+        ).order_by('id').values_list(
+            'id', 'notification_title', 'notification_message', 'notification_type__notif_name',
+            'notification_read', 'created_at'
+        )[:limit])
+        rows += user_broadcasts(user_id).filter(id__gt=last_seen_id).order_by('id').values_list(
+            'id', 'broadcast_title', 'broadcast_message', 'broadcast_type__notif_name', 'read', 'created_at'
+        )[:limit]
+        return [notification_payload(*row) for row in sorted(rows)[:limit]]
@@ -0,0 +1,137 @@
+"""
+Model signal handlers for sonic_app. Connected in SonicAppConfig.ready().
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .catalog import KIND_BANNER, KIND_CATEGORY, KIND_PRODUCT, record_catalog_changes
+from .facets import update_product_attributes, update_typed_field_values
+from .models import (
+    AddToCart, Banners, BroadcastNotification, BroadcastReceipt, CMS, Category, CategoryField, CustomizeOrders,
+    NotificationTable, NotificationType, Order, OrderEmails, OrderItem, Product, ProductFieldValue, ProductLead,
+    ProductVariant, Session, User,
+)
+from .response_cache import bump_generation
+from .search import update_product_search_vectors
+from .services import UnreadCounter
+
+
+def _category_product_ids(category_id):
+    return Product.objects.filter(product_category_id=category_id).values_list('id', flat=True)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, **kwargs):
+    """Keep Product.search_vector in sync with name/description/category."""
+    update_product_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=ProductFieldValue)
+@receiver(post_delete, sender=ProductFieldValue)
+def refresh_product_for_field_value(sender, instance, **kwargs):
+    """Field values (karat, purity, ...) feed both the search document and Product.attributes."""
+    update_product_search_vectors([instance.product_id])
+    update_product_attributes([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+def refresh_search_vectors_for_category(sender, instance, created, **kwargs):
+    """Category name is part of every product's search document in that category."""
+    if not created:
+        update_product_search_vectors(_category_product_ids(instance.pk))
+
+
+@receiver(post_save, sender=CategoryField)
+def refresh_attributes_for_category_field(sender, instance, created, **kwargs):
+    """Renaming, retyping or soft-deleting a field changes the attribute keys/types of its products."""
+    if not created:
+        update_typed_field_values([instance.pk])
+        update_product_attributes(_category_product_ids(instance.category_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def record_category_change(sender, instance, **kwargs):
+    record_catalog_changes(KIND_CATEGORY, [instance.pk])
+
+
+@receiver(pre_delete, sender=Category)
+def record_products_of_deleted_category(sender, instance, **kwargs):
+    """Their product_category is set to NULL in SQL, which sends no signals."""
+    record_catalog_changes(KIND_PRODUCT, _category_product_ids(instance.pk))
+
+
+@receiver(post_save, sender=CategoryField)
+@receiver(post_delete, sender=CategoryField)
+def record_category_field_change(sender, instance, created=False, **kwargs):
+    """Fields are part of their category's document; changing one also rewrites product attributes."""
+    record_catalog_changes(KIND_CATEGORY, [instance.category_id])
+    if not created:
+        record_catalog_changes(KIND_PRODUCT, _category_product_ids(instance.category_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def record_product_change(sender, instance, **kwargs):
+    record_catalog_changes(KIND_PRODUCT, [instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def record_banners_of_deleted_product(sender, instance, **kwargs):
+    """Their banner_product_id is set to NULL in SQL, which sends no signals."""
+    record_catalog_changes(KIND_BANNER, instance.banners.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductFieldValue)
+@receiver(post_delete, sender=ProductFieldValue)
+def record_product_part_change(sender, instance, **kwargs):
+    """Variants and field values (as attributes) are part of their product's document."""
+    record_catalog_changes(KIND_PRODUCT, [instance.product_id])
+
+
+@receiver(post_save, sender=Banners)
+@receiver(post_delete, sender=Banners)
+def record_banner_change(sender, instance, **kwargs):
+    record_catalog_changes(KIND_BANNER, [instance.pk])
+
+
+@receiver(post_save, sender=NotificationTable)
+def count_saved_notification(sender, instance, created, **kwargs):
+    """
+    A new unread notification adds one. An edit is recounted only when it changes the read flag,
+    the soft delete or the owner (or when the instance was not loaded with them).
+    """
+    state = instance.unread_state()
+    if created:
+        if not instance.notification_read and not instance.is_delete:
+            UnreadCounter.add(instance.notification_user_id, 1)
+    else:
+        loaded = getattr(instance, 'loaded_unread_state', None)
+        if loaded != state:
+            for user_id in {state[0], loaded[0] if loaded else state[0]}:
+                UnreadCounter.recount(user_id)
+    instance.loaded_unread_state = state
+
+
+@receiver(post_delete, sender=NotificationTable)
+def count_deleted_notification(sender, instance, **kwargs):
+    # No recount here: in a user delete cascade it would recreate the user's counter row
+    if not instance.notification_read and not instance.is_delete:
+        UnreadCounter.add(instance.notification_user_id, -1)
+
+
+def bump_response_cache_generation(sender, **kwargs):
+    """Cached responses and ETags built from this model are stale now (see sonic_app.response_cache)."""
+    bump_generation(sender)
+
+
+for _model in (
+    Category, CategoryField, Product, ProductVariant, ProductFieldValue, ProductLead, Order, OrderItem,
+    CustomizeOrders, AddToCart, Banners, CMS, NotificationType, NotificationTable, BroadcastNotification,
+    BroadcastReceipt, OrderEmails, Session, User,
+):
+    # Per sender: a receiver for all senders would turn off fast deletes for every model
+    post_save.connect(bump_response_cache_generation, sender=_model)
+    post_delete.connect(bump_response_cache_generation, sender=_model)
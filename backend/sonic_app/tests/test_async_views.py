@@ -0,0 +1,132 @@
+"""
+Parity tests for the async read handlers (sonic_app.async_views): same status, bytes and ETag as the sync views.
+"""
+import types
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve
+from django.utils import timezone
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient
+
+from sonic_app import urls as app_urls
+from sonic_app.models import (
+    AddToCart, Banners, BroadcastNotification, Category, CategoryField, NotificationTable, NotificationType, Product,
+    ProductVariant, Session, User,
+)
+
+
+def async_urlconf():
+    """The app's routes as they are built with ASYNC_READ_VIEWS on, mounted at /app/."""
+    router = DefaultRouter()
+    for prefix, viewset, basename in app_urls.router.registry:
+        router.register(prefix, viewset, basename=basename)
+    with override_settings(ASYNC_READ_VIEWS=True):
+        urlpatterns = [path('app/', include(router.urls))]
+    urlconf = types.ModuleType('async_urls')
+    urlconf.urlpatterns = urlpatterns
+    return urlconf
+
+
+ASYNC_URLS = async_urlconf()
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadParityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='ananyā', password='x')
+        Session.objects.create(
+            session_user=self.user, session_key='s1', auth_token='good-token',
+            expire_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        rings = Category.objects.create(category_name='Rings', category_image='categories/rings.png')
+        Category.objects.create(category_name='Hidden', category_status=False)
+        CategoryField.objects.create(
+            category=rings, field_name='size', field_label='Size', field_type='select', is_variant_dimension=True,
+        )
+        self.ring = Product.objects.create(
+            product_name='Ruby "Ring"', product_weight='3.5', product_price='1200.5', product_category=rings,
+            product_image='products/ruby.png', product_form_response={'karat': '22K'},
+        )
+        for index in range(25):
+            Product.objects.create(product_name=f'Chain {index}', product_weight='1', product_category=rings)
+        variant = ProductVariant.objects.create(product=self.ring, variant_value_1='6')
+        Banners.objects.create(banner_title='Sale', banner_product_id=self.ring, banner_image='banners/sale.png')
+        AddToCart.objects.create(cart_user=self.user, cart_product=self.ring, cart_variant=variant)
+        alerts = NotificationType.objects.create(notif_name='Alerts')
+        NotificationTable.objects.create(
+            notification_user=self.user, notification_type=alerts, notification_title='Hi ✨', notification_message='m',
+        )
+        BroadcastNotification.objects.create(broadcast_type=alerts, broadcast_title='Sale', broadcast_message='m')
+
+    def _both(self, url, token=None, **params):
+        if token:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        sync = self.client.get(url, params)
+        with override_settings(ROOT_URLCONF=ASYNC_URLS):
+            self.assertTrue(iscoroutinefunction(resolve(url).func))
+            async_ = self.client.get(url, params)
+        self.client.credentials()
+        return sync, async_
+
+    def assertSameResponse(self, url, status=200, token=None, **params):
+        sync, async_ = self._both(url, token, **params)
+        self.assertEqual((sync.status_code, async_.status_code), (status, status))
+        self.assertEqual(async_.content, sync.content)
+        self.assertEqual(async_.get('ETag'), sync.get('ETag'))
+        return async_
+
+    def test_product_list_and_detail(self):
+        data = self.assertSameResponse('/app/products/').json()
+        self.assertEqual((data['count'], len(data['results'])), (26, 20))
+        self.assertSameResponse('/app/products/', page=2, ordering='product_name')
+        self.assertSameResponse('/app/products/', category=self.ring.product_category_id, fields='id,product_name')
+        self.assertSameResponse('/app/products/', product_category=self.ring.product_category_id)
+        self.assertSameResponse('/app/products/', status=404, page=9)
+        self.assertSameResponse(f'/app/products/{self.ring.id}/')
+        self.assertSameResponse('/app/products/999999/', status=404)
+        with override_settings(FAST_LIST_ROWS=True):
+            self.assertSameResponse('/app/products/', fields='id,product_name,product_image,product_category_name')
+
+    def test_active_categories_and_banners(self):
+        self.assertEqual(len(self.assertSameResponse('/app/categories/active/').json()), 1)
+        self.assertEqual(self.assertSameResponse('/app/banners/active/').json()[0]['banner_product_name'], 'Ruby "Ring"')
+
+    def test_cart_and_notifications_with_bearer_token(self):
+        self.assertSameResponse('/app/cart/', token='good-token', user_id=self.user.id)
+        with override_settings(FAST_LIST_ROWS=True):
+            self.assertSameResponse('/app/cart/', token='good-token', user_id=self.user.id, expand='')
+        feed = self.assertSameResponse('/app/notifications/', token='good-token', user_id=self.user.id).json()
+        self.assertEqual([entry['broadcast'] for entry in feed['results']], [True, False])
+        self.assertSameResponse(
+            '/app/notifications/', token='good-token', user_id=self.user.id, read='0', ordering='created_at',
+            fields='id,notification_title',
+        )
+        self.assertSameResponse('/app/notifications/', token='bad-token', ordering='created_at')
+        # Django session (admin panel): the ETag hashes the logged-in user
+        self.client.force_login(self.user)
+        self.assertSameResponse('/app/notifications/', notification_user=self.user.id)
+
+    def test_not_modified(self):
+        etag = self.assertSameResponse('/app/products/')['ETag']
+        with override_settings(ROOT_URLCONF=ASYNC_URLS):
+            response = self.client.get('/app/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=60)
+    def test_response_cache(self):
+        with override_settings(ROOT_URLCONF=ASYNC_URLS):
+            first = self.client.get('/app/banners/active/')
+            second = self.client.get('/app/banners/active/')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.content, first.content)
+
+    def test_writes_keep_the_sync_view(self):
+        with override_settings(ROOT_URLCONF=ASYNC_URLS):
+            response = self.client.delete(f'/app/products/{self.ring.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Product.objects.filter(id=self.ring.id).exists())
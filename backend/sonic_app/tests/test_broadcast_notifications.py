@@ -0,0 +1,112 @@
+"""
+Tests for broadcast notifications (sonic_app.broadcasts): stored once, merged into each user's list.
+"""
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from sonic_app.models import (
+    BroadcastNotification, BroadcastReceipt, NotificationCounter, NotificationTable, NotificationType, User,
+)
+from sonic_app.services import NotificationService, UnreadCounter
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.alerts = NotificationType.objects.create(notif_name='Alerts')
+        self.offers = NotificationType.objects.create(notif_name='Offers')
+        self.buyer = User.objects.create_user(username='buyer', password='x')
+        self.other = User.objects.create_user(username='other', password='x')
+        self.excluded = User.objects.create_user(username='excluded', password='x')
+        self.client.force_authenticate(self.buyer)
+        UnreadCounter.get(self.buyer.id)
+        NotificationService.send_notification([self.buyer.id], self.alerts.notif_id, 'personal', 'p')
+        result = NotificationService.send_notification_to_all(
+            self.offers.notif_id, 'Sale', 'Everything 10% off', exclude_ids=[self.excluded.id]
+        )
+        self.broadcast = BroadcastNotification.objects.get()
+        self.assertEqual(result['notification_ids'], [self.broadcast.id])
+
+    def _list(self, user, **params):
+        response = self.client.get('/app/notifications/', {'user_id': user.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_stored_once_and_merged_into_lists(self):
+        self.assertEqual(NotificationTable.objects.filter(notification_title='Sale').count(), 0)
+        personal = NotificationTable.objects.get()
+        # Same id sequence: the broadcast sorts after the personal notification sent before it
+        self.assertGreater(self.broadcast.id, personal.id)
+
+        entries = self._list(self.buyer)
+        self.assertEqual([(e['id'], e['broadcast']) for e in entries], [(self.broadcast.id, True), (personal.id, False)])
+        self.assertEqual(entries[0]['notification_user'], self.buyer.id)
+        self.assertEqual(entries[0]['notification_type_name'], 'Offers')
+        self.assertEqual(entries[1]['notification_title'], 'personal')
+        self.assertEqual([e['id'] for e in self._list(self.other)], [self.broadcast.id])
+        self.assertEqual(self._list(self.excluded), [])
+        self.assertEqual([e['id'] for e in self._list(self.buyer, notification_type=self.alerts.notif_id)], [personal.id])
+        self.assertEqual([e['id'] for e in self._list(self.buyer, search='10%')], [self.broadcast.id])
+        self.assertEqual(
+            [e['id'] for e in self._list(self.buyer, ordering='created_at')], [personal.id, self.broadcast.id]
+        )
+
+        # Users who join later do not get it
+        newcomer = User.objects.create_user(username='new', password='x')
+        self.assertEqual(self._list(newcomer), [])
+
+    def test_receipts_and_counters(self):
+        self.assertEqual(UnreadCounter.get(self.buyer.id), 2)
+        self.assertEqual(UnreadCounter.get(self.excluded.id), 0)
+        # The broadcast wrote no counter rows: the counter holds the personal notification only
+        self.assertEqual(NotificationCounter.objects.get(counter_user=self.buyer).unread_count, 1)
+        self.assertFalse(BroadcastReceipt.objects.filter(receipt_user=self.buyer).exists())
+
+        response = self.client.patch(f'/app/notifications/{self.broadcast.id}/mark_read/')
+        self.assertEqual((response.data['id'], response.data['notification_read']), (self.broadcast.id, True))
+        self.assertEqual(UnreadCounter.get(self.buyer.id), 1)
+        self.assertEqual(self._list(self.buyer, read='false')[0]['broadcast'], False)
+        # Another user's copy is untouched
+        self.assertEqual(self._list(self.other)[0]['notification_read'], False)
+        self.assertEqual(UnreadCounter.get(self.other.id), 1)
+
+        self.client.post('/app/notifications/mark_all_read/', {'user_id': self.other.id}, format='json')
+        self.assertEqual(UnreadCounter.recount(self.other.id), 0)
+
+        self.client.delete('/app/notifications/soft_delete/', {'notification_ids': [self.broadcast.id]}, format='json')
+        self.assertEqual([e['broadcast'] for e in self._list(self.buyer)], [False])
+        self.assertEqual(len(self._list(self.other)), 1)
+
+    def test_replay_includes_broadcasts(self):
+        payloads = NotificationService.notifications_after(self.buyer.id, 0, 10)
+        self.assertEqual([p['title'] for p in payloads], ['personal', 'Sale'])
+        self.assertEqual(NotificationService.notifications_after(self.buyer.id, 0, 1)[0]['title'], 'personal')
+        self.assertEqual(NotificationService.notifications_after(self.excluded.id, 0, 10), [])
+
+    def test_mark_read_batch_covers_broadcasts(self):
+        marked = NotificationService.mark_read_batch(self.buyer.id, up_to_id=self.broadcast.id)
+        self.assertEqual(marked, 2)
+        self.assertEqual(UnreadCounter.get(self.buyer.id), 0)
+        self.assertEqual(UnreadCounter.recount(self.buyer.id), 0)
+        self.assertEqual(NotificationService.mark_read_batch(self.buyer.id), 0)
+        self.assertEqual(BroadcastReceipt.objects.filter(receipt_user=self.buyer, receipt_read=True).count(), 1)
+
+    def test_read_filter_applies_to_both_kinds(self):
+        personal = NotificationTable.objects.get()
+        NotificationService.mark_notification_read(self.broadcast.id, self.buyer.id)
+        for read, unread in (('1', '0'), ('true', 'false')):
+            self.assertEqual([e['id'] for e in self._list(self.buyer, read=read)], [self.broadcast.id])
+            self.assertEqual([e['id'] for e in self._list(self.buyer, read=unread)], [personal.id])
+        self.assertEqual([e['id'] for e in self._list(self.buyer, notification_read='1')], [self.broadcast.id])
+
+    def test_feed_entries_match_the_plain_list(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_ROWS=fast):
+                plain = self.client.get('/app/notifications/', {'notification_type': self.alerts.notif_id})
+                entry = self._list(self.buyer, notification_type=self.alerts.notif_id)[0]
+                self.assertEqual(entry, {**plain.data['results'][0], 'broadcast': False})
+
+                entries = self._list(self.buyer, fields='id,notification_title', ordering='-created_at')
+                self.assertEqual([set(e) for e in entries], [{'id', 'notification_title', 'broadcast'}] * 2)
+                self.assertEqual(entries[0]['id'], self.broadcast.id)
@@ -0,0 +1,141 @@
+"""
+Tests for the versioned catalogue snapshot (/app/catalog).
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from sonic_app.catalog import prune_catalog_changes, reset_catalog_snapshot
+from sonic_app.models import Banners, CatalogChange, Category, CategoryField, Product, ProductFieldValue, ProductVariant
+
+
+class CatalogSnapshotTests(TestCase):
+    url = '/app/catalog'
+
+    def setUp(self):
+        reset_catalog_snapshot()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rings = Category.objects.create(category_name='Rings', display_order=1)
+            self.purity = CategoryField.objects.create(
+                category=self.rings, field_name='purity', field_label='Purity', field_type='decimal'
+            )
+            self.ring = Product.objects.create(
+                product_name='Ruby Ring', product_weight='3', product_price='1000', product_category=self.rings,
+                product_image='products/ruby.jpg',
+            )
+            ProductFieldValue.objects.create(product=self.ring, category_field=self.purity, field_value='91.6')
+            ProductVariant.objects.create(product=self.ring, variant_value_1='6', price='1000')
+            self.chain = Product.objects.create(product_name='Rope Chain', product_weight='9', product_category=self.rings)
+            self.banner = Banners.objects.create(banner_title='Diwali', banner_product_id=self.ring)
+
+    def _get(self, since=None, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, {'since': since} if since is not None else {}, **headers)
+
+    def test_full_document(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertTrue(data['full'])
+        self.assertEqual(response['ETag'], f'"catalog-{data["version"]}"')
+        self.assertEqual([c['category_name'] for c in data['categories']], ['Rings'])
+        self.assertEqual([f['field_name'] for f in data['categories'][0]['fields']], ['purity'])
+        self.assertEqual([p['id'] for p in data['products']], [self.chain.id, self.ring.id])
+        ring = data['products'][1]
+        self.assertEqual(ring['attributes'], {'purity': 91.6})
+        self.assertEqual([(v['variant_value_1'], v['price']) for v in ring['variants']], [('6', '1000.00')])
+        self.assertEqual(ring['product_image'], 'http://testserver/media/products/ruby.jpg')
+        self.assertEqual(data['banners'][0]['banner_product_id'], self.ring.id)
+
+    def test_not_modified_until_something_changes(self):
+        etag = self._get()['ETag']
+        self.assertEqual(self._get(etag=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chain.product_price = '500'
+            self.chain.save()
+        response = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1)
+    def test_compressed_snapshot_revalidates(self):
+        # CompressionMiddleware weakens the ETag; the weak tag the client sends back still matches
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"catalog-'))
+        again = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+    def test_delta_lists_changed_and_deleted_rows(self):
+        version = self._get().data['version']
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariant.objects.create(product=self.chain, variant_value_1='18')
+            self.client.delete('/app/products/soft_delete/', {'product_ids': [self.ring.id]}, format='json')
+            self.banner.banner_status = False
+            self.banner.save()
+
+        data = self._get(since=version).data
+        self.assertFalse(data['full'])
+        self.assertEqual([p['id'] for p in data['products']], [self.chain.id])
+        self.assertEqual(data['products'][0]['variants'][0]['variant_value_1'], '18')
+        self.assertEqual(data['categories'], [])
+        self.assertEqual(data['deleted'], {'categories': [], 'products': [self.ring.id], 'banners': [self.banner.id]})
+
+        # The cached full document was patched the same way
+        full = self._get().data
+        self.assertEqual(full['version'], data['version'])
+        self.assertEqual([p['id'] for p in full['products']], [self.chain.id])
+        self.assertEqual(full['banners'], [])
+
+    def test_bulk_writes_bump_the_version(self):
+        version = self._get().data['version']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/app/products/{self.chain.id}/variants/bulk/', {
+                'variants': [{'variant_value_1': '20'}, {'variant_value_1': '22'}],
+            }, format='json')
+            self.client.post('/app/product-field-values/bulk_create/', {
+                'product_id': self.ring.id, 'field_values': [{'category_field': self.purity.id, 'field_value': '99.9'}],
+            }, format='json')
+        data = self._get(since=version).data
+        products = {p['id']: p for p in data['products']}
+        self.assertEqual(len(products[self.chain.id]['variants']), 2)
+        self.assertEqual(products[self.ring.id]['attributes'], {'purity': 99.9})
+
+    def test_unknown_since_falls_back_to_full_document(self):
+        version = self._get().data['version']
+        self.assertTrue(self._get(since=version + 100).data['full'])
+        self.assertTrue(self._get(since='abc').data['full'])
+        self.assertFalse(self._get(since=version).data['full'])
+
+    @override_settings(CATALOG_CHANGE_RETENTION_DAYS=30)
+    def test_pruned_log_sends_the_full_document(self):
+        old = self._get().data['version']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chain.product_price = '500'
+            self.chain.save()
+        CatalogChange.objects.filter(id__lte=old).update(created_at=timezone.now() - timezone.timedelta(days=40))
+        self.assertFalse(self._get(since=old - 1).data['full'])
+
+        out = StringIO()
+        call_command('prune_catalog_changes', '--dry-run', stdout=out)
+        self.assertIn(f'would delete: {old - CatalogChange.objects.order_by("id").first().id + 1}', out.getvalue())
+        call_command('prune_catalog_changes', stdout=StringIO())
+        self.assertFalse(CatalogChange.objects.filter(id__lte=old).exists())
+        # The rows after `old` are all still there; the change to `old` itself is gone
+        self.assertFalse(self._get(since=old).data['full'])
+        data = self._get(since=old - 1).data
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['products']), 2)
+
+    def test_prune_keeps_the_version(self):
+        version = self._get().data['version']
+        CatalogChange.objects.update(created_at=timezone.now() - timezone.timedelta(days=400))
+        count = CatalogChange.objects.count()
+        self.assertEqual(prune_catalog_changes(30), count - 1)
+        self.assertEqual(list(CatalogChange.objects.values_list('id', flat=True)), [version])
+        self.assertEqual(self._get().data['version'], version)
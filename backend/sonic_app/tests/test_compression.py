@@ -0,0 +1,77 @@
+"""
+Tests for CompressionMiddleware (gzip/Brotli negotiation, thresholds and pass-through cases).
+"""
+import gzip
+import json
+
+import brotli
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from sonic_app.middleware import choose_encoding
+from sonic_app.models import Category, Product, StoredFile, User
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0, COMPRESSION_MIN_SIZE=1024)
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        rings = Category.objects.create(category_name='Rings')
+        for i in range(15):
+            Product.objects.create(
+                product_name=f'Ruby Ring {i}', product_weight='3', product_category=rings,
+                product_image=f'products/ruby-{i}.jpg',
+            )
+
+    def test_gzip_list(self):
+        plain = self.client.get('/app/products/')
+        response = self.client.get('/app/products/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        # The weakened ETag still validates
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/app/products/', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip').status_code, 304)
+
+    def test_pass_through(self):
+        self.assertNotIn('Content-Encoding', self.client.get('/app/products/'))
+        self.assertNotIn('Content-Encoding', self.client.get('/app/products/', HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0'))
+        small = self.client.get('/app/health', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+        StoredFile.objects.create(name='products/big.png', data=b'\x89PNG' + b'\0' * 5000, content_type='image/png')
+        image = self.client.get('/media/products/big.png', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((image.status_code, image.has_header('Content-Encoding')), (200, False))
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='x'))
+        export = self.client.get('/app/products/export/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(export.streaming)
+        self.assertNotIn('Content-Encoding', export)
+
+    def test_brotli_list(self):
+        plain = self.client.get('/app/products/')
+        response = self.client.get('/app/products/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+    def test_negotiation(self):
+        # Equal q values: Brotli first, whatever order the client lists them in
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(choose_encoding('gzip;q=0.8, br;q=0.8'), 'br')
+        self.assertEqual(choose_encoding('*'), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0.1'), 'gzip')
+        self.assertEqual(choose_encoding('br'), 'br')
+        self.assertIsNone(choose_encoding(''))
+        self.assertIsNone(choose_encoding('identity'))
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_disabled(self):
+        response = self.client.get('/app/products/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(len(json.loads(response.content)['results']), 15)
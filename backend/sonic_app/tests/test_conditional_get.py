@@ -0,0 +1,80 @@
+"""
+Tests for ETag / Last-Modified validators on the ModelViewSets (sonic_app.conditional).
+"""
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from sonic_app.models import CMS, Category, Product, ProductVariant, User
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.rings = Category.objects.create(category_name='Rings')
+        self.ring = Product.objects.create(product_name='Ruby Ring', product_weight='3', product_category=self.rings)
+
+    def test_list_not_modified_until_related_write(self):
+        etag = self.client.get('/app/products/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/app/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        # A variant does not touch the product row but is part of its representation
+        ProductVariant.objects.create(product=self.ring, variant_value_1='6')
+        response = self.client.get('/app/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_follows_filters_and_soft_deletes(self):
+        etag = self.client.get('/app/products/')['ETag']
+        self.assertNotEqual(self.client.get('/app/products/', {'category': self.rings.id + 1})['ETag'], etag)
+        self.client.delete('/app/products/soft_delete/', {'product_ids': [self.ring.id]}, format='json')
+        self.assertEqual(self.client.get('/app/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_last_modified(self):
+        page = CMS.objects.create(cms_title='Terms', cms_slug='terms', cms_content='v1')
+        response = self.client.get('/app/cms/terms/')
+        self.assertEqual(response['Last-Modified'], http_date(page.updated_at.timestamp()))
+        self.assertEqual(
+            self.client.get('/app/cms/terms/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        self.assertEqual(self.client.get('/app/cms/terms/', HTTP_IF_NONE_MATCH=f'W/{response["ETag"]}').status_code, 304)
+
+        CMS.objects.filter(pk=page.pk).update(cms_content='v2')
+        response = self.client.get('/app/cms/terms/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((response.status_code, response.data['cms_content']), (200, 'v2'))
+
+    def test_detail_with_nested_data_has_no_last_modified(self):
+        response = self.client.get(f'/app/products/{self.ring.id}/')
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_missing_row_is_still_404(self):
+        self.assertEqual(self.client.get('/app/products/999999/', HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_list_etag_follows_query_string(self):
+        Product.objects.bulk_create(
+            Product(product_name=f'Band {i}', product_weight='2', product_category=self.rings) for i in range(20)
+        )
+        etag = self.client.get('/app/products/')['ETag']
+        self.assertNotEqual(self.client.get('/app/products/', {'page': 2})['ETag'], etag)
+        self.assertNotEqual(self.client.get('/app/products/', {'fields': 'id'})['ETag'], etag)
+        self.assertEqual(
+            self.client.get('/app/products/', {'a': 1, 'b': 2})['ETag'],
+            self.client.get('/app/products/?b=2&a=1')['ETag'],
+        )
+
+    def test_user_detail_etag_follows_last_login(self):
+        admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.client.force_authenticate(admin)
+        etag = self.client.get(f'/app/users/{admin.id}/')['ETag']
+        update_last_login(None, admin)
+        response = self.client.get(f'/app/users/{admin.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['last_login'])
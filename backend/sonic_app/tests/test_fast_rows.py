@@ -0,0 +1,101 @@
+"""
+Parity tests for the fast list path (sonic_app.rows) and FastJSONRenderer: same bytes as the serializers.
+"""
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from sonic_app.models import (
+    AddToCart, Category, CategoryField, NotificationTable, NotificationType, Order, OrderItem, Product,
+    ProductVariant, User,
+)
+from sonic_app.renderers import FastJSONRenderer, orjson
+from sonic_app.serializers import ProductSerializer
+from sonic_app.rows import row_builder
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastRowsParityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='ananyā', password='x')
+        rings = Category.objects.create(category_name='Rings — सोना ')
+        CategoryField.objects.create(
+            category=rings, field_name='size', field_label='Size', field_type='select', is_variant_dimension=True,
+        )
+        ring = Product.objects.create(
+            product_name='Ruby "Ring"', product_weight='3.5', product_price='1200.5', product_category=rings,
+            product_image='products/ruby.png', product_form_response={'karat': '22K', 'stones': [1, 2]},
+        )
+        loose = Product.objects.create(product_name='Loose stone', product_weight='1')
+        variant = ProductVariant.objects.create(product=ring, variant_value_1='6')
+        for product in (ring, loose):
+            order = Order.objects.create(order_user=self.user, order_product=product, order_price='10.25')
+            OrderItem.objects.create(order=order, product=product, price='10.25')
+        OrderItem.objects.create(order=order, product=ring, product_variant=variant, price='3')
+        AddToCart.objects.create(cart_user=self.user, cart_product=ring, cart_variant=variant)
+        AddToCart.objects.create(cart_user=self.user, cart_product=loose)
+        alerts = NotificationType.objects.create(notif_name='Alerts')
+        NotificationTable.objects.create(
+            notification_user=self.user, notification_type=alerts, notification_title='Hi ✨', notification_message='m',
+        )
+        NotificationTable.objects.create(
+            notification_user=self.user, notification_type=alerts, notification_title='Line\u2028break', notification_message='m',
+        )
+
+    def _both(self, url, **params):
+        with override_settings(FAST_LIST_ROWS=False):
+            slow = self.client.get(url, params)
+        with override_settings(FAST_LIST_ROWS=True):
+            fast = self.client.get(url, params)
+        self.assertEqual((slow.status_code, fast.status_code), (200, 200))
+        return slow, fast
+
+    def assertSameBytes(self, url, compiled=True, **params):
+        slow, fast = self._both(url, **params)
+        # The row path hands the paginator a plain list, the serializer a ReturnList
+        self.assertEqual(type(fast.data['results']) is list, compiled)
+        self.assertEqual(fast.content, slow.content)
+        return slow
+
+    def test_product_grid(self):
+        fields = 'id,product_name,product_price,product_weight,product_image,product_category_name,created_at'
+        data = self.assertSameBytes('/app/products/', fields=fields, ordering='product_name').data['results']
+        self.assertTrue(data[1]['product_image'].startswith('http://testserver/'))
+        # No category: DRF leaves the dotted field out rather than sending null
+        self.assertNotIn('product_category_name', data[0])
+        self.assertSameBytes('/app/products/', expand='')
+
+    def test_orders_cart_and_notifications(self):
+        self.assertSameBytes('/app/orders/', expand='items_count')
+        self.assertSameBytes('/app/cart/', expand='')
+        self.assertSameBytes('/app/notifications/', ordering='created_at')
+
+    def test_nested_fields_keep_serializer_path(self):
+        self.assertIsNone(row_builder(ProductSerializer(context={})))
+        self.assertSameBytes('/app/products/', compiled=False)
+        self.assertSameBytes('/app/orders/', compiled=False)
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_fast_renderer_same_bytes(self):
+        for url, params in [
+            ('/app/products/', {'expand': ''}), ('/app/orders/', {'expand': 'items_count'}),
+            ('/app/cart/', {'expand': ''}), ('/app/notifications/', {'ordering': 'created_at'}),
+        ]:
+            slow, fast = self._both(url, **params)
+            self.assertEqual(
+                FastJSONRenderer().render(fast.data, 'application/json'), JSONRenderer().render(slow.data, 'application/json')
+            )
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_renderer_falls_back_for_what_orjson_refuses(self):
+        data = {'big': 2 ** 70, 1: 'int key', 'line': 'a b'}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
@@ -0,0 +1,82 @@
+"""
+Tests for the per-user unread notification counters (sonic_app.services.UnreadCounter).
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from sonic_app.models import NotificationCounter, NotificationTable, NotificationType, User
+from sonic_app.services import NotificationService, UnreadCounter
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', password='x')
+        self.client.force_authenticate(self.user)
+        self.alerts = NotificationType.objects.create(notif_name='Alerts')
+        NotificationService.send_notification([self.user.id], self.alerts.notif_id, 'one', '')
+        NotificationService.send_notification([self.user.id], self.alerts.notif_id, 'two', '')
+        self.first, self.second = NotificationTable.objects.order_by('id')
+
+    def _count(self):
+        return self.client.get('/app/notifications/unread_count/', {'user_id': self.user.id}).data['unread_count']
+
+    def test_endpoint_reads_the_counter(self):
+        self.assertEqual(self._count(), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._count(), 2)
+        self.assertFalse([q for q in queries.captured_queries if 'sonic_app_notificationtable' in q['sql']])
+        self.assertEqual(self.client.get('/app/notifications/unread_count/').data['unread_count'], 2)
+        self.assertEqual(self.client.get('/app/notifications/unread_count/', {'user_id': 999999}).status_code, 404)
+
+    def test_counter_follows_writes(self):
+        self.assertEqual(self._count(), 2)
+        self.client.patch(f'/app/notifications/{self.first.id}/mark_read/')
+        self.client.patch(f'/app/notifications/{self.first.id}/mark_read/')
+        self.assertEqual(self._count(), 1)
+        NotificationService.send_notification([self.user.id], self.alerts.notif_id, 'three', '')
+        self.assertEqual(self._count(), 2)
+        self.client.delete('/app/notifications/soft_delete/', {'notification_ids': [self.second.id]}, format='json')
+        self.assertEqual(self._count(), 1)
+        self.client.post('/app/notifications/mark_all_read/', {'user_id': self.user.id}, format='json')
+        self.assertEqual(self._count(), 0)
+        NotificationTable.objects.filter(notification_read=True).update(notification_read=False)
+        self.assertEqual(UnreadCounter.recount(self.user.id), 2)
+
+    def test_only_unread_state_changes_recount(self):
+        self.assertEqual(self._count(), 2)
+        notification = NotificationTable.objects.get(pk=self.first.pk)
+        notification.notification_title = 'renamed'
+        with CaptureQueriesContext(connection) as queries:
+            notification.save()
+        self.assertFalse([q for q in queries.captured_queries if 'sonic_app_notificationcounter' in q['sql']])
+        notification.soft_delete()
+        self.assertEqual(self._count(), 1)
+        notification.soft_delete()
+        self.assertEqual(self._count(), 1)
+
+    def test_user_delete_cascades(self):
+        self.assertEqual(self._count(), 2)
+        self.user.delete()
+        self.assertFalse(NotificationCounter.objects.exists())
+
+    def test_mark_read_batch_is_one_update(self):
+        NotificationService.send_notification([self.user.id], self.alerts.notif_id, 'three', '')
+        third = NotificationTable.objects.latest('id')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/app/notifications/mark_read_batch/', {'notification_ids': [self.first.id, third.id, 999999]}, format='json'
+            )
+        self.assertEqual(response.data, {'marked': 2, 'unread_count': 1})
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "sonic_app_notificationtable"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "notification_read" = true, "updated_at" = ', updates[0])
+        self.assertNotIn('"notification_title"', updates[0])
+
+        response = self.client.post('/app/notifications/mark_read_batch/', {'up_to_id': third.id}, format='json')
+        self.assertEqual(response.data, {'marked': 1, 'unread_count': 0})
+        for body in ({}, {'notification_ids': 'all'}, {'notification_ids': list(range(501))}):
+            response = self.client.post('/app/notifications/mark_read_batch/', body, format='json')
+            self.assertEqual(response.status_code, 400)
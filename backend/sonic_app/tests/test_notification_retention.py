@@ -0,0 +1,60 @@
+"""
+Tests for notification archival (sonic_app.retention and the archive_notifications command).
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from sonic_app.models import NotificationArchive, NotificationTable, NotificationType, User
+from sonic_app.services import UnreadCounter
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=30)
+class ArchiveNotificationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='x')
+        self.alerts = NotificationType.objects.create(notif_name='Alerts')
+        self.offers = NotificationType.objects.create(notif_name='Offers', notif_retention_days=7)
+        self.orders = NotificationType.objects.create(notif_name='Orders', notif_retention_days=0)
+        ages = {'old-read': 40, 'old-deleted': 40, 'old-unread': 40, 'new-read': 10}
+        for notification_type in (self.alerts, self.offers, self.orders):
+            for title, days in ages.items():
+                notification = NotificationTable.objects.create(
+                    notification_user=self.user, notification_type=notification_type, notification_title=title,
+                    notification_read=title in ('old-read', 'new-read'),
+                    is_delete=title == 'old-deleted',
+                )
+                NotificationTable.objects.filter(pk=notification.pk).update(
+                    created_at=timezone.now() - timezone.timedelta(days=days)
+                )
+
+    def _titles(self, model, notification_type):
+        return sorted(model.objects.filter(notification_type=notification_type).values_list('notification_title', flat=True))
+
+    def test_moves_expired_read_and_deleted_per_type(self):
+        unread = UnreadCounter.get(self.user.id)
+        out = StringIO()
+        call_command('archive_notifications', '--dry-run', stdout=out)
+        self.assertIn('Total would archive: 5', out.getvalue())
+        self.assertFalse(NotificationArchive.objects.exists())
+
+        call_command('archive_notifications', '--batch-size', '1', stdout=StringIO())
+        # Default 30 days: the 40-day-old read and deleted rows
+        self.assertEqual(self._titles(NotificationArchive, self.alerts), ['old-deleted', 'old-read'])
+        # Own 7 days: the 10-day-old read row too
+        self.assertEqual(self._titles(NotificationArchive, self.offers), ['new-read', 'old-deleted', 'old-read'])
+        # 0 keeps everything
+        self.assertEqual(self._titles(NotificationArchive, self.orders), [])
+        self.assertEqual(self._titles(NotificationTable, self.offers), ['old-unread'])
+
+        archived = NotificationArchive.objects.get(notification_type=self.alerts, notification_title='old-deleted')
+        self.assertTrue(archived.is_delete)
+        self.assertIsNotNone(archived.archived_at)
+        self.assertFalse(NotificationTable.objects.filter(pk=archived.pk).exists())
+        self.assertEqual(UnreadCounter.recount(self.user.id), unread)
+
+    def test_days_option_for_types_without_policy(self):
+        call_command('archive_notifications', '--days', '5', stdout=StringIO())
+        self.assertEqual(self._titles(NotificationArchive, self.alerts), ['new-read', 'old-deleted', 'old-read'])
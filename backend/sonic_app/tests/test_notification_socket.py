@@ -0,0 +1,205 @@
+"""
+Tests for the notifications WebSocket (sonic_app.consumers) and its Bearer token handshake.
+"""
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from sonic_app import presence
+from sonic_app.auth import BearerTokenAuthMiddleware
+from sonic_app.consumers import IDLE_CLOSE_CODE
+from sonic_app.models import NotificationTable, NotificationType, Session, User
+from sonic_app.routing import websocket_urlpatterns
+from sonic_app.services import NotificationService
+
+application = AuthMiddlewareStack(BearerTokenAuthMiddleware(URLRouter(websocket_urlpatterns)))
+
+
+class NotificationSocketTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='buyer', password='x')
+        Session.objects.create(
+            session_user=self.user, session_key='s1', auth_token='good-token',
+            expire_date=timezone.now() + timezone.timedelta(days=1),
+        )
+
+    async def _connect(self, path='/ws/notifications/', subprotocols=None):
+        communicator = WebsocketCommunicator(application, path, subprotocols=subprotocols)
+        connected, subprotocol = await communicator.connect()
+        return communicator, connected, subprotocol
+
+    async def test_query_string_token(self):
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['type'], 'connection_established')
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 0})
+        await communicator.send_json_to({'type': 'ping', 'timestamp': 1})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong', 'timestamp': 1})
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), {self.user.id})
+        await communicator.disconnect()
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), set())
+
+    async def test_presence_per_socket(self):
+        first, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        second, _, _ = await self._connect('/ws/notifications/?token=good-token')
+        for communicator in (first, second):
+            # connection_established, unread_count
+            await communicator.receive_json_from()
+            await communicator.receive_json_from()
+        # Closing one of the user's sockets leaves them online
+        await first.disconnect()
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), {self.user.id})
+        await second.disconnect()
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), set())
+
+    async def test_any_message_keeps_user_online(self):
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        # connection_established, unread_count
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+        # The entry lapsed (evicted); the next frame of any kind puts it back
+        await sync_to_async(cache.delete)(f'presence:{self.user.id}')
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), set())
+        with mock.patch.object(presence, 'PRESENCE_GRACE', 0):
+            await communicator.send_json_to({'type': 'replay_next'})
+            self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), {self.user.id})
+        await communicator.disconnect()
+        self.assertEqual(await sync_to_async(presence.online_user_ids)([self.user.id]), set())
+
+    def test_presence_outlasts_idle_timeout(self):
+        with override_settings(WEBSOCKET_IDLE_TIMEOUT=300):
+            self.assertEqual(presence.presence_timeout(), 300 + presence.PRESENCE_GRACE)
+        with override_settings(WEBSOCKET_IDLE_TIMEOUT=0):
+            self.assertEqual(presence.presence_timeout(), presence.PRESENCE_FLOOR)
+
+    async def test_subprotocol_token_is_echoed(self):
+        communicator, connected, subprotocol = await self._connect(subprotocols=['bearer', 'good-token'])
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'bearer')
+        await communicator.disconnect()
+
+    async def test_anonymous_and_bad_tokens_rejected(self):
+        for path in ('/ws/notifications/', '/ws/notifications/?token=bad-token'):
+            communicator, connected, _ = await self._connect(path)
+            self.assertFalse(connected)
+
+    @override_settings(WEBSOCKET_IDLE_TIMEOUT=0.2)
+    async def test_idle_socket_closed(self):
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        # connection_established, unread_count
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+        await asyncio.sleep(0.1)
+        await communicator.send_json_to({'type': 'ping'})
+        await communicator.receive_json_from()
+        # The ping reset the timer; silence after it closes the socket
+        self.assertEqual(await communicator.receive_output(timeout=1), {'type': 'websocket.close', 'code': IDLE_CLOSE_CODE})
+
+    def _notifications(self):
+        alerts = NotificationType.objects.create(notif_name='Alerts')
+        other = User.objects.create_user(username='other', password='x')
+        NotificationTable.objects.create(notification_user=other, notification_type=alerts, notification_title='theirs')
+        return [
+            NotificationTable.objects.create(
+                notification_user=self.user, notification_type=alerts, notification_title=f'n{i}',
+                is_delete=i == 3,
+            ).id
+            for i in range(8)
+        ]
+
+    @override_settings(NOTIFICATION_REPLAY_BATCH_SIZE=2, NOTIFICATION_REPLAY_MAX=5)
+    async def test_replay_after_last_seen_id(self):
+        ids = await database_sync_to_async(self._notifications)()
+        communicator, connected, _ = await self._connect(f'/ws/notifications/?token=good-token&last_seen_id={ids[0]}')
+        self.assertTrue(connected)
+        # connection_established, unread_count
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+        batches = []
+        while True:
+            batch = await communicator.receive_json_from()
+            batches.append(batch)
+            if not batch['more']:
+                break
+            # Nothing more is sent until the client asks for it
+            self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+            await communicator.send_json_to({'type': 'replay_next'})
+        titles = [[n['title'] for n in batch['notifications']] for batch in batches]
+        # Soft-deleted n3 and the other user's notification are skipped; the cap stops after 5
+        self.assertEqual(titles, [['n1', 'n2'], ['n4', 'n5'], ['n6']])
+        self.assertEqual((batches[-1]['last_id'], batches[-1]['truncated']), (ids[6], True))
+
+        # The app reloads, then resumes from the newest id it has
+        await communicator.send_json_to({'type': 'replay', 'last_seen_id': ids[6]})
+        batch = await communicator.receive_json_from()
+        self.assertEqual([n['id'] for n in batch['notifications']], [ids[7]])
+        self.assertEqual((batch['last_id'], batch['more'], batch['truncated']), (ids[7], False, False))
+        await communicator.disconnect()
+
+    async def test_unread_count_pushed(self):
+        ids = await database_sync_to_async(self._notifications)()
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 7})
+        await communicator.send_json_to({'type': 'mark_read', 'notification_id': ids[0]})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'marked_read', 'notification_id': ids[0]})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 6})
+        # Already read: acknowledged, count unchanged
+        await communicator.send_json_to({'type': 'mark_read', 'notification_id': ids[0]})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'marked_read', 'notification_id': ids[0]})
+        self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+        await communicator.disconnect()
+
+    async def test_mark_read_batch(self):
+        ids = await database_sync_to_async(self._notifications)()
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        # connection_established, unread_count
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+        await communicator.send_json_to({'type': 'mark_read_batch', 'up_to_id': ids[2]})
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {'type': 'marked_read_batch', 'notification_ids': None, 'up_to_id': ids[2], 'marked': 3},
+        )
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 4})
+        await communicator.send_json_to({'type': 'mark_read_batch', 'notification_ids': [ids[0], ids[4]]})
+        self.assertEqual((await communicator.receive_json_from())['marked'], 1)
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 3})
+        await communicator.send_json_to({'type': 'mark_read_batch'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+        await communicator.disconnect()
+
+    async def test_broadcast_reaches_every_socket_once(self):
+        alerts = await database_sync_to_async(NotificationType.objects.create)(notif_name='Alerts')
+        communicator, connected, _ = await self._connect('/ws/notifications/?token=good-token')
+        self.assertTrue(connected)
+        # connection_established, unread_count
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+        await database_sync_to_async(NotificationService.send_notification_to_all)(alerts.notif_id, 'Sale', 'm')
+        message = await communicator.receive_json_from()
+        self.assertEqual((message['type'], message['notification']['title']), ('notification', 'Sale'))
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 1})
+        # The socket adds the event's delta to the count it last sent
+        await database_sync_to_async(NotificationService.send_notification_to_all)(alerts.notif_id, 'Sale 2', 'm')
+        await communicator.receive_json_from()
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'unread_count': 2})
+        await database_sync_to_async(NotificationService.send_notification_to_all)(
+            alerts.notif_id, 'Not for you', 'm', exclude_ids=[self.user.id]
+        )
+        self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+        await communicator.disconnect()
@@ -0,0 +1,107 @@
+"""
+Tests for attribute filters (attr.*) and facet counts (/app/products/facets/).
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from sonic_app.models import Category, CategoryField, Product, ProductFieldValue, ProductVariant
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = '/app/products/'
+        self.facets_url = '/app/products/facets/'
+        self.rings = Category.objects.create(category_name='Rings')
+        self.stone = CategoryField.objects.create(
+            category=self.rings, field_name='stone_type', field_label='Stone', field_type='select'
+        )
+        self.purity = CategoryField.objects.create(
+            category=self.rings, field_name='purity', field_label='Purity', field_type='decimal'
+        )
+        self.hallmarked = CategoryField.objects.create(
+            category=self.rings, field_name='hallmarked', field_label='Hallmarked', field_type='boolean'
+        )
+        CategoryField.objects.create(
+            category=self.rings, field_name='size', field_label='Size', field_type='select',
+            is_variant_dimension=True, variant_order=0,
+        )
+        self.ruby = self._product('Ruby Ring', stone_type='Ruby', purity='91.6', hallmarked='true', sizes=['6', '7'])
+        self.diamond = self._product('Diamond Ring', stone_type='Diamond', purity='75', hallmarked='false', sizes=['7'])
+        self.plain = self._product('Plain Band', stone_type='Ruby', purity='99.9', hallmarked='true', sizes=['8'])
+
+    def _product(self, name, sizes, **values):
+        product = Product.objects.create(product_name=name, product_weight='3', product_category=self.rings)
+        fields = {'stone_type': self.stone, 'purity': self.purity, 'hallmarked': self.hallmarked}
+        for field_name, value in values.items():
+            ProductFieldValue.objects.create(product=product, category_field=fields[field_name], field_value=value)
+        for size in sizes:
+            ProductVariant.objects.create(product=product, variant_value_1=size)
+        return product
+
+    def _names(self, params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(p['product_name'] for p in response.data['results'])
+
+    def test_attributes_are_typed(self):
+        self.ruby.refresh_from_db()
+        self.assertEqual(self.ruby.attributes, {'stone_type': 'Ruby', 'purity': 91.6, 'hallmarked': True})
+
+    def test_equality_and_multi_value_filters(self):
+        self.assertEqual(self._names({'attr.stone_type': 'Ruby'}), ['Plain Band', 'Ruby Ring'])
+        self.assertEqual(self._names({'attr.stone_type': 'Ruby,Diamond'}), ['Diamond Ring', 'Plain Band', 'Ruby Ring'])
+        self.assertEqual(self._names({'attr.hallmarked': 'false'}), ['Diamond Ring'])
+
+    def test_numeric_range_filters(self):
+        self.assertEqual(self._names({'attr.purity.min': '90'}), ['Plain Band', 'Ruby Ring'])
+        self.assertEqual(self._names({'attr.purity.min': '90', 'attr.purity.max': '95'}), ['Ruby Ring'])
+
+    def test_variant_dimension_filter(self):
+        self.assertEqual(self._names({'attr.size': '7'}), ['Diamond Ring', 'Ruby Ring'])
+        self.assertEqual(self._names({'attr.size': '7', 'attr.stone_type': 'Ruby'}), ['Ruby Ring'])
+
+    def test_unknown_attribute_is_ignored(self):
+        self.assertEqual(len(self._names({'attr.colour': 'red'})), 3)
+
+    def test_attributes_follow_field_value_changes(self):
+        value = ProductFieldValue.objects.get(product=self.diamond, category_field=self.stone)
+        value.field_value = 'Ruby'
+        value.save()
+        self.assertEqual(self._names({'attr.stone_type': 'Ruby'}), ['Diamond Ring', 'Plain Band', 'Ruby Ring'])
+        value.delete()
+        self.assertEqual(self._names({'attr.stone_type': 'Ruby'}), ['Plain Band', 'Ruby Ring'])
+
+    def test_facet_counts(self):
+        response = self.client.get(self.facets_url, {'category': self.rings.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        facets = {f['field_name']: f for f in response.data['facets']}
+        self.assertEqual(facets['stone_type']['values'], [{'value': 'Ruby', 'count': 2}, {'value': 'Diamond', 'count': 1}])
+        self.assertEqual(facets['size']['values'], [{'value': '7', 'count': 2}, {'value': '6', 'count': 1}, {'value': '8', 'count': 1}])
+        self.assertEqual((facets['purity']['min'], facets['purity']['max']), (75.0, 99.9))
+
+    def test_facet_counts_respect_filters(self):
+        response = self.client.get(self.facets_url, {'attr.stone_type': 'Ruby'})
+        self.assertEqual(response.data['count'], 2)
+        facets = {f['field_name']: f for f in response.data['facets']}
+        self.assertEqual(facets['stone_type']['values'], [{'value': 'Ruby', 'count': 2}])
+        self.assertEqual(facets['hallmarked']['values'], [{'value': 'true', 'count': 2}])
+
+    def test_field_typed_per_category(self):
+        bangles = Category.objects.create(category_name='Bangles')
+        text_purity = CategoryField.objects.create(
+            category=bangles, field_name='purity', field_label='Purity', field_type='text'
+        )
+        bangle = Product.objects.create(product_name='Gold Bangle', product_weight='9', product_category=bangles)
+        ProductFieldValue.objects.create(product=bangle, category_field=text_purity, field_value='91.6')
+        self.assertEqual(self._names({'attr.purity': '91.6'}), ['Gold Bangle', 'Ruby Ring'])
+        self.assertEqual(self._names({'attr.purity.min': '90'}), ['Plain Band', 'Ruby Ring'])
+
+    def test_numeric_facet_groups_equal_numbers(self):
+        value = ProductFieldValue.objects.get(product=self.plain, category_field=self.purity)
+        value.field_value = '91.60'
+        value.save()
+        response = self.client.get(self.facets_url, {'category': self.rings.id})
+        facets = {f['field_name']: f for f in response.data['facets']}
+        self.assertEqual(facets['purity']['values'], [{'value': '91.6', 'count': 2}, {'value': '75', 'count': 1}])
@@ -0,0 +1,92 @@
+"""
+Tests for the set-based /app/product-field-values/bulk_create/ endpoint.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from sonic_app.models import Category, CategoryField, Product, ProductFieldValue
+
+
+class ProductFieldValueBulkCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/app/product-field-values/bulk_create/'
+        self.rings = Category.objects.create(category_name='Rings')
+        self.chains = Category.objects.create(category_name='Chains')
+        self.fields = [
+            CategoryField.objects.create(
+                category=self.rings, field_name=f'field_{i}', field_label=f'Field {i}', field_type='text'
+            )
+            for i in range(10)
+        ]
+        self.purity = CategoryField.objects.create(
+            category=self.rings, field_name='purity', field_label='Purity', field_type='decimal'
+        )
+        self.length = CategoryField.objects.create(
+            category=self.chains, field_name='length', field_label='Length', field_type='number'
+        )
+        self.ring = Product.objects.create(product_name='Ruby Ring', product_weight='3', product_category=self.rings)
+        self.other_ring = Product.objects.create(product_name='Opal Ring', product_weight='3', product_category=self.rings)
+        self.chain = Product.objects.create(product_name='Rope Chain', product_weight='9', product_category=self.chains)
+
+    def _post(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_creates_then_updates(self):
+        response = self._post({'product_id': self.ring.id, 'field_values': [
+            {'category_field': self.purity.id, 'field_value': '91.6'},
+            {'category_field': self.fields[0].id, 'field_value': 'Ruby'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((len(response.data['created']), response.data['updated']), (2, []))
+        purity = ProductFieldValue.objects.get(product=self.ring, category_field=self.purity)
+        self.assertEqual(purity.value_number, Decimal('91.6'))
+
+        response = self._post({'product_id': self.ring.id, 'field_values': [
+            {'category_field': self.purity.id, 'field_value': '99.9'},
+        ]})
+        self.assertEqual((response.data['created'], response.data['updated']), ([], [purity.id]))
+        purity.refresh_from_db()
+        self.assertEqual((purity.field_value, purity.value_number), ('99.9', Decimal('99.9')))
+        self.ring.refresh_from_db()
+        self.assertEqual(self.ring.attributes, {'purity': 99.9, 'field_0': 'Ruby'})
+
+    def test_several_products_in_one_call(self):
+        response = self._post({'field_values': [
+            {'product': self.ring.id, 'category_field': self.fields[0].id, 'field_value': 'a'},
+            {'product': self.other_ring.id, 'category_field': self.fields[0].id, 'field_value': 'b'},
+            {'product': self.chain.id, 'category_field': self.length.id, 'field_value': '18'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProductFieldValue.objects.count(), 3)
+        self.chain.refresh_from_db()
+        self.assertEqual(self.chain.attributes, {'length': 18})
+
+    def test_rejects_field_from_another_category_and_saves_nothing(self):
+        response = self._post({'product_id': self.ring.id, 'field_values': [
+            {'category_field': self.fields[0].id, 'field_value': 'ok'},
+            {'category_field': self.length.id, 'field_value': '18'},
+            {'category_field': self.purity.id, 'field_value': 'pure'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2])
+        self.assertFalse(ProductFieldValue.objects.exists())
+
+    def test_requires_product(self):
+        response = self._post({'field_values': [{'category_field': self.fields[0].id, 'field_value': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_does_not_grow_with_values(self):
+        def post(count):
+            with CaptureQueriesContext(connection) as queries:
+                response = self._post({'product_id': self.ring.id, 'field_values': [
+                    {'category_field': field.id, 'field_value': 'v'} for field in self.fields[:count]
+                ]})
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        self.assertEqual(post(2), post(10))
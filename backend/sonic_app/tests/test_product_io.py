@@ -0,0 +1,170 @@
+"""
+Tests for bulk product import (/app/products/import/) and export (/app/products/export/).
+"""
+import csv
+import io
+import warnings
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from openpyxl import Workbook, load_workbook
+from rest_framework.test import APIClient
+
+from sonic_app.models import Category, CategoryField, Product, ProductFieldValue, ProductVariant, User
+from sonic_app.product_io import ProductImporter, read_rows
+
+CSV_HEADER = 'product_id,product_name,category,product_description,product_price,product_weight,product_status,' \
+             'variant_value_1,variant_value_2,variant_price,attr.purity,attr.stone_type\n'
+
+
+class ProductImportExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        self.rings = Category.objects.create(category_name='Rings')
+        CategoryField.objects.create(category=self.rings, field_name='purity', field_label='Purity', field_type='decimal')
+        CategoryField.objects.create(category=self.rings, field_name='stone_type', field_label='Stone', field_type='text')
+
+    def _import(self, content, name='products.csv'):
+        upload = SimpleUploadedFile(name, content.encode() if isinstance(content, str) else content)
+        return self.client.post('/app/products/import/', {'file': upload}, format='multipart')
+
+    def _export(self, **params):
+        response = self.client.get('/app/products/export/', params)
+        self.assertEqual(response.status_code, 200)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # async (ASGI) streaming body consumed by the sync test client
+            return b''.join(response)
+
+    def test_import_creates_products_variants_and_field_values(self):
+        response = self._import(CSV_HEADER + (
+            ',Ruby Ring,Rings,Red stone,1200,3.5,true,6,,1250,91.6,Ruby\n'
+            ',Ruby Ring,Rings,Red stone,1200,3.5,true,7,,1300,91.6,Ruby\n'
+            ',Plain Band,rings,,800,2,false,,,,75,\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual((response.data['products_created'], response.data['variants_created']), (2, 2))
+        ruby = Product.objects.get(product_name='Ruby Ring')
+        self.assertEqual(ruby.product_category, self.rings)
+        self.assertEqual(
+            list(ruby.variants.values_list('variant_value_1', 'price')),
+            [('6', Decimal('1250.00')), ('7', Decimal('1300.00'))],
+        )
+        self.assertEqual(ruby.attributes, {'purity': 91.6, 'stone_type': 'Ruby'})
+        self.assertEqual(ProductFieldValue.objects.get(product=ruby, category_field__field_name='purity').value_number, Decimal('91.6'))
+        self.assertFalse(Product.objects.get(product_name='Plain Band').product_status)
+        self.assertEqual(Product.objects.filter(search_vector__isnull=True).count(), 0)
+
+    def test_reimport_updates_by_name_instead_of_duplicating(self):
+        self._import(CSV_HEADER + ',Ruby Ring,Rings,,1200,3.5,true,6,,1250,91.6,Ruby\n')
+        response = self._import(CSV_HEADER + ',Ruby Ring,Rings,,1500,3.5,true,6,,1600,92,Ruby\n')
+        self.assertEqual((response.data['products_created'], response.data['products_updated']), (0, 1))
+        self.assertEqual(response.data['variants_updated'], 1)
+        ruby = Product.objects.get()
+        self.assertEqual(ruby.product_price, Decimal('1500.00'))
+        self.assertEqual(ruby.variants.get().price, Decimal('1600.00'))
+        self.assertEqual(ruby.attributes['purity'], 92)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self._import(CSV_HEADER + (
+            ',Good Ring,Rings,,100,1,true,,,,90,\n'
+            ',Bad Ring,Rings,,cheap,1,true,,,,high,\n'
+            ',Lost Ring,Bangles,,100,1,true,,,,,\n'
+            ',No Weight,Rings,,100,,true,,,,,\n'
+            '999,Ghost,Rings,,100,1,true,,,,,\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Product.objects.values_list('product_name', flat=True)), ['Good Ring'])
+        errors = {(e['row'], e['error']) for e in response.data['errors']}
+        self.assertIn((3, 'product_price must be a number.'), errors)
+        self.assertIn((3, 'purity must be a number.'), errors)
+        self.assertIn((4, 'Unknown category "Bangles".'), errors)
+        self.assertIn((5, 'product_weight is required for new products.'), errors)
+        self.assertIn((6, 'Product 999 does not exist.'), errors)
+
+    def test_import_spans_chunks(self):
+        rows = ''.join(f',Ring {i},Rings,,100,1,true,{size},,,,\n' for i in range(5) for size in ('6', '7'))
+        summary = ProductImporter(chunk_size=2).run(read_rows(io.BytesIO((CSV_HEADER + rows).encode()), 'csv'))
+        self.assertEqual((summary['products_created'], summary['variants_created']), (5, 10))
+
+    def test_rejects_unreadable_file(self):
+        self.assertEqual(self._import('name,price\nx,1\n').status_code, 400)
+        self.assertEqual(self._import(b'not a zip', name='products.xlsx').status_code, 400)
+        self.assertEqual(self._import('x', name='products.txt').status_code, 400)
+
+    def test_csv_export_round_trip(self):
+        self._import(CSV_HEADER + (
+            ',Ruby Ring,Rings,Red stone,1200,3.5,true,6,,1250,91.6,Ruby\n'
+            ',Ruby Ring,Rings,Red stone,1200,3.5,true,7,,1300,91.6,Ruby\n'
+            ',Plain Band,Rings,,800,2,true,,,,75,\n'
+        ))
+        content = self._export()
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['attr.stone_type'], 'Ruby')
+        self.assertEqual(rows[1]['variant_value_1'], '7')
+        response = self._import(content.decode())
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual((response.data['products_created'], response.data['products_updated']), (0, 2))
+        self.assertEqual(ProductVariant.objects.count(), 2)
+
+    def test_xlsx_export_round_trip(self):
+        self._import(CSV_HEADER + ',Ruby Ring,Rings,,1200,3.5,true,6,,1250,91.6,Ruby\n')
+        content = self._export(file_format='xlsx')
+        sheet = load_workbook(io.BytesIO(content), read_only=True).worksheets[0]
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[1][1], 'Ruby Ring')
+        response = self._import(content, name='products.xlsx')
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(response.data['products_updated'], 1)
+
+    def test_requires_authentication(self):
+        client = APIClient()
+        self.assertIn(client.get('/app/products/export/').status_code, (401, 403))
+
+    def test_import_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='customer', password='pass'))
+        upload = SimpleUploadedFile('products.csv', CSV_HEADER.encode())
+        self.assertEqual(client.post('/app/products/import/', {'file': upload}, format='multipart').status_code, 403)
+
+    def test_values_that_do_not_fit_are_row_errors(self):
+        long_name = 'R' * 256
+        response = self._import(CSV_HEADER + (
+            ',Good Ring,Rings,,100,1,true,,,,,\n'
+            ',NaN Ring,Rings,,NaN,1,true,,,,,\n'
+            ',Infinite Ring,Rings,,100,Infinity,true,,,,,\n'
+            ',Huge Ring,Rings,,1e30,1,true,,,,,\n'
+            ',Fine Ring,Rings,,100.125,1,true,,,,,\n'
+            f',{long_name},Rings,,100,1,true,,,,,\n'
+            f',Long Size,Rings,,100,1,true,{"6" * 256},,1e30,,\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Product.objects.values_list('product_name', flat=True)), ['Good Ring'])
+        errors = {(e['row'], e['error']) for e in response.data['errors']}
+        self.assertIn((3, 'product_price must be a number.'), errors)
+        self.assertIn((4, 'product_weight must be a number.'), errors)
+        self.assertIn((5, 'product_price: Ensure that there are no more than 10 digits in total.'), errors)
+        self.assertIn((6, 'product_price: Ensure that there are no more than 2 decimal places.'), errors)
+        self.assertIn((7, 'product_name must be at most 255 characters.'), errors)
+        self.assertIn((8, 'variant_value_1 must be at most 255 characters.'), errors)
+        self.assertIn((8, 'variant_price: Ensure that there are no more than 10 digits in total.'), errors)
+
+    def test_spreadsheet_float_ids_update_the_product(self):
+        self._import(CSV_HEADER + ',Ruby Ring,Rings,,1200,3.5,true,6,,1250,91.6,Ruby\n')
+        ruby = Product.objects.get()
+        workbook = Workbook()
+        workbook.active.append(CSV_HEADER.strip().split(','))
+        workbook.active.append([float(ruby.id), 'Ruby Ring', float(self.rings.id), '', 1500.0, 3.5, 'true', 6.0])
+        content = io.BytesIO()
+        workbook.save(content)
+        response = self._import(content.getvalue(), name='products.xlsx')
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual((response.data['products_created'], response.data['products_updated']), (0, 1))
+        self.assertEqual(response.data['variants_updated'], 1)
+        self.assertEqual(Product.objects.get().product_price, Decimal('1500.00'))
+
+        response = self._import(CSV_HEADER + f'{ruby.id}.0,Ruby Ring,Rings,,1600,3.5,true,,,,,\n')
+        self.assertEqual((response.data['products_created'], response.data['products_updated']), (0, 1))
@@ -0,0 +1,68 @@
+"""
+Tests for ranked product search (/app/products/search/).
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from sonic_app.models import Category, CategoryField, Product, ProductFieldValue
+from sonic_app.search import trigram_enabled
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/app/products/search/'
+        self.rings = Category.objects.create(category_name='Rings')
+        self.necklaces = Category.objects.create(category_name='Necklace')
+        self.karat = CategoryField.objects.create(
+            category=self.rings, field_name='karat', field_label='Karat', field_type='text'
+        )
+        self.solitaire = Product.objects.create(
+            product_name='Solitaire Gold Ring', product_description='Classic band',
+            product_weight='3.5', product_category=self.rings,
+        )
+        self.temple = Product.objects.create(
+            product_name='Temple Necklace', product_description='Goes well with a gold ring',
+            product_weight='20', product_category=self.necklaces,
+        )
+        self.hidden = Product.objects.create(
+            product_name='Hidden Gold Ring', product_weight='2', product_category=self.rings, product_status=False,
+        )
+
+    def _names(self, response):
+        return [p['product_name'] for p in response.data['results']]
+
+    def test_requires_query(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_name_match_ranks_above_description_match(self):
+        response = self.client.get(self.url, {'q': 'gold ring'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._names(response), ['Solitaire Gold Ring', 'Temple Necklace'])
+
+    def test_prefix_match_and_stemming(self):
+        response = self.client.get(self.url, {'q': 'solit'})
+        self.assertEqual(self._names(response), ['Solitaire Gold Ring'])
+        response = self.client.get(self.url, {'q': 'rings'})
+        self.assertIn('Solitaire Gold Ring', self._names(response))
+
+    def test_matches_category_name_and_field_values(self):
+        ProductFieldValue.objects.create(product=self.solitaire, category_field=self.karat, field_value='22K')
+        self.assertEqual(self._names(self.client.get(self.url, {'q': '22k'})), ['Solitaire Gold Ring'])
+        self.assertEqual(self._names(self.client.get(self.url, {'q': 'necklace'})), ['Temple Necklace'])
+
+    def test_vector_follows_category_rename(self):
+        self.rings.category_name = 'Bands'
+        self.rings.save()
+        self.assertEqual(self._names(self.client.get(self.url, {'q': 'bands'})), ['Solitaire Gold Ring'])
+
+    def test_respects_category_filter_and_excludes_inactive(self):
+        response = self.client.get(self.url, {'q': 'gold', 'category': self.rings.id})
+        self.assertEqual(self._names(response), ['Solitaire Gold Ring'])
+
+    def test_typo_tolerance(self):
+        if not trigram_enabled():
+            self.skipTest('pg_trgm not installed')
+        response = self.client.get(self.url, {'q': 'solitare'})
+        self.assertIn('Solitaire Gold Ring', self._names(response))
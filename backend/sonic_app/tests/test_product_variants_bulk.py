@@ -0,0 +1,84 @@
+"""
+Tests for the set-based /app/products/<id>/variants/bulk/ endpoint.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from sonic_app.models import AddToCart, Category, Product, ProductVariant, User
+
+
+class ProductVariantBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(category_name='Rings')
+        self.product = Product.objects.create(product_name='Band', product_weight='3', product_category=self.category)
+        self.url = f'/app/products/{self.product.id}/variants/bulk/'
+
+    def _post(self, variants, **extra):
+        return self.client.post(self.url, {'variants': variants, **extra}, format='json')
+
+    def _values(self):
+        return list(ProductVariant.objects.filter(product=self.product).values_list(
+            'variant_value_1', 'variant_value_2', 'price', 'display_order'
+        ))
+
+    def test_creates_matrix_with_prices(self):
+        response = self._post([
+            {'variant_value_1': '6', 'variant_value_2': '18K', 'price': '1000'},
+            {'variant_value_1': '6', 'variant_value_2': '22K', 'price': '1200'},
+            {'variant_value_1': ' 7 '},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertNotIn('product', response.data)
+        self.assertEqual(self._values(), [
+            ('6', '18K', Decimal('1000.00'), 0), ('6', '22K', Decimal('1200.00'), 1), ('7', None, None, 2),
+        ])
+
+    def test_updates_price_and_order_and_reports_diff(self):
+        self._post([{'variant_value_1': '6', 'price': '1000'}, {'variant_value_1': '7', 'price': '1100'}])
+        seven = ProductVariant.objects.get(variant_value_1='7')
+        response = self._post([
+            {'variant_value_1': '6'},
+            {'variant_value_1': '7', 'price': '1150', 'display_order': 5},
+            {'variant_value_1': '8', 'price': '1300'},
+        ])
+        self.assertEqual(response.data['updated'], [seven.id])
+        self.assertEqual(len(response.data['unchanged']), 1)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual(response.data['deleted'], [])
+        self.assertEqual(self._values(), [
+            ('6', None, Decimal('1000.00'), 0), ('8', None, Decimal('1300.00'), 2), ('7', None, Decimal('1150.00'), 5),
+        ])
+
+    def test_delete_missing(self):
+        self._post([{'variant_value_1': '6'}, {'variant_value_1': '7'}])
+        seven = ProductVariant.objects.get(variant_value_1='7')
+        user = User.objects.create_user(username='buyer', password='x')
+        cart = AddToCart.objects.create(cart_user=user, cart_product=self.product, cart_variant=seven)
+        response = self._post([{'variant_value_1': '6'}], delete_missing=True)
+        self.assertEqual(response.data['deleted'], [seven.id])
+        self.assertEqual([v[0] for v in self._values()], ['6'])
+        cart.refresh_from_db()
+        self.assertIsNone(cart.cart_variant)
+
+    def test_rejects_invalid_price(self):
+        response = self._post([{'variant_value_1': '6', 'price': 'cheap'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProductVariant.objects.exists())
+
+    def test_unique_constraint_covers_single_dimension(self):
+        ProductVariant.objects.create(product=self.product, variant_value_1='6')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductVariant.objects.create(product=self.product, variant_value_1='6')
+
+    def test_single_write_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._post([{'variant_value_1': str(size), 'variant_value_2': karat} for size in range(5, 15) for karat in ('18K', '22K')])
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "sonic_app_product_variant"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ProductVariant.objects.count(), 20)
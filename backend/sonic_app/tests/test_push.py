@@ -0,0 +1,111 @@
+"""
+Tests for push delivery to offline users (sonic_app.push) with the in-memory transport.
+"""
+import sys
+import threading
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from sonic_app import presence, push
+from sonic_app.models import BroadcastNotification, NotificationType, Session, User
+from sonic_app.push import LocalPushTransport
+from sonic_app.services import NotificationService
+
+
+class TwoTokenTransport(LocalPushTransport):
+    max_batch_size = 2
+
+
+@override_settings(PUSH_TRANSPORT='sonic_app.push.LocalPushTransport', PUSH_IN_BACKGROUND=False)
+class PushDeliveryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        LocalPushTransport.sent.clear()
+        LocalPushTransport.invalid_tokens = {'stale'}
+        self.addCleanup(setattr, LocalPushTransport, 'invalid_tokens', set())
+        self.alerts = NotificationType.objects.create(notif_name='Alerts')
+        self.users = {}
+        tokens = {'offline': ['phone', 'tablet', 'stale'], 'online': ['online-phone'], 'expired': ['old-phone']}
+        for username, user_tokens in tokens.items():
+            user = self.users[username] = User.objects.create_user(username=username, password='x')
+            days = -1 if username == 'expired' else 30
+            for token in user_tokens:
+                Session.objects.create(
+                    session_user=user, session_key=f'{username}-{token}', fcm_token=token,
+                    expire_date=timezone.now() + timezone.timedelta(days=days),
+                )
+        presence.socket_opened(self.users['online'].id, 'online-socket')
+
+    def _tokens_sent(self):
+        return sorted(token for message in LocalPushTransport.sent for token in message['tokens'])
+
+    def test_pushes_offline_users_and_prunes_invalid_tokens(self):
+        NotificationService.send_notification(
+            [user.id for user in self.users.values()], self.alerts.notif_id, 'Order shipped', 'On its way'
+        )
+        self.assertEqual(self._tokens_sent(), ['phone', 'stale', 'tablet'])
+        message = LocalPushTransport.sent[0]
+        self.assertEqual((message['title'], message['body'], message['data']), ('Order shipped', 'On its way', {'type': 'Alerts'}))
+        self.assertEqual(Session.objects.get(session_key='offline-stale').fcm_token, None)
+        self.assertEqual(Session.objects.get(session_key='offline-phone').fcm_token, 'phone')
+
+        # The socket closed: the user gets pushes again
+        presence.socket_closed(self.users['online'].id, 'online-socket')
+        LocalPushTransport.sent.clear()
+        NotificationService.send_notification([self.users['online'].id], self.alerts.notif_id, 'Hi', '')
+        self.assertEqual(self._tokens_sent(), ['online-phone'])
+
+    def test_channel_layer_only_for_online_users(self):
+        with mock.patch.object(get_channel_layer(), 'group_send', new_callable=mock.AsyncMock) as group_send:
+            NotificationService.send_notification(
+                [user.id for user in self.users.values()], self.alerts.notif_id, 'Order shipped', 'On its way'
+            )
+        groups = [call.args[0] for call in group_send.call_args_list]
+        online = f"notifications_{self.users['online'].id}"
+        # The notification and the new badge count
+        self.assertEqual(groups, [online, online])
+        self.assertEqual(self._tokens_sent(), ['phone', 'stale', 'tablet'])
+
+    @override_settings(PUSH_TRANSPORT='sonic_app.tests.test_push.TwoTokenTransport')
+    def test_broadcast_pushes_in_batches(self):
+        NotificationService.send_notification_to_all(self.alerts.notif_id, 'Sale', 'm')
+        self.assertEqual([len(message['tokens']) for message in LocalPushTransport.sent], [2, 1])
+        self.assertEqual(LocalPushTransport.sent[0]['data']['notification_id'], str(BroadcastNotification.objects.get().id))
+        LocalPushTransport.sent.clear()
+        NotificationService.send_notification_to_all(
+            self.alerts.notif_id, 'Sale', 'm', exclude_ids=[self.users['offline'].id]
+        )
+        self.assertEqual(LocalPushTransport.sent, [])
+
+    def test_broadcast_reads_tokens_in_chunks(self):
+        with mock.patch.object(push, 'TOKEN_CHUNK_SIZE', 2):
+            chunks = list(push.live_token_chunks())
+            NotificationService.send_notification_to_all(self.alerts.notif_id, 'Sale', 'm')
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+        # One multicast per chunk (ordered by token); the online user's phone is left out
+        self.assertEqual([message['tokens'] for message in LocalPushTransport.sent], [['phone'], ['stale', 'tablet']])
+        self.assertEqual(self._tokens_sent(), ['phone', 'stale', 'tablet'])
+
+    @override_settings(PUSH_IN_BACKGROUND=True)
+    def test_background_send_on_the_executor(self):
+        # The test's rows are uncommitted, so the executor's own connection would not see them
+        with mock.patch.object(push, '_push_offline', side_effect=lambda *args: threading.current_thread().name):
+            future = push.push_to_offline_users('Hi', '', user_ids=[self.users['offline'].id])
+            self.assertTrue(future.result(timeout=10).startswith('push'))
+        self.assertIs(push.background_executor(), push.background_executor())
+
+    @override_settings(PUSH_TRANSPORT='')
+    def test_off_without_transport(self):
+        NotificationService.send_notification([self.users['offline'].id], self.alerts.notif_id, 'Hi', '')
+        self.assertEqual(LocalPushTransport.sent, [])
+
+    def test_firebase_admin_is_only_imported_by_the_fcm_transport(self):
+        self.assertNotIn('firebase_admin', vars(push))
+        with mock.patch.dict(sys.modules, {'firebase_admin': None}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'sonic-backend[push]'):
+                push.FCMPushTransport()
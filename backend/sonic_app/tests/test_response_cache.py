@@ -0,0 +1,78 @@
+"""
+Tests for the public response cache (sonic_app.response_cache).
+"""
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from sonic_app.models import CMS, Category, Product, User
+from sonic_app.response_cache import CountingLocMemCache
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.rings = Category.objects.create(category_name='Rings')
+        self.ring = Product.objects.create(product_name='Ruby Ring', product_weight='3', product_category=self.rings)
+
+    def _get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'] if 'X-Cache' in response else None, json.loads(response.content)
+
+    def test_hit_until_model_saved(self):
+        self.assertEqual(self._get('/app/categories/active/')[0], 'MISS')
+        state, data = self._get('/app/categories/active/')
+        self.assertEqual((state, [c['category_name'] for c in data]), ('HIT', ['Rings']))
+
+        Category.objects.create(category_name='Chains', display_order=-1)
+        state, data = self._get('/app/categories/active/')
+        self.assertEqual((state, [c['category_name'] for c in data]), ('MISS', ['Chains', 'Rings']))
+
+    def test_product_list_invalidated_by_bulk_writes(self):
+        self._get('/app/products/')
+        self.client.post(f'/app/products/{self.ring.id}/variants/bulk/', {'variants': [{'variant_value_1': '6'}]}, format='json')
+        state, data = self._get('/app/products/')
+        self.assertEqual(state, 'MISS')
+        self.assertEqual(len(data['results'][0]['variants']), 1)
+
+        self.assertEqual(self._get('/app/products/')[0], 'HIT')
+        self.client.delete('/app/products/soft_delete/', {'product_ids': [self.ring.id]}, format='json')
+        self.assertEqual(self._get('/app/products/')[1]['results'], [])
+
+    def test_only_touch_update_stamps_updated_at(self):
+        products = Product.objects.filter(pk=self.ring.pk)
+        products.update(product_description='derived')
+        self.assertEqual(products.get().updated_at, self.ring.updated_at)
+        products.touch_update(product_status=False)
+        self.assertGreater(products.get().updated_at, self.ring.updated_at)
+
+    def test_query_params_are_part_of_the_key(self):
+        self._get('/app/products/', category=self.rings.id, ordering='product_name')
+        self.assertEqual(self._get('/app/products/', ordering='product_name', category=self.rings.id)[0], 'HIT')
+        self.assertEqual(self._get('/app/products/', category=self.rings.id + 1)[0], 'MISS')
+        self.assertIsNone(self._get('/app/products/', search='ruby')[0])
+
+    def test_cms_page(self):
+        CMS.objects.create(cms_title='Terms', cms_slug='terms', cms_content='v1')
+        self._get('/app/cms/terms/')
+        self.client.patch('/app/cms/terms/', {'cms_content': 'v2'}, format='json')
+        self.assertEqual(self._get('/app/cms/terms/')[1]['cms_content'], 'v2')
+
+    def test_stats(self):
+        self._get('/app/banners/active/')
+        self._get('/app/banners/active/')
+        self.assertIn(self.client.get('/app/cache-stats').status_code, (401, 403))
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='pass'))
+        stats = self.client.get('/app/cache-stats').data
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+
+    def test_locmem_counts_evictions(self):
+        backend = CountingLocMemCache('evictions-test', {'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}})
+        before = CountingLocMemCache.evictions
+        for i in range(10):
+            backend.set(f'key-{i}', i)
+        self.assertGreater(CountingLocMemCache.evictions, before)
@@ -0,0 +1,77 @@
+"""
+Tests for the seed_load_data management command and run_load_test helpers.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from sonic_app.management.commands.run_load_test import percentile
+from sonic_app.models import (
+    CatalogChange, Category, CategoryField, Product, ProductVariant, ProductFieldValue, User,
+    Session, Order, OrderItem, NotificationTable, ProductLead, StoredFile, AddToCart
+)
+
+SMALL = dict(
+    categories=2, products=10, variants_per_product=3, users=4, sessions_per_user=1,
+    carts_per_user=2, orders_per_user=2, items_per_order=2, notifications_per_user=3,
+    leads=5, files=2, stdout=StringIO(),
+)
+
+
+class SeedLoadDataTests(TestCase):
+    def test_seeds_requested_volumes(self):
+        call_command('seed_load_data', **SMALL)
+        self.assertEqual(Category.objects.filter(category_name__startswith='[load] ').count(), 2)
+        self.assertTrue(CategoryField.objects.filter(category__category_name__startswith='[load] ').exists())
+        self.assertEqual(Product.objects.filter(product_name__startswith='[load] ').count(), 10)
+        self.assertTrue(ProductVariant.objects.exists())
+        self.assertTrue(ProductFieldValue.objects.exists())
+        self.assertEqual(User.objects.filter(username__startswith='load_user_').count(), 4)
+        self.assertEqual(Session.objects.filter(session_key__startswith='load_').count(), 4)
+        self.assertEqual(Order.objects.count(), 8)
+        self.assertTrue(OrderItem.objects.exists())
+        self.assertTrue(AddToCart.objects.exists())
+        self.assertEqual(NotificationTable.objects.count(), 12)
+        self.assertEqual(ProductLead.objects.count(), 5)
+        self.assertEqual(StoredFile.objects.filter(name__startswith='products/load_').count(), 2)
+
+    def test_seeded_catalogue_is_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_load_data', **SMALL)
+        logged = set(CatalogChange.objects.values_list('kind', 'object_id'))
+        for category_id in Category.objects.values_list('id', flat=True):
+            self.assertIn(('category', category_id), logged)
+        for product_id in Product.objects.values_list('id', flat=True):
+            self.assertIn(('product', product_id), logged)
+
+    def test_carts_and_orders_only_hold_active_products(self):
+        call_command('seed_load_data', **{**SMALL, 'products': 60, 'carts_per_user': 10, 'orders_per_user': 5})
+        self.assertTrue(Product.objects.filter(product_status=False).exists())
+        self.assertFalse(AddToCart.objects.filter(cart_product__product_status=False).exists())
+        self.assertFalse(OrderItem.objects.filter(product__product_status=False).exists())
+
+    def test_same_seed_produces_same_data(self):
+        call_command('seed_load_data', seed=7, **SMALL)
+        first = list(Product.objects.order_by('id').values_list('product_name', 'product_price'))
+        first_tokens = list(Session.objects.order_by('id').values_list('auth_token', flat=True))
+        call_command('seed_load_data', seed=7, flush=True, **SMALL)
+        second = list(Product.objects.order_by('id').values_list('product_name', 'product_price'))
+        second_tokens = list(Session.objects.order_by('id').values_list('auth_token', flat=True))
+        self.assertEqual(first, second)
+        self.assertEqual(first_tokens, second_tokens)
+
+    def test_refuses_to_reseed_same_prefix_without_flush(self):
+        call_command('seed_load_data', **SMALL)
+        with self.assertRaises(CommandError):
+            call_command('seed_load_data', **SMALL)
+
+
+class PercentileTests(TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 99), 0.0)
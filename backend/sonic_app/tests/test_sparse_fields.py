@@ -0,0 +1,92 @@
+"""
+Tests for fields= / expand= on the product, order and cart endpoints.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from sonic_app.models import (
+    AddToCart, Category, CategoryField, Order, OrderItem, Product, ProductFieldValue, ProductVariant, User,
+)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.rings = Category.objects.create(category_name='Rings')
+        CategoryField.objects.create(
+            category=self.rings, field_name='size', field_label='Size', field_type='select', is_variant_dimension=True,
+        )
+        self.stone = CategoryField.objects.create(category=self.rings, field_name='stone', field_label='Stone')
+        self.user = User.objects.create_user(username='buyer', password='x')
+        self.products = [self._product(f'Ring {i}') for i in range(3)]
+
+    def _product(self, name):
+        product = Product.objects.create(product_name=name, product_weight='3', product_category=self.rings)
+        for size in ('6', '7'):
+            ProductVariant.objects.create(product=product, variant_value_1=size)
+        ProductFieldValue.objects.create(product=product, category_field=self.stone, field_value='Ruby')
+        return product
+
+    def _get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_fields_keeps_only_requested(self):
+        data, _ = self._get('/app/products/', fields='id,product_name,product_image,product_category_name')
+        self.assertEqual(set(data['results'][0]), {'id', 'product_name', 'product_image', 'product_category_name'})
+
+    def test_expand_picks_heavy_fields(self):
+        data, _ = self._get('/app/products/', expand='')
+        product = data['results'][0]
+        self.assertIn('product_description', product)
+        self.assertFalse({'variants', 'field_values', 'child_products', 'dimension_1_options'} & set(product))
+
+        data, _ = self._get('/app/products/', fields='id', expand='variants')
+        self.assertEqual(set(data['results'][0]), {'id', 'variants'})
+        self.assertEqual(len(data['results'][0]['variants']), 2)
+
+    def test_grid_query_count_does_not_grow(self):
+        _, few = self._get('/app/products/', fields='id,product_name,product_category_name')
+        self._product('Ring 3')
+        self._product('Ring 4')
+        _, more = self._get('/app/products/', fields='id,product_name,product_category_name')
+        self.assertEqual(few, more)
+        _, full = self._get('/app/products/')
+        self.assertGreater(full, more)
+
+    def test_expanded_variants_are_prefetched(self):
+        _, few = self._get('/app/products/', fields='id', expand='variants,field_values')
+        self._product('Ring 3')
+        _, more = self._get('/app/products/', fields='id', expand='variants,field_values')
+        self.assertEqual(few, more)
+
+    def test_order_and_cart(self):
+        for product in self.products:
+            order = Order.objects.create(order_user=self.user, order_price='10')
+            OrderItem.objects.create(order=order, product=product, product_variant=product.variants.first(), price='10')
+            AddToCart.objects.create(cart_user=self.user, cart_product=product, cart_variant=product.variants.first())
+
+        data, _ = self._get('/app/orders/', fields='id,order_status', expand='items_count')
+        self.assertEqual(set(data['results'][0]), {'id', 'order_status', 'items_count'})
+        self.assertEqual(data['results'][0]['items_count'], 1)
+        data, _ = self._get('/app/orders/', expand='order_items')
+        self.assertEqual(len(data['results'][0]['order_items']), 1)
+        self.assertNotIn('items_count', data['results'][0])
+
+        data, _ = self._get('/app/cart/', fields='id,cart_product_name')
+        self.assertEqual(set(data['results'][0]), {'id', 'cart_product_name'})
+        data, _ = self._get('/app/cart/', expand='cart_variant_display')
+        self.assertEqual(data['results'][0]['cart_variant_display'], {'Size': '6'})
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post('/app/products/?fields=id', {
+            'product_name': 'New', 'product_weight': '2', 'product_category': self.rings.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('product_name', response.data)
@@ -0,0 +1,122 @@
+"""
+Tests for typed ProductFieldValue columns and native JSON CategoryField.field_options.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from sonic_app.facets import typed_attribute_value
+from sonic_app.models import Category, CategoryField, Product, ProductFieldValue
+
+
+class TypedFieldValueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(category_name='Rings')
+        self.purity = CategoryField.objects.create(
+            category=self.category, field_name='purity', field_label='Purity', field_type='decimal'
+        )
+        self.hallmarked = CategoryField.objects.create(
+            category=self.category, field_name='hallmarked', field_label='Hallmarked', field_type='boolean'
+        )
+        self.product = Product.objects.create(product_name='Band', product_weight='3', product_category=self.category)
+
+    def test_save_fills_typed_columns(self):
+        purity = ProductFieldValue.objects.create(product=self.product, category_field=self.purity, field_value=' 91.6 ')
+        hallmarked = ProductFieldValue.objects.create(product=self.product, category_field=self.hallmarked, field_value='Yes')
+        purity.refresh_from_db()
+        hallmarked.refresh_from_db()
+        self.assertEqual((purity.value_number, purity.value_boolean), (Decimal('91.6'), None))
+        self.assertEqual((hallmarked.value_number, hallmarked.value_boolean), (None, True))
+
+    def test_non_numeric_value_has_no_number(self):
+        value = ProductFieldValue.objects.create(product=self.product, category_field=self.purity, field_value='n/a')
+        self.assertIsNone(value.value_number)
+
+    def test_save_and_bulk_update_parse_numbers_alike(self):
+        raws = [' 91.6 ', '-2', '12.', '.5', '1e5', '1_000', 'NaN', 'Infinity', '１２', '123456789012345']
+        values = [
+            ProductFieldValue.objects.create(product=product, category_field=self.hallmarked, field_value=raw)
+            for raw, product in zip(raws, [self.product, *(
+                Product.objects.create(product_name=f'P{index}', product_weight='1', product_category=self.category)
+                for index in range(len(raws) - 1)
+            )])
+        ]
+        self.hallmarked.field_type = 'decimal'
+        self.hallmarked.save()  # the SQL path
+        from_sql = [ProductFieldValue.objects.get(pk=value.pk).value_number for value in values]
+        for value in values:
+            value.save()  # the Python path
+        from_save = [ProductFieldValue.objects.get(pk=value.pk).value_number for value in values]
+        self.assertEqual(from_save, from_sql)
+        self.assertEqual(from_save, [Decimal('91.6'), Decimal('-2'), Decimal('12'), Decimal('0.5')] + [None] * 6)
+
+    def test_tab_and_newline_padding_types_alike(self):
+        raws = ['5\t', '\n7 ', '\r\n8.5\n', '\u00a09', 'true\t', '\nyes']
+        products = [self.product, *(
+            Product.objects.create(product_name=f'P{index}', product_weight='1', product_category=self.category)
+            for index in range(len(raws) - 1)
+        )]
+        values = [
+            ProductFieldValue.objects.create(product=product, category_field=self.hallmarked, field_value=raw)
+            for raw, product in zip(raws, products)
+        ]
+        for field_type in ('number', 'boolean'):
+            self.hallmarked.field_type = field_type
+            self.hallmarked.save()  # the SQL path
+            from_sql = list(ProductFieldValue.objects.order_by('id').values_list('value_number', 'value_boolean'))
+            for value in values:
+                value.save()  # the Python path
+            from_save = list(ProductFieldValue.objects.order_by('id').values_list('value_number', 'value_boolean'))
+            self.assertEqual(from_save, from_sql)
+            if field_type == 'number':
+                self.assertEqual([n for n, _ in from_save], [Decimal('5'), Decimal('7'), Decimal('8.5'), None, None, None])
+            else:
+                self.assertEqual([b for _, b in from_save], [False, False, False, False, True, True])
+        self.assertEqual(typed_attribute_value('number', '\t12\n'), Decimal('12'))
+
+    def test_changing_field_type_recomputes_values(self):
+        value = ProductFieldValue.objects.create(product=self.product, category_field=self.hallmarked, field_value='1')
+        self.hallmarked.field_type = 'number'
+        self.hallmarked.save()
+        value.refresh_from_db()
+        self.assertEqual((value.value_number, value.value_boolean), (Decimal('1'), None))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.attributes, {'hallmarked': 1})
+
+    def test_api_rejects_non_numeric_value_for_numeric_field(self):
+        response = self.client.post('/app/product-field-values/', {
+            'product': self.product.id, 'category_field': self.purity.id, 'field_value': 'high',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('field_value', response.data)
+
+
+class FieldOptionsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/app/category-fields/'
+        self.category = Category.objects.create(category_name='Rings')
+
+    def _create(self, field_options, **extra):
+        return self.client.post(self.url, {
+            'category': self.category.id, 'field_name': 'size', 'field_label': 'Size', 'field_type': 'select',
+            'field_options': field_options, **extra,
+        }, format='json')
+
+    def test_accepts_list(self):
+        response = self._create(['6', '7'], is_variant_dimension=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['field_options'], ['6', '7'])
+        self.assertEqual(CategoryField.objects.get().field_options, ['6', '7'])
+
+    def test_decodes_json_string_from_older_clients(self):
+        response = self._create('["6","7"]', is_variant_dimension=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CategoryField.objects.get().field_options, ['6', '7'])
+
+    def test_rejects_invalid_options(self):
+        self.assertEqual(self._create('not json').status_code, 400)
+        self.assertEqual(self._create({'a': 1}).status_code, 400)
+        self.assertEqual(self._create([], is_variant_dimension=True).status_code, 400)
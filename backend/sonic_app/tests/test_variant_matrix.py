@@ -0,0 +1,70 @@
+"""
+Tests for the variant matrix generator (/app/products/<id>/variants/generate/).
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from sonic_app.models import Category, CategoryField, Product, ProductVariant
+
+
+class VariantMatrixTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(category_name='Rings')
+        CategoryField.objects.create(
+            category=self.category, field_name='karat', field_label='Karat', field_type='select',
+            field_options=['18K', '22K'], is_variant_dimension=True, variant_order=2,
+        )
+        CategoryField.objects.create(
+            category=self.category, field_name='size', field_label='Size', field_type='select',
+            field_options=['6', '7', '8'], is_variant_dimension=True, variant_order=1,
+        )
+        self.product = Product.objects.create(
+            product_name='Band', product_weight='3', product_price='1000', product_category=self.category,
+        )
+        self.url = f'/app/products/{self.product.id}/variants/generate/'
+
+    def _post(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def _values(self):
+        return list(ProductVariant.objects.filter(product=self.product).values_list(
+            'variant_value_1', 'variant_value_2', 'price'
+        ))
+
+    def test_full_matrix_in_variant_order_with_modifiers(self):
+        response = self._post({'price_modifiers': {'karat': {'22K': 300}, 'size': {'8': '50.5'}}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 6)
+        self.assertEqual(self._values(), [
+            ('6', '18K', Decimal('1000.00')), ('6', '22K', Decimal('1300.00')),
+            ('7', '18K', Decimal('1000.00')), ('7', '22K', Decimal('1300.00')),
+            ('8', '18K', Decimal('1050.50')), ('8', '22K', Decimal('1350.50')),
+        ])
+
+    def test_selection_and_base_price(self):
+        response = self._post({'selections': {'size': ['7'], 'karat': ['22K']}, 'base_price': 2000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._values(), [('7', '22K', Decimal('2000.00'))])
+
+    def test_regenerate_updates_and_deletes_missing(self):
+        self._post({})
+        response = self._post({
+            'selections': {'size': ['6']}, 'price_modifiers': {'karat': {'22K': 100}}, 'delete_missing': True,
+        })
+        self.assertEqual((len(response.data['unchanged']), len(response.data['updated'])), (1, 1))
+        self.assertEqual(len(response.data['deleted']), 4)
+        self.assertEqual(self._values(), [('6', '18K', Decimal('1000.00')), ('6', '22K', Decimal('1100.00'))])
+
+    def test_rejects_unknown_option_and_dimension(self):
+        self.assertEqual(self._post({'selections': {'size': ['99']}}).status_code, 400)
+        self.assertEqual(self._post({'selections': {'colour': ['red']}}).status_code, 400)
+        self.assertEqual(self._post({'price_modifiers': {'size': {'6': 'a lot'}}}).status_code, 400)
+        self.assertFalse(ProductVariant.objects.exists())
+
+    def test_category_without_dimensions(self):
+        plain = Product.objects.create(product_name='Chain', product_weight='5', product_category=Category.objects.create(category_name='Chains'))
+        response = self.client.post(f'/app/products/{plain.id}/variants/generate/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
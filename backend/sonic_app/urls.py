@@ -7,7 +7,8 @@ from .views import (
     OrderViewSet, CustomizeOrdersViewSet, AddToCartViewSet, BannersViewSet,
     CMSViewSet, NotificationTypeViewSet, NotificationTableViewSet,
     OrderEmailsViewSet, SessionViewSet, client_login, client_registration,
-    send_otp, verify_otp, update_location, health, account_delete, account_delete_by_otp
+    send_otp, verify_otp, update_location, health, catalog, cache_stats,
+    account_delete, account_delete_by_otp
 )
 
 router = DefaultRouter()
@@ -31,6 +32,8 @@ router.register(r'sessions', SessionViewSet, basename='session')
 urlpatterns = [
     path('', include(router.urls)),
     path('health', health, name='health'),
+    path('catalog', catalog, name='catalog'),
+    path('cache-stats', cache_stats, name='cache-stats'),
     path('client-login', csrf_exempt(client_login), name='client-login'),
     path('client-registration', csrf_exempt(client_registration), name='client-registration'),
     path('send-otp', csrf_exempt(send_otp), name='send-otp'),
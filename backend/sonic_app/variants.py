@@ -0,0 +1,177 @@
+"""
+Set-based variant writes for a product.
+
+upsert_variants() saves a whole variant list with one INSERT ... ON CONFLICT on the
+(product, variant_value_1, variant_value_2) unique constraint and returns a compact diff.
+build_variant_matrix() expands per-dimension option selections (from the category's
+variant-dimension CategoryField.field_options) into that list.
+"""
+from decimal import Decimal, InvalidOperation
+from itertools import product as cartesian_product
+
+from django.db import transaction
+
+from .catalog import KIND_PRODUCT, record_catalog_changes
+from .models import CategoryField, ProductVariant
+
+# ProductVariant has two value columns
+MAX_VARIANT_DIMENSIONS = 2
+
+_UNSET = object()
+
+
+class VariantPayloadError(ValueError):
+    """A variant row in the request cannot be saved; message is safe to return to the client."""
+
+
+def _clean_value(value):
+    if value in (None, ''):
+        return None
+    return str(value).strip() or None
+
+
+def _clean_price(value, label):
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        price = None
+    if price is None or price.adjusted() >= 8:
+        raise VariantPayloadError(f'{label} must be a number below 100000000.')
+    return price
+
+
+def _clean_order(value, index):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise VariantPayloadError(f'variants[{index}].display_order must be an integer.')
+
+
+def upsert_variants(product, rows, delete_missing=False):
+    """
+    rows: [{"variant_value_1": "20", "variant_value_2": "22K", "price": "1200", "display_order": 0}, ...]
+    Rows without variant_value_1 are skipped. price/display_order are optional: omitted on an
+    existing variant they are left as they are; a new variant gets its position in rows as
+    display_order. With delete_missing, variants of the product not in rows are deleted.
+
+    Returns {'created': [ids], 'updated': [ids], 'unchanged': [ids], 'deleted': [ids]}.
+    """
+    wanted = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise VariantPayloadError(f'variants[{index}] must be an object.')
+        value_1 = _clean_value(row.get('variant_value_1'))
+        if value_1 is None:
+            continue
+        key = (value_1, _clean_value(row.get('variant_value_2')))
+        wanted[key] = {
+            'price': _clean_price(row['price'], f'variants[{index}].price') if 'price' in row else _UNSET,
+            'display_order': _clean_order(row['display_order'], index) if 'display_order' in row else _UNSET,
+            'index': index,
+        }
+
+    existing = {(v.variant_value_1, v.variant_value_2): v for v in ProductVariant.objects.filter(product=product)}
+    to_write, created_keys, updated_keys, unchanged = [], set(), set(), []
+    for key, spec in wanted.items():
+        current = existing.get(key)
+        price = spec['price'] if spec['price'] is not _UNSET else (current.price if current else None)
+        order = spec['display_order'] if spec['display_order'] is not _UNSET else (
+            current.display_order if current else spec['index']
+        )
+        if current is not None and current.price == price and current.display_order == order:
+            unchanged.append(current.id)
+            continue
+        (updated_keys if current is not None else created_keys).add(key)
+        to_write.append(ProductVariant(
+            product=product, variant_value_1=key[0], variant_value_2=key[1],
+            price=price, display_order=order,
+        ))
+
+    missing = [v.id for key, v in existing.items() if key not in wanted] if delete_missing else []
+    with transaction.atomic():
+        saved = ProductVariant.objects.bulk_create(
+            to_write,
+            update_conflicts=True,
+            unique_fields=['product', 'variant_value_1', 'variant_value_2'],
+            update_fields=['price', 'display_order', 'updated_at'],
+        )
+        if missing:
+            # Order items, cart rows and leads keep their rows; their variant is set to NULL
+            ProductVariant.objects.filter(id__in=missing).delete()
+        if to_write:
+            record_catalog_changes(KIND_PRODUCT, [product.pk])
+
+    return {
+        'created': [v.id for v in saved if (v.variant_value_1, v.variant_value_2) in created_keys],
+        'updated': [v.id for v in saved if (v.variant_value_1, v.variant_value_2) in updated_keys],
+        'unchanged': unchanged,
+        'deleted': missing,
+    }
+
+
+def variant_dimensions(category_id):
+    """The category's variant-dimension fields in slot order (variant_value_1, variant_value_2)."""
+    return list(
+        CategoryField.objects.filter(category_id=category_id, is_variant_dimension=True, is_delete=False)
+        .order_by('variant_order', 'display_order', 'id')[:MAX_VARIANT_DIMENSIONS]
+    )
+
+
+def build_variant_matrix(product, selections=None, price_modifiers=None, base_price=None):
+    """
+    Rows for upsert_variants() covering every combination of the selected options.
+
+    selections: {field_name: [option, ...]} per variant dimension; a dimension left out uses all
+    of its field_options. price_modifiers: {field_name: {option: amount}} added to base_price
+    (default product.product_price). Prices stay empty when there is no base price.
+    """
+    selections = selections or {}
+    price_modifiers = price_modifiers or {}
+    if not isinstance(selections, dict) or not isinstance(price_modifiers, dict):
+        raise VariantPayloadError('selections and price_modifiers must be objects keyed by field_name.')
+    dimensions = variant_dimensions(product.product_category_id)
+    if not dimensions:
+        raise VariantPayloadError("This product's category has no variant dimensions.")
+    names = {field.field_name for field in dimensions}
+    unknown = sorted(set(selections) - names) + sorted(set(price_modifiers) - names)
+    if unknown:
+        raise VariantPayloadError(f'Not a variant dimension of this category: {", ".join(unknown)}.')
+
+    axes = []
+    for field in dimensions:
+        options = [str(option) for option in (field.field_options or [])]
+        chosen = selections.get(field.field_name, options)
+        if not isinstance(chosen, list) or not chosen:
+            raise VariantPayloadError(f'Select at least one {field.field_label} option.')
+        chosen = [str(option).strip() for option in chosen]
+        invalid = [option for option in chosen if option not in options]
+        if invalid:
+            raise VariantPayloadError(f'{field.field_label} has no option {", ".join(invalid)}.')
+        modifiers = price_modifiers.get(field.field_name, {})
+        if not isinstance(modifiers, dict):
+            raise VariantPayloadError(f'price_modifiers.{field.field_name} must map options to amounts.')
+        try:
+            modifiers = {str(option): Decimal(str(amount)) for option, amount in modifiers.items()}
+        except InvalidOperation:
+            raise VariantPayloadError(f'price_modifiers.{field.field_name} amounts must be numbers.')
+        axes.append([(option, modifiers.get(option, Decimal('0'))) for option in dict.fromkeys(chosen)])
+
+    if base_price in (None, ''):
+        base_price = product.product_price
+    else:
+        base_price = _clean_price(base_price, 'base_price')
+    rows = []
+    for order, combination in enumerate(cartesian_product(*axes)):
+        values = [option for option, _ in combination]
+        price = None
+        if base_price is not None:
+            price = base_price + sum(amount for _, amount in combination)
+        rows.append({
+            'variant_value_1': values[0],
+            'variant_value_2': values[1] if len(values) > 1 else None,
+            'price': price,
+            'display_order': order,
+        })
+    return rows
@@ -1,21 +1,42 @@
+import tempfile
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.parsers import MultiPartParser
 from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.utils.http import quote_etag
+from django.db import transaction
 from django.db.models import Q
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from .services import NotificationService, OTPSmsService, normalize_phone
+from .services import NotificationService, OTPSmsService, UnreadCounter, mark_read_batch_params, normalize_phone
+from .search import search_products, update_product_search_vectors
+from .variants import VariantPayloadError, build_variant_matrix, upsert_variants
+from .facets import apply_attribute_filters, facet_counts, update_product_attributes
+from .async_views import AsyncReadMixin
+from .conditional import ConditionalGetMixin, etag_matches
+from .broadcasts import broadcast_entry, feed, feed_entries, hide_broadcasts
+from .media import media_base_url
+from .rows import FastListMixin
+from .response_cache import bump_generation, cache_response, response_cache_stats
+from .catalog import (
+    KIND_BANNER, KIND_CATEGORY, KIND_PRODUCT, absolute_media_urls, build_catalog, record_catalog_changes,
+)
+from .product_io import (
+    FILE_FORMATS, ProductFileError, aiter_csv_export, aiter_file, detect_file_format, import_products, write_xlsx_export,
+)
 
 from .models import (
     Category, CategoryField, User, Product, ProductVariant, ProductFieldValue, ProductLead,
     Order, OrderItem, CustomizeOrders, AddToCart,
-    Banners, CMS, NotificationType, NotificationTable,
+    Banners, CMS, NotificationType, NotificationTable, BroadcastNotification, BroadcastReceipt,
     OrderEmails, Session, OTP
 )
 from .serializers import (
@@ -24,13 +45,16 @@ from .serializers import (
     OrderSerializer, OrderItemSerializer, CustomizeOrdersSerializer, AddToCartSerializer,
     BannersSerializer, CMSSerializer, NotificationTypeSerializer,
     NotificationTableSerializer, OrderEmailsSerializer, SessionSerializer, ClientRegistrationSerializer, OTPSerializer,
-    SendOTPSerializer, VerifyOTPSerializer,
+    SendOTPSerializer, VerifyOTPSerializer, optimize_queryset,
 )
 
 # OTP rate limits
 MAX_OTP_SENDS_PER_HOUR = 5
 MAX_OTP_VERIFY_ATTEMPTS = 5
 
+# Product list pages served from the response cache
+PRODUCT_LIST_CACHED_PAGES = 3
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -42,6 +66,39 @@ def health(request):
     )
 
 
+@extend_schema(
+    summary="Catalogue snapshot",
+    description="Active categories (with their fields), products (with variants and attributes) and banners in one "
+                "versioned document. The ETag is the version: send it back in If-None-Match for a 304 when nothing "
+                "changed. With ?since=<version> only rows changed after that version are listed, and \"deleted\" "
+                "holds the ids per section that were deleted or deactivated; \"full\" is true when the whole "
+                "document was sent instead (no since, or a version too old to diff against).",
+    parameters=[OpenApiParameter('since', OpenApiTypes.INT, description='Version the client already has')],
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def catalog(request):
+    """Whole-catalogue snapshot / delta for the mobile app"""
+    since = request.query_params.get('since')
+    document = build_catalog(int(since) if since and since.isdigit() else None)
+    etag = quote_etag(f"catalog-{document['version']}")
+    if etag_matches(request.headers.get('If-None-Match', ''), etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(absolute_media_urls(document, media_base_url(request)))
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@extend_schema(summary="Response cache statistics")
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """Hit/miss/eviction counters of the public response cache"""
+    return Response(response_cache_stats())
+
+
 @extend_schema_view(
     list=extend_schema(summary="List all categories"),
     create=extend_schema(summary="Create a new category"),
@@ -50,10 +107,12 @@ def health(request):
     partial_update=extend_schema(summary="Partially update category"),
     destroy=extend_schema(summary="Delete category"),
 )
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(AsyncReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """Category ViewSet with CRUD operations"""
     queryset = Category.objects.filter(is_delete=False)
     serializer_class = CategorySerializer
+    conditional_models = (Product,)
+    async_actions = ('active',)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['category_status']
     search_fields = ['category_name', 'category_description']
@@ -61,12 +120,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
     ordering = ['display_order', '-created_at']
 
     @action(detail=False, methods=['get'])
+    @cache_response(Category, Product)
     def active(self, request):
         """Get active categories"""
         categories = self.queryset.filter(category_status=True)
         serializer = self.get_serializer(categories, many=True)
         return Response(serializer.data)
 
+    @cache_response(Category, Product)
+    async def aactive(self, request):
+        return Response(await self.aserialize(self.queryset.filter(category_status=True), many=True))
+
     @action(detail=True, methods=['get'])
     def products(self, request, pk=None):
         """Get products in this category"""
@@ -84,10 +148,11 @@ class CategoryViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple categories"""
         category_ids = request.data.get('category_ids', [])
-        Category.objects.filter(id__in=category_ids).update(
+        Category.objects.filter(id__in=category_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
+        record_catalog_changes(KIND_CATEGORY, Category.objects.filter(id__in=category_ids).values_list('id', flat=True))
         return Response({'message': 'Categories soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
@@ -99,10 +164,11 @@ class CategoryViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Partially update category field"),
     destroy=extend_schema(summary="Delete category field"),
 )
-class CategoryFieldViewSet(viewsets.ModelViewSet):
+class CategoryFieldViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Category Field ViewSet with CRUD operations"""
     queryset = CategoryField.objects.filter(is_delete=False)
     serializer_class = CategoryFieldSerializer
+    conditional_models = (Category,)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['category', 'field_type', 'is_required', 'is_variant_dimension']
     search_fields = ['field_name', 'field_label']
@@ -120,10 +186,13 @@ class CategoryFieldViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple category fields"""
         field_ids = request.data.get('field_ids', [])
-        CategoryField.objects.filter(id__in=field_ids).update(
+        CategoryField.objects.filter(id__in=field_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
+        record_catalog_changes(
+            KIND_CATEGORY, CategoryField.objects.filter(id__in=field_ids).values_list('category_id', flat=True)
+        )
         return Response({'message': 'Category fields soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
@@ -135,10 +204,11 @@ class CategoryFieldViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Partially update product field value"),
     destroy=extend_schema(summary="Delete product field value"),
 )
-class ProductFieldValueViewSet(viewsets.ModelViewSet):
+class ProductFieldValueViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Product Field Value ViewSet with CRUD operations"""
     queryset = ProductFieldValue.objects.all()
     serializer_class = ProductFieldValueSerializer
+    conditional_models = (CategoryField,)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['product', 'category_field']
     ordering_fields = ['created_at']
@@ -151,37 +221,77 @@ class ProductFieldValueViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(product_id=product_id)
         return queryset
 
+    @extend_schema(
+        summary="Bulk save product field values",
+        description="Upserts field values for one or more products in a single statement. Body: "
+                    '{"product_id": 1, "field_values": [{"category_field": 3, "field_value": "22K"}, ...]}; '
+                    'an item may carry its own "product" to save several products in one call. Every '
+                    "category_field must belong to its product's category; nothing is saved if any item is invalid.",
+    )
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """Bulk create or update product field values"""
         product_id = request.data.get('product_id')
         field_values = request.data.get('field_values', [])
-        
-        if not product_id:
+        if not isinstance(field_values, list):
+            return Response({'error': 'field_values must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Entries without a field or value are skipped, as before
+        items = []
+        for index, fv in enumerate(field_values):
+            if not isinstance(fv, dict) or not fv.get('category_field') or fv.get('field_value') is None:
+                continue
+            items.append((index, fv.get('product') or product_id, fv['category_field'], str(fv['field_value'])))
+        if not product_id and any(item_product is None for _, item_product, _, _ in items):
             return Response({'error': 'product_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        created = []
-        updated = []
-        
-        for fv in field_values:
-            category_field_id = fv.get('category_field')
-            field_value = fv.get('field_value')
-            
-            if category_field_id and field_value is not None:
-                obj, is_created = ProductFieldValue.objects.update_or_create(
-                    product_id=product_id,
-                    category_field_id=category_field_id,
-                    defaults={'field_value': field_value}
+        try:
+            product_ids = {int(item[1]) for item in items}
+            field_ids = {int(item[2]) for item in items}
+        except (TypeError, ValueError):
+            return Response({'error': 'product and category_field must be ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = Product.objects.filter(is_delete=False).in_bulk(product_ids)
+        fields = CategoryField.objects.filter(is_delete=False).in_bulk(field_ids)
+        errors = []
+        values = {}
+        for index, item_product, field_id, field_value in items:
+            product, field = products.get(int(item_product)), fields.get(int(field_id))
+            if product is None:
+                errors.append({'index': index, 'error': f'Product {item_product} does not exist.'})
+            elif field is None:
+                errors.append({'index': index, 'error': f'Category field {field_id} does not exist.'})
+            elif field.category_id != product.product_category_id:
+                errors.append({'index': index, 'error': f'{field.field_label} is not a field of this product\'s category.'})
+            elif (
+                field.field_type in ProductFieldValue.NUMERIC_FIELD_TYPES
+                and field_value.strip()
+                and ProductFieldValue.parse_number(field_value) is None
+            ):
+                errors.append({'index': index, 'error': f'{field.field_label} must be a number.'})
+            else:
+                # Last value wins when the same field is sent twice
+                values[(product.id, field.id)] = ProductFieldValue(
+                    product=product, category_field=field, field_value=field_value
                 )
-                if is_created:
-                    created.append(obj.id)
-                else:
-                    updated.append(obj.id)
-        
+        if errors:
+            return Response({'error': 'Invalid field values', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        existing = set(
+            ProductFieldValue.objects.filter(product_id__in=product_ids, category_field_id__in=field_ids)
+            .values_list('product_id', 'category_field_id')
+        )
+        with transaction.atomic():
+            saved = ProductFieldValue.bulk_upsert(list(values.values()))
+            saved_product_ids = list({value.product_id for value in saved})
+            # bulk_create skips the signal handlers that maintain these
+            update_product_search_vectors(saved_product_ids)
+            update_product_attributes(saved_product_ids)
+            record_catalog_changes(KIND_PRODUCT, saved_product_ids)
+
         return Response({
             'message': 'Field values saved successfully',
-            'created': created,
-            'updated': updated
+            'created': [v.id for v in saved if (v.product_id, v.category_field_id) not in existing],
+            'updated': [v.id for v in saved if (v.product_id, v.category_field_id) in existing],
         }, status=status.HTTP_200_OK)
 
 
@@ -193,10 +303,11 @@ class ProductFieldValueViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Partially update product variant"),
     destroy=extend_schema(summary="Delete product variant"),
 )
-class ProductVariantViewSet(viewsets.ModelViewSet):
+class ProductVariantViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Product Variant ViewSet with CRUD operations"""
     queryset = ProductVariant.objects.all()
     serializer_class = ProductVariantSerializer
+    conditional_models = (Product, CategoryField)
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['product']
     ordering_fields = ['display_order', 'id']
@@ -211,7 +322,7 @@ class ProductVariantViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Partially update user"),
     destroy=extend_schema(summary="Delete user"),
 )
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """User ViewSet with CRUD operations"""
     queryset = User.objects.filter(is_delete=False)
     serializer_class = UserSerializer
@@ -259,6 +370,7 @@ class UserViewSet(viewsets.ModelViewSet):
             is_delete=True,
             deleted_at=timezone.now()
         )
+        bump_generation(User)
         return Response({'message': 'Users soft deleted successfully'}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['patch'])
@@ -299,10 +411,23 @@ class UserViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+def _first_list_pages(request):
+    """Only the first few pages of the plain product list are worth caching."""
+    page = request.query_params.get('page', '1')
+    return page.isdigit() and int(page) <= PRODUCT_LIST_CACHED_PAGES and not request.query_params.get('search')
+
+
+_product_list_cache = cache_response(
+    Product, ProductVariant, ProductFieldValue, Category, CategoryField, condition=_first_list_pages
+)
+
+
+class ProductViewSet(AsyncReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     """Product ViewSet with CRUD operations"""
     queryset = Product.objects.filter(is_delete=False)
     serializer_class = ProductSerializer
+    conditional_models = (ProductVariant, ProductFieldValue, Category, CategoryField)
+    async_actions = ('list', 'retrieve')
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['product_status', 'product_is_parent', 'product_parent_id', 'product_category']
     search_fields = ['product_name', 'product_description']
@@ -347,8 +472,120 @@ class ProductViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(product_category_id=int(category_id))
             except (ValueError, TypeError):
                 pass
-        
-        return queryset
+
+        # Attribute filtering (attr.karat=22K, attr.purity.min=90, ...)
+        queryset = apply_attribute_filters(queryset, self.request.query_params)
+
+        # Joins/prefetches for the fields= / expand= actually requested
+        return optimize_queryset(queryset, ProductSerializer, self.request.query_params)
+
+    @extend_schema(
+        summary="Search products",
+        description="Ranked full-text search over name, description, category and field values (karat, purity, ...). "
+                    "Every word is prefix-matched, so it can be called on each keystroke. Supports the same "
+                    "category/status/min_price/max_price filters as the list.",
+        parameters=[OpenApiParameter('q', OpenApiTypes.STR, required=True, description='Search text')],
+    )
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked product search backed by Product.search_vector"""
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = search_products(self.get_queryset(), q)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Product facets",
+        description="Value counts per attribute and variant dimension for the products matching the current "
+                    "filters (category, price, attr.*), for building filter sidebars. Numeric attributes also "
+                    "report min/max.",
+        parameters=[
+            OpenApiParameter('category', OpenApiTypes.INT, description='Restrict facets to one category'),
+            OpenApiParameter('attr.<field_name>', OpenApiTypes.STR, description='Comma-separated values; '
+                             'attr.<field_name>.min / .max for numeric ranges'),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Facet counts for the filtered product list"""
+        queryset = self.get_queryset()
+        category_id = request.query_params.get('category')
+        if category_id and not category_id.isdigit():
+            category_id = None
+        return Response({
+            'count': queryset.count(),
+            'facets': facet_counts(queryset, category_id),
+        })
+
+    @extend_schema(
+        summary="Import products from CSV/XLSX",
+        description="Streams the uploaded sheet (one row per variant, attr.<field_name> columns for field values; "
+                    "see GET /products/export/ for the layout) and upserts products, variants and field values "
+                    "in chunks. Invalid products are skipped and reported per row. Staff only.",
+        request={'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'file': {'type': 'string', 'format': 'binary'},
+                'file_format': {'type': 'string', 'enum': list(FILE_FORMATS)},
+            },
+            'required': ['file'],
+        }},
+    )
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser],
+            parser_classes=[MultiPartParser])
+    def import_catalog(self, request):
+        """Bulk product import"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or detect_file_format(upload.name)
+        if file_format not in FILE_FORMATS:
+            return Response({'error': 'file_format must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            summary = import_products(upload, file_format)
+        except ProductFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Export products as CSV/XLSX",
+        description="The whole catalogue (all statuses, not deleted) in the import layout. CSV is streamed row by "
+                    "row; XLSX (a zip archive) is built in a temporary file first and sent once complete.",
+        parameters=[
+            OpenApiParameter('file_format', OpenApiTypes.STR, enum=list(FILE_FORMATS), description='Default csv'),
+            OpenApiParameter('category', OpenApiTypes.INT, description='Only this category'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def export(self, request):
+        """Bulk product export"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FILE_FORMATS:
+            return Response({'error': 'file_format must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = Product.objects.filter(is_delete=False, product_parent_id__isnull=True)
+        category_id = request.query_params.get('category')
+        if category_id and category_id.isdigit():
+            queryset = queryset.filter(product_category_id=int(category_id))
+        filename = f'products-{timezone.now():%Y%m%d-%H%M%S}.{file_format}'
+        if file_format == 'xlsx':
+            # A zip cannot be sent before it is complete: build it on disk, then stream the file
+            fileobj = tempfile.TemporaryFile()
+            write_xlsx_export(queryset, fileobj)
+            fileobj.seek(0)
+            response = StreamingHttpResponse(
+                aiter_file(fileobj), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        else:
+            response = StreamingHttpResponse(aiter_csv_export(queryset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
     @action(detail=True, methods=['get'])
     def children(self, request, pk=None):
@@ -358,44 +595,85 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(children, many=True)
         return Response(serializer.data)
 
+    @extend_schema(
+        summary="Bulk save product variants",
+        description='Body: {"variants": [{"variant_value_1": "20", "variant_value_2": "22K", "price": "1200", '
+                    '"display_order": 0}, ...], "delete_missing": false}. Inserts and updates the whole list in one '
+                    "statement; price/display_order left out keep their current values. With delete_missing, "
+                    "variants not in the list are deleted. Returns the ids created, updated, unchanged and deleted.",
+    )
     @action(detail=True, methods=['post'], url_path='variants/bulk')
     def bulk_create_variants(self, request, pk=None):
-        """Bulk create product variants. Body: { "variants": [ {"variant_value_1": "20", "variant_value_2": "9"}, ... ] }"""
+        """Bulk upsert product variants"""
         product = self.get_object()
         variants_data = request.data.get('variants', [])
         if not isinstance(variants_data, list):
             return Response({'error': 'variants must be a list'}, status=status.HTTP_400_BAD_REQUEST)
-        created = 0
-        for i, v in enumerate(variants_data):
-            val1 = v.get('variant_value_1')
-            val2 = v.get('variant_value_2') if v.get('variant_value_2') not in (None, '') else None
-            if not val1:
-                continue
-            _, was_created = ProductVariant.objects.get_or_create(
-                product=product,
-                variant_value_1=str(val1).strip(),
-                variant_value_2=str(val2).strip() if val2 else None,
-                defaults={'display_order': i}
+        delete_missing = str(request.data.get('delete_missing', '')).lower() in ('true', '1')
+        try:
+            diff = upsert_variants(product, variants_data, delete_missing=delete_missing)
+        except VariantPayloadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': f"Created {len(diff['created'])} variant(s)",
+            'product_id': product.id,
+            **diff,
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Generate product variant matrix",
+        description='Body: {"selections": {"size": ["6", "7"], "karat": ["18K", "22K"]}, '
+                    '"price_modifiers": {"karat": {"22K": 300}}, "base_price": 1000, "delete_missing": false}. '
+                    "Builds every combination of the selected options of the category's variant dimensions "
+                    "(in variant_order; a dimension left out uses all its options), prices each as base_price "
+                    "(default product_price) plus the modifiers, and saves the matrix like variants/bulk.",
+    )
+    @action(detail=True, methods=['post'], url_path='variants/generate')
+    def generate_variants(self, request, pk=None):
+        """Generate variants from variant-dimension options"""
+        product = self.get_object()
+        delete_missing = str(request.data.get('delete_missing', '')).lower() in ('true', '1')
+        try:
+            rows = build_variant_matrix(
+                product,
+                selections=request.data.get('selections'),
+                price_modifiers=request.data.get('price_modifiers'),
+                base_price=request.data.get('base_price'),
             )
-            if was_created:
-                created += 1
-        serializer = ProductSerializer(product, context=self.get_serializer_context())
-        return Response({'message': f'Created {created} variant(s)', 'product': serializer.data}, status=status.HTTP_200_OK)
+            diff = upsert_variants(product, rows, delete_missing=delete_missing)
+        except VariantPayloadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': f"Generated {len(rows)} variant(s)",
+            'product_id': product.id,
+            **diff,
+        }, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['delete'])
     def soft_delete(self, request):
         """Soft delete multiple products"""
         product_ids = request.data.get('product_ids', [])
-        Product.objects.filter(id__in=product_ids).update(
+        Product.objects.filter(id__in=product_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
+        record_catalog_changes(KIND_PRODUCT, Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
         return Response({'message': 'Products soft deleted successfully'}, status=status.HTTP_200_OK)
 
+    @_product_list_cache
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
+    # Defined last: the name shadows the list builtin for the rest of the class body
+    @_product_list_cache
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
-class ProductLeadViewSet(viewsets.ModelViewSet):
+class ProductLeadViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Product leads from QR scan. Only staff can create (from app); any authenticated user can list (e.g. admin panel)."""
     serializer_class = ProductLeadSerializer
+    conditional_models = (Product,)
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post']
 
@@ -416,10 +694,11 @@ class ProductLeadViewSet(viewsets.ModelViewSet):
         serializer.save(submitted_by=self.request.user)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     """Order ViewSet with CRUD operations"""
     queryset = Order.objects.filter(is_delete=False)
     serializer_class = OrderSerializer
+    conditional_models = (OrderItem, Product, ProductVariant)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['order_status', 'order_user', 'order_product']
     ordering_fields = ['created_at', 'order_date', 'order_price']
@@ -430,7 +709,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         user_id = self.request.query_params.get('user_id', None)
         if user_id:
             queryset = queryset.filter(order_user_id=user_id)
-        return queryset
+        return optimize_queryset(queryset, OrderSerializer, self.request.query_params)
 
     @action(detail=False, methods=['post'])
     def checkout(self, request):
@@ -499,7 +778,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
         
         # Clear cart (soft delete cart items that were checked out)
-        cart_items.update(is_delete=True, deleted_at=timezone.now())
+        cart_items.touch_update(is_delete=True, deleted_at=timezone.now())
         
         # Serialize and return order with items
         serializer = self.get_serializer(order)
@@ -509,14 +788,14 @@ class OrderViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple orders"""
         order_ids = request.data.get('order_ids', [])
-        Order.objects.filter(id__in=order_ids).update(
+        Order.objects.filter(id__in=order_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
         return Response({'message': 'Orders soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class CustomizeOrdersViewSet(viewsets.ModelViewSet):
+class CustomizeOrdersViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Customize Orders ViewSet with CRUD operations"""
     queryset = CustomizeOrders.objects.filter(is_delete=False)
     serializer_class = CustomizeOrdersSerializer
@@ -537,17 +816,19 @@ class CustomizeOrdersViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple customize orders"""
         order_ids = request.data.get('order_ids', [])
-        CustomizeOrders.objects.filter(id__in=order_ids).update(
+        CustomizeOrders.objects.filter(id__in=order_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
         return Response({'message': 'Customize orders soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class AddToCartViewSet(viewsets.ModelViewSet):
+class AddToCartViewSet(AsyncReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     """Add to Cart ViewSet with CRUD operations"""
     queryset = AddToCart.objects.filter(is_delete=False)
     serializer_class = AddToCartSerializer
+    conditional_models = (Product, ProductVariant, CategoryField)
+    async_actions = ('list',)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['cart_status', 'cart_user']
     ordering_fields = ['created_at']
@@ -558,7 +839,7 @@ class AddToCartViewSet(viewsets.ModelViewSet):
         user_id = self.request.query_params.get('user_id', None)
         if user_id:
             queryset = queryset.filter(cart_user_id=user_id, cart_status=True)
-        return queryset
+        return optimize_queryset(queryset, AddToCartSerializer, self.request.query_params)
 
     def create(self, request, *args, **kwargs):
         """Override create to handle duplicate items gracefully, including soft-deleted ones. Supports cart_variant."""
@@ -651,7 +932,7 @@ class AddToCartViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple cart items"""
         cart_ids = request.data.get('cart_ids', [])
-        AddToCart.objects.filter(id__in=cart_ids).update(
+        AddToCart.objects.filter(id__in=cart_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
@@ -662,7 +943,7 @@ class AddToCartViewSet(viewsets.ModelViewSet):
         """Clear user's cart"""
         user_id = request.data.get('user_id')
         if user_id:
-            AddToCart.objects.filter(cart_user_id=user_id, cart_status=True).update(
+            AddToCart.objects.filter(cart_user_id=user_id, cart_status=True).touch_update(
                 is_delete=True,
                 deleted_at=timezone.now()
             )
@@ -670,10 +951,12 @@ class AddToCartViewSet(viewsets.ModelViewSet):
         return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BannersViewSet(viewsets.ModelViewSet):
+class BannersViewSet(AsyncReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """Banners ViewSet with CRUD operations"""
     queryset = Banners.objects.filter(is_delete=False)
     serializer_class = BannersSerializer
+    conditional_models = (Product,)
+    async_actions = ('active',)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['banner_status', 'banner_product_id']
     search_fields = ['banner_title']
@@ -681,24 +964,30 @@ class BannersViewSet(viewsets.ModelViewSet):
     ordering = ['banner_order', '-created_at']
 
     @action(detail=False, methods=['get'])
+    @cache_response(Banners, Product)
     def active(self, request):
         """Get active banners"""
         banners = self.queryset.filter(banner_status=True)
         serializer = self.get_serializer(banners, many=True)
         return Response(serializer.data)
 
+    @cache_response(Banners, Product)
+    async def aactive(self, request):
+        return Response(await self.aserialize(self.queryset.filter(banner_status=True), many=True))
+
     @action(detail=False, methods=['delete'])
     def soft_delete(self, request):
         """Soft delete multiple banners"""
         banner_ids = request.data.get('banner_ids', [])
-        Banners.objects.filter(id__in=banner_ids).update(
+        Banners.objects.filter(id__in=banner_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
+        record_catalog_changes(KIND_BANNER, Banners.objects.filter(id__in=banner_ids).values_list('id', flat=True))
         return Response({'message': 'Banners soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class CMSViewSet(viewsets.ModelViewSet):
+class CMSViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """CMS ViewSet with CRUD operations"""
     queryset = CMS.objects.filter(is_delete=False)
     serializer_class = CMSSerializer
@@ -709,7 +998,12 @@ class CMSViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
     lookup_field = 'cms_slug'
 
+    @cache_response(CMS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @cache_response(CMS)
     def active(self, request):
         """Get active CMS pages"""
         pages = self.queryset.filter(cms_status=True)
@@ -720,14 +1014,14 @@ class CMSViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple CMS pages"""
         cms_ids = request.data.get('cms_ids', [])
-        CMS.objects.filter(id__in=cms_ids).update(
+        CMS.objects.filter(id__in=cms_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
         return Response({'message': 'CMS pages soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class NotificationTypeViewSet(viewsets.ModelViewSet):
+class NotificationTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Notification Type ViewSet with CRUD operations"""
     queryset = NotificationType.objects.filter(is_delete=False)
     serializer_class = NotificationTypeSerializer
@@ -741,17 +1035,19 @@ class NotificationTypeViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple notification types"""
         type_ids = request.data.get('type_ids', [])
-        NotificationType.objects.filter(notif_id__in=type_ids).update(
+        NotificationType.objects.filter(notif_id__in=type_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
         return Response({'message': 'Notification types soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class NotificationTableViewSet(viewsets.ModelViewSet):
+class NotificationTableViewSet(AsyncReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     """Notification Table ViewSet with CRUD operations"""
     queryset = NotificationTable.objects.filter(is_delete=False)
     serializer_class = NotificationTableSerializer
+    conditional_models = (NotificationType, BroadcastNotification, BroadcastReceipt)
+    async_actions = ('list',)
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['notification_read', 'notification_user', 'notification_type']
     search_fields = ['notification_title', 'notification_message']
@@ -761,21 +1057,84 @@ class NotificationTableViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user_id = self.request.query_params.get('user_id', None)
-        read_status = self.request.query_params.get('read', None)
-        
+        read = self._read_param()
+
         if user_id:
             queryset = queryset.filter(notification_user_id=user_id)
-        if read_status is not None:
-            queryset = queryset.filter(notification_read=read_status.lower() == 'true')
-        
+        if read is not None:
+            queryset = queryset.filter(notification_read=read)
+
         return queryset
 
+    def _read_param(self):
+        """read (or notification_read) as True / False, None when absent; true and 1 mean read."""
+        params = self.request.query_params
+        read = params.get('read', params.get('notification_read'))
+        return None if read is None else read.lower() in ('true', '1')
+
+    def list(self, request, *args, **kwargs):
+        """
+        A user's list (user_id or notification_user) also has the broadcasts they get, marked
+        broadcast: true. It takes the same read, notification_type, search, ordering and fields=
+        parameters as the plain list.
+        """
+        params = request.query_params
+        user = self._feed_user(params.get('user_id') or params.get('notification_user'))
+        if user is None:
+            return super().list(request, *args, **kwargs)
+        rows = self._feed(self.filter_queryset(self.get_queryset()), user)
+        page = self.paginate_queryset(rows)
+        fields = tuple(self.get_serializer().fields)
+        if page is None:
+            return Response(feed_entries(rows, fields))
+        return self.get_paginated_response(feed_entries(page, fields))
+
+    async def alist(self, request, *args, **kwargs):
+        params = request.query_params
+        users = self._feed_users(params.get('user_id') or params.get('notification_user'))
+        user = await users.afirst() if users is not None else None
+        if user is None:
+            return await super().alist(request, *args, **kwargs)
+        rows = self._feed(await self.afilter_queryset(self.get_queryset()), user)
+        page = await self.apaginate_queryset(rows)
+        fields = tuple(self.get_serializer().fields)
+        if page is None:
+            return Response(feed_entries([row async for row in rows], fields))
+        return self.get_paginated_response(feed_entries(page, fields))
+
+    def _feed(self, queryset, user):
+        params = self.request.query_params
+        return feed(
+            queryset, user,
+            read=self._read_param(),
+            notification_type=params.get('notification_type'),
+            search=params.get('search'),
+            # The list's own ?ordering= parsing (ordering_fields, default ordering)
+            ordering=OrderingFilter().get_ordering(self.request, queryset, self),
+        )
+
+    def _feed_users(self, user_id):
+        if user_id and str(user_id).isdigit():
+            return User.objects.filter(id=user_id)
+        return None
+
+    def _feed_user(self, user_id):
+        users = self._feed_users(user_id)
+        return users.first() if users is not None else None
+
     @action(detail=True, methods=['patch'])
     def mark_read(self, request, pk=None):
-        """Mark notification as read"""
+        """Mark notification as read (a broadcast id: for user_id, else the logged-in user)"""
+        user = self._feed_user(request.data.get('user_id') or request.user.id)
+        if user is not None and BroadcastNotification.objects.filter(pk=pk).exists():
+            NotificationService.mark_notification_read(int(pk), user.id)
+            entry = broadcast_entry(user, pk)
+            if entry is None:
+                return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(entry)
         notification = self.get_object()
-        notification.notification_read = True
-        notification.save()
+        NotificationService.mark_notification_read(notification.id, notification.notification_user_id)
+        notification.refresh_from_db()
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
 
@@ -784,13 +1143,36 @@ class NotificationTableViewSet(viewsets.ModelViewSet):
         """Mark all notifications as read for a user"""
         user_id = request.data.get('user_id')
         if user_id:
-            NotificationTable.objects.filter(
-                notification_user_id=user_id,
-                notification_read=False
-            ).update(notification_read=True)
+            NotificationService.mark_read_batch(user_id)
             return Response({'message': 'All notifications marked as read'}, status=status.HTTP_200_OK)
         return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def mark_read_batch(self, request):
+        """Mark many notifications as read in one UPDATE: notification_ids list or up_to_id"""
+        user_id = request.data.get('user_id') or request.user.id
+        if not user_id:
+            return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            notification_ids, up_to_id = mark_read_batch_params(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        marked = NotificationService.mark_read_batch(user_id, notification_ids, up_to_id)
+        return Response({
+            'marked': marked,
+            'unread_count': UnreadCounter.get(user_id)
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Unread notification count for the badge (user_id param, else the logged-in user)"""
+        user_id = request.query_params.get('user_id') or request.user.id
+        if not user_id:
+            return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not str(user_id).isdigit() or not User.objects.filter(id=user_id).exists():
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'user_id': int(user_id), 'unread_count': UnreadCounter.get(user_id)})
+
     @action(detail=False, methods=['post'])
     def send_notification(self, request):
         """Send notification to specific users via WebSocket and store in database"""
@@ -834,14 +1216,27 @@ class NotificationTableViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple notifications"""
         notification_ids = request.data.get('notification_ids', [])
-        NotificationTable.objects.filter(id__in=notification_ids).update(
+        # Broadcasts are only removed from the requesting user's list
+        broadcast_user_id = request.data.get('user_id') or request.user.id
+        if broadcast_user_id and hide_broadcasts(broadcast_user_id, notification_ids):
+            UnreadCounter.push(broadcast_user_id)
+        notifications = NotificationTable.objects.filter(id__in=notification_ids)
+        # Owners losing an unread notification; their badge counts are redone after the update
+        user_ids = set(notifications.filter(
+            notification_read=False,
+            is_delete=False
+        ).values_list('notification_user_id', flat=True))
+        notifications.touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
+        for user_id in user_ids:
+            UnreadCounter.recount(user_id)
+            UnreadCounter.push(user_id)
         return Response({'message': 'Notifications soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class OrderEmailsViewSet(viewsets.ModelViewSet):
+class OrderEmailsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Order Emails ViewSet with CRUD operations"""
     queryset = OrderEmails.objects.filter(is_delete=False)
     serializer_class = OrderEmailsSerializer
@@ -855,14 +1250,14 @@ class OrderEmailsViewSet(viewsets.ModelViewSet):
     def soft_delete(self, request):
         """Soft delete multiple order emails"""
         email_ids = request.data.get('email_ids', [])
-        OrderEmails.objects.filter(mail_id__in=email_ids).update(
+        OrderEmails.objects.filter(mail_id__in=email_ids).touch_update(
             is_delete=True,
             deleted_at=timezone.now()
         )
         return Response({'message': 'Order emails soft deleted successfully'}, status=status.HTTP_200_OK)
 
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Session ViewSet with CRUD operations"""
     queryset = Session.objects.all()
     serializer_class = SessionSerializer
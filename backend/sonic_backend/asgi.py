@@ -19,13 +19,16 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sonic_backend.settings')
 django_asgi_app = get_asgi_application()
 
 # Import after Django setup
+from sonic_app.auth import BearerTokenAuthMiddleware
 from sonic_app.routing import websocket_urlpatterns
 
 application = ProtocolTypeRouter({
     'http': django_asgi_app,
     'websocket': AllowedHostsOriginValidator(
         AuthMiddlewareStack(
-            URLRouter(websocket_urlpatterns)
+            BearerTokenAuthMiddleware(
+                URLRouter(websocket_urlpatterns)
+            )
         )
     ),
 })
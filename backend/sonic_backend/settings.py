@@ -4,6 +4,7 @@ Django settings for sonic_backend project.
 
 from pathlib import Path
 from decouple import config
+import importlib.util
 import os
 import dj_database_url
 
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'django_filters',
@@ -46,6 +48,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'sonic_app.middleware.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'sonic_app.middleware.CompressionMiddleware',  # before anything that reads or writes the body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -145,6 +148,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # Media files – store in PostgreSQL (no S3 needed)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# scheme://host of a CDN or custom domain serving MEDIA_URL; media URLs use the request's host when empty
+MEDIA_BASE_URL = config('MEDIA_BASE_URL', default='')
 DEFAULT_FILE_STORAGE = 'sonic_app.db_storage.DatabaseStorage'
 
 # Default primary key field type
@@ -153,6 +158,12 @@ DEFAULT_FILE_STORAGE = 'sonic_app.db_storage.DatabaseStorage'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework configuration
+# Renderer for API responses; sonic_app.renderers.FastJSONRenderer writes the same bytes with orjson
+JSON_RENDERER = config('JSON_RENDERER', default='rest_framework.renderers.JSONRenderer')
+if JSON_RENDERER == 'sonic_app.renderers.FastJSONRenderer' and importlib.util.find_spec('orjson') is None:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured('JSON_RENDERER=sonic_app.renderers.FastJSONRenderer needs orjson (pip install orjson).')
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -167,7 +178,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER,
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -223,6 +234,48 @@ else:
         }
     }
 
+# WebSocket notifications (sonic_app.consumers)
+WEBSOCKET_IDLE_TIMEOUT = config('WEBSOCKET_IDLE_TIMEOUT', default=300, cast=float)  # seconds without a client message; 0 = never close
+WEBSOCKET_AUTH_CACHE_TIMEOUT = config('WEBSOCKET_AUTH_CACHE_TIMEOUT', default=60, cast=int)  # seconds a Bearer token lookup is cached
+NOTIFICATION_REPLAY_BATCH_SIZE = config('NOTIFICATION_REPLAY_BATCH_SIZE', default=50, cast=int)  # missed notifications per replay message
+NOTIFICATION_REPLAY_MAX = config('NOTIFICATION_REPLAY_MAX', default=500, cast=int)  # beyond this the app reloads over REST
+
+# Push notifications to users without an open socket (sonic_app.push)
+PUSH_TRANSPORT = config('PUSH_TRANSPORT', default='')  # e.g. sonic_app.push.FCMPushTransport; empty = off
+FCM_CREDENTIALS_FILE = config('FCM_CREDENTIALS_FILE', default='')  # Firebase service account JSON
+PUSH_CONCURRENCY = config('PUSH_CONCURRENCY', default=4, cast=int)  # multicast batches in flight
+PUSH_IN_BACKGROUND = config('PUSH_IN_BACKGROUND', default=True, cast=bool)  # send after the response, in a thread
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)  # archive_notifications default; 0 keeps all
+CATALOG_CHANGE_RETENTION_DAYS = config('CATALOG_CHANGE_RETENTION_DAYS', default=30, cast=int)  # prune_catalog_changes default; 0 keeps all
+
+# Cache – Redis when REDIS_URL is set (shared by all workers), else local memory per process
+if _redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': _redis_url,
+            'KEY_PREFIX': 'sonic',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'sonic_app.response_cache.CountingLocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        }
+    }
+# Seconds a cached public GET response (sonic_app.response_cache) may live; 0 disables the cache
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# Build product/order/cart/notification list rows from values_list() (sonic_app.rows)
+FAST_LIST_ROWS = config('FAST_LIST_ROWS', default=False, cast=bool)
+# Serve the hot GET endpoints from async handlers under ASGI (sonic_app.async_views); read at URL load
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Response compression (sonic_app.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)  # bytes; 0 disables
+GZIP_LEVEL = config('GZIP_LEVEL', default=5, cast=int)  # 1-9
+BROTLI_QUALITY = config('BROTLI_QUALITY', default=4, cast=int)  # 0-11
+
 # Pearl SMS (OTP)
 PEARLSMS_API_KEY = config('PEARLSMS_API_KEY', default='')
 PEARLSMS_SENDER = config('PEARLSMS_SENDER', default='SPPLFW')
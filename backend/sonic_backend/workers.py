@@ -0,0 +1,13 @@
+"""
+Gunicorn worker class for the ASGI application (see gunicorn.conf.py).
+"""
+from uvicorn_worker import UvicornWorker
+
+
+class ASGIWorker(UvicornWorker):
+    """
+    UvicornWorker with the lifespan protocol off: channels' ProtocolTypeRouter only routes
+    'http' and 'websocket' scopes, so uvicorn would log a failed lifespan startup per worker.
+    """
+
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, 'lifespan': 'off'}
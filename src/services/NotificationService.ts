@@ -4,6 +4,7 @@
  */
 
 import { WS_BASE_URL } from '../api/EndPoint';
+import { Storage } from '../core/Storage';
 
 export interface Notification {
   id: number;
@@ -16,6 +17,7 @@ export interface Notification {
 
 type NotificationCallback = (notification: Notification) => void;
 type ConnectionCallback = (connected: boolean) => void;
+type UnreadCountCallback = (unreadCount: number) => void;
 
 export class NotificationService {
   private ws: WebSocket | null = null;
@@ -24,16 +26,22 @@ export class NotificationService {
   private reconnectTimer: NodeJS.Timeout | null = null;
   private notificationCallbacks: NotificationCallback[] = [];
   private connectionCallbacks: ConnectionCallback[] = [];
+  private unreadCountCallbacks: UnreadCountCallback[] = [];
   private isIntentionalClose: boolean = false;
+  // The server closes sockets that stay silent for WEBSOCKET_IDLE_TIMEOUT (default 300s)
+  private pingInterval: number = 60000;
+  private pingTimer: ReturnType<typeof setInterval> | null = null;
+  // Newest notification id received; sent on reconnect so the server replays what was missed
+  private lastSeenId: number | null = null;
 
   constructor(wsBaseUrl: string) {
     this.url = `${wsBaseUrl.replace(/\/$/, '')}/ws/notifications/`;
   }
 
   /**
-   * Connect to WebSocket server
+   * Connect to WebSocket server (authenticated with the login Bearer token)
    */
-  connect(): void {
+  async connect(): Promise<void> {
     if (this.ws && this.ws.readyState === WebSocket.OPEN) {
       console.log('WebSocket already connected');
       return;
@@ -41,8 +49,19 @@ export class NotificationService {
 
     this.isIntentionalClose = false;
 
+    // Anonymous sockets are rejected by the server; wait for a login
+    const token = await Storage.get<string>('@auth_token').catch(() => null);
+    if (!token) {
+      return;
+    }
+
+    if (this.lastSeenId === null) {
+      this.lastSeenId = await Storage.get<number>('@notifications_last_seen_id').catch(() => null);
+    }
+    const replayFrom = this.lastSeenId !== null ? `&last_seen_id=${this.lastSeenId}` : '';
+
     try {
-      this.ws = new WebSocket(this.url);
+      this.ws = new WebSocket(`${this.url}?token=${encodeURIComponent(token)}${replayFrom}`);
 
       this.ws.onopen = () => {
         console.log('WebSocket connected');
@@ -53,6 +72,9 @@ export class NotificationService {
           clearTimeout(this.reconnectTimer);
           this.reconnectTimer = null;
         }
+
+        this.stopPing();
+        this.pingTimer = setInterval(() => this.sendPing(), this.pingInterval);
       };
 
       this.ws.onmessage = (event) => {
@@ -61,6 +83,20 @@ export class NotificationService {
           
           if (data.type === 'notification' && data.notification) {
             this.notifyCallbacks(data.notification);
+          } else if (data.type === 'replay') {
+            // Missed while disconnected, oldest first; ask for the next batch once handled
+            (data.notifications as Notification[]).forEach(notification => this.notifyCallbacks(notification));
+            if (data.more) {
+              this.ws?.send(JSON.stringify({ type: 'replay_next' }));
+            }
+          } else if (data.type === 'unread_count') {
+            // Sent on connect and whenever the count changes (new, read, deleted)
+            this.unreadCountCallbacks.forEach(callback => {
+              try {
+                callback(data.unread_count);
+              } catch {
+              }
+            });
           } else if (data.type === 'connection_established') {
             console.log('Connection established:', data.message);
           } else if (data.type === 'pong') {
@@ -75,6 +111,7 @@ export class NotificationService {
 
       this.ws.onclose = () => {
         console.log('WebSocket disconnected');
+        this.stopPing();
         this.notifyConnectionCallbacks(false);
         
         // Attempt to reconnect if not intentionally closed
@@ -92,6 +129,7 @@ export class NotificationService {
    */
   disconnect(): void {
     this.isIntentionalClose = true;
+    this.stopPing();
     
     if (this.reconnectTimer) {
       clearTimeout(this.reconnectTimer);
@@ -119,6 +157,16 @@ export class NotificationService {
     }, this.reconnectInterval);
   }
 
+  /**
+   * Stop the keep-alive pings
+   */
+  private stopPing(): void {
+    if (this.pingTimer) {
+      clearInterval(this.pingTimer);
+      this.pingTimer = null;
+    }
+  }
+
   /**
    * Send ping to keep connection alive
    */
@@ -143,6 +191,20 @@ export class NotificationService {
     }
   }
 
+  /**
+   * Mark several notifications as read in one message: a list of ids, or every one up to an id.
+   * The server answers with a single marked_read_batch acknowledgement.
+   */
+  markManyAsRead(batch: { notificationIds: number[] } | { upToId: number }): void {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(
+        'upToId' in batch
+          ? { type: 'mark_read_batch', up_to_id: batch.upToId }
+          : { type: 'mark_read_batch', notification_ids: batch.notificationIds },
+      ));
+    }
+  }
+
   /**
    * Subscribe to notification events
    */
@@ -158,6 +220,21 @@ export class NotificationService {
     };
   }
 
+  /**
+   * Subscribe to unread count changes (badge)
+   */
+  onUnreadCount(callback: UnreadCountCallback): () => void {
+    this.unreadCountCallbacks.push(callback);
+
+    // Return unsubscribe function
+    return () => {
+      const index = this.unreadCountCallbacks.indexOf(callback);
+      if (index > -1) {
+        this.unreadCountCallbacks.splice(index, 1);
+      }
+    };
+  }
+
   /**
    * Subscribe to connection status changes
    */
@@ -177,6 +254,10 @@ export class NotificationService {
    * Notify all notification callbacks
    */
   private notifyCallbacks(notification: Notification): void {
+    if (this.lastSeenId === null || notification.id > this.lastSeenId) {
+      this.lastSeenId = notification.id;
+      Storage.set('@notifications_last_seen_id', notification.id).catch(() => {});
+    }
     this.notificationCallbacks.forEach(callback => {
       try {
         callback(notification);